@@ -1,7 +1,21 @@
 import pandas as pd
 import mysql.connector
 from mysql.connector import Error
+import io
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingest.archive import ArchiveWriter
+from ingest.bulk_writer import BulkWriter
+from ingest.compression import find_input, open_input
+from ingest.dedup import ensure_unique_key
+from ingest.schema import add_column_if_missing, add_fulltext_index_if_missing, add_index_if_missing, convert_to_datetime
+from ingest.follow import follow
+from ingest.pipeline import run_pipeline
+from ingest.rollups import ensure_entity_rollups, ensure_summary_tables, refresh_summaries
+from ingest.stats import IngestStats
+from ingest.timestamps import to_pydatetime
 
 # 🔧 MySQL Credentials
 MYSQL_HOST = 'localhost'
@@ -10,6 +24,94 @@ MYSQL_PASSWORD = 'rootroot'
 MYSQL_DATABASE = 'siem'
 TABLE_NAME = 'antivirus_logs'
 
+# CSV column → table column
+COLUMN_MAP = {
+    'og_id': 'log_id',
+    'timestamp': 'timestamp',
+    'file_path': 'file_path',
+    'malware_type': 'malware_type',
+    'severity': 'severity',
+    'scan_type': 'scan_type',
+    'os': 'os',
+    'detection_method': 'detection_method',
+    'machine_id': 'machine_id',
+    'action_taken': 'action_taken',
+    'file_size_kb': 'file_size_kb',
+    'is_persistent': 'is_persistent',
+    'network_activity': 'network_activity',
+}
+
+# Telemetry stored natively instead of as text (older tables get these columns added)
+TELEMETRY_COLUMNS = {
+    'machine_id': 'VARCHAR(50)',
+    'action_taken': 'VARCHAR(50)',
+    'file_size_kb': 'DOUBLE',
+    'is_persistent': 'BOOLEAN',
+    'network_activity': 'BOOLEAN',
+}
+NUMERIC_COLUMNS = ['file_size_kb']
+FLAG_COLUMNS = ['is_persistent', 'network_activity']
+TEXT_COLUMNS = [c for c in COLUMN_MAP if c not in ('timestamp', *NUMERIC_COLUMNS, *FLAG_COLUMNS)]
+
+# 🔎 Text columns behind the dashboard search (n-gram FULLTEXT index)
+SEARCH_COLUMNS = ['log_id', 'file_path', 'malware_type', 'severity', 'scan_type', 'machine_id', 'detection_method']
+
+# 📈 Columns whose value counts the dashboard charts read from the summary rollups
+SUMMARY_COLUMNS = ['severity', 'malware_type']
+
+# 🧭 Indexes behind the dashboard's server-side filters. InnoDB appends the primary
+# key to each, so a filtered page still seeks by id (WHERE col = ? AND id < ? ORDER BY id DESC)
+FILTER_INDEXES = {
+    'idx_machine_id': ['machine_id'],
+    'idx_severity': ['severity'],
+    'idx_malware_type': ['malware_type'],
+    'idx_severity_malware_type': ['severity', 'malware_type'],
+}
+
+# 📦 Per-machine minute/hour detection counts (see ingest/rollups.py): metric → SQL summed per bucket
+ENTITY_ROLLUPS = {
+    'machine_id': {
+        'metrics': {
+            'critical': "severity = 'Critical'",
+            'high': "severity = 'High'",
+            'persistent': 'COALESCE(is_persistent, 0)',
+            'network': 'COALESCE(network_activity, 0)',
+        },
+    },
+}
+
+# Field order of a headerless export row (e.g. a syslog payload)
+CSV_HEADER = ['og_id', 'timestamp', 'machine_id', 'os', 'file_path', 'malware_type', 'detection_method',
+              'scan_type', 'action_taken', 'severity', 'file_size_kb', 'is_persistent', 'network_activity']
+
+# 🕒 Export timestamps look like '27-05-2025 10:16' (day first, treated as UTC)
+TIMESTAMP_FORMAT = '%d-%m-%Y %H:%M'
+TIMESTAMP_SQL = (
+    "CASE WHEN `timestamp` REGEXP '^[0-9]{2}-[0-9]{2}-[0-9]{4} [0-9]{2}:[0-9]{2}' "
+    "THEN STR_TO_DATE(LEFT(`timestamp`, 16), '%d-%m-%Y %H:%i') END"
+)
+
+# 🚚 Bulk writes
+BATCH_SIZE = 5000
+USE_LOAD_DATA = False   # True → LOAD DATA LOCAL INFILE instead of multi-row INSERTs
+
+# 🧵 Pipelined ingest: the CSV is parsed chunk by chunk while writer threads insert
+PIPELINE_MODE = True
+PIPELINE_WRITERS = 1
+PIPELINE_QUEUE_DEPTH = 4
+
+# 🧊 Also append every ingested row to the day-partitioned Parquet archive (needs pyarrow)
+ARCHIVE_MODE = False
+ARCHIVE_COLUMNS = {column: 'string' for column in COLUMN_MAP.values()}
+ARCHIVE_COLUMNS.update({'timestamp': 'timestamp', 'file_size_kb': 'float64',
+                        'is_persistent': 'bool', 'network_activity': 'bool'})
+
+# 👀 Follow mode: ingest only rows appended since the last run
+FOLLOW_MODE = False
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+WATCH_PATTERN = os.path.join(SCRIPT_DIR, "antivirus_logs*.csv")
+CHECKPOINT_FILE = os.path.join(SCRIPT_DIR, ".antivirus_logs.checkpoint.json")
+
 def create_database_and_table():
     conn = None  # Initialize conn to None
     try:
@@ -32,15 +134,38 @@ def create_database_and_table():
             CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 log_id VARCHAR(100),
-                timestamp VARCHAR(100),
+                timestamp DATETIME,
                 file_path TEXT,
                 malware_type VARCHAR(100),
                 severity VARCHAR(50),
                 scan_type VARCHAR(100),
                 os VARCHAR(50),
-                detection_method VARCHAR(100)
+                detection_method VARCHAR(100),
+                machine_id VARCHAR(50),
+                action_taken VARCHAR(50),
+                file_size_kb DOUBLE,
+                is_persistent BOOLEAN,
+                network_activity BOOLEAN,
+                UNIQUE KEY uq_log_id (log_id),
+                INDEX idx_timestamp (timestamp),
+                INDEX idx_machine_id (machine_id),
+                INDEX idx_severity (severity)
             )
         """)
+        added = [column for column, definition in TELEMETRY_COLUMNS.items()
+                 if add_column_if_missing(cursor, TABLE_NAME, column, definition)]
+        if added:
+            print(f"🆕 Added {', '.join(added)} to '{TABLE_NAME}' (rows loaded before stay NULL there).")
+        for index_name, columns in FILTER_INDEXES.items():
+            add_index_if_missing(cursor, TABLE_NAME, index_name, columns)
+        # og_id/log_id is the natural key; older tables get deduplicated and indexed
+        ensure_unique_key(cursor, TABLE_NAME, 'uq_log_id', ['log_id'])
+        # Older tables stored timestamps as text
+        convert_to_datetime(cursor, TABLE_NAME, 'timestamp', TIMESTAMP_SQL, 'idx_timestamp')
+        if add_fulltext_index_if_missing(cursor, TABLE_NAME, 'ft_search', SEARCH_COLUMNS):
+            print(f"🔎 Built search index on {', '.join(SEARCH_COLUMNS)}.")
+        ensure_summary_tables(cursor)
+        ensure_entity_rollups(cursor, TABLE_NAME, 'timestamp', ENTITY_ROLLUPS)
         print(f"Table '{TABLE_NAME}' ready.")
         conn.commit()
 
@@ -51,53 +176,136 @@ def create_database_and_table():
             cursor.close()
             conn.close()
 
+def connect_for_insert():
+    return mysql.connector.connect(
+        host=MYSQL_HOST,
+        database=MYSQL_DATABASE,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        allow_local_infile=USE_LOAD_DATA
+    )
+
+def parse_timestamps(values):
+    parsed = pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors='coerce')
+    # Anything not in the export format gets one lenient day-first retry
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], dayfirst=True, errors='coerce')
+    return parsed
+
+def _optional(values):
+    # NaN → None so MySQL stores NULL
+    return [None if pd.isna(v) else v for v in values.tolist()]
+
+def frame_to_rows(df):
+    columns = {c: _optional(df[c].astype(str).where(df[c].notna())) for c in TEXT_COLUMNS}
+    columns['timestamp'] = [to_pydatetime(ts) for ts in parse_timestamps(df['timestamp'])]
+    for c in NUMERIC_COLUMNS:
+        columns[c] = _optional(pd.to_numeric(df[c], errors='coerce').astype(float))
+    for c in FLAG_COLUMNS:
+        flags = pd.to_numeric(df[c], errors='coerce')
+        columns[c] = _optional(flags.astype(object).where(flags.isna(), flags != 0))
+    return zip(*(columns[c] for c in COLUMN_MAP))
+
+def lines_to_rows(lines, header=",".join(CSV_HEADER)):
+    """CSV lines (without their header) → table rows."""
+    df = pd.read_csv(io.StringIO("\n".join([header] + list(lines))))
+    df.columns = df.columns.str.strip()
+    return list(frame_to_rows(df))
+
+def iter_row_batches(file):
+    """Table rows of an open CSV, BATCH_SIZE rows at a time (only one chunk in memory)."""
+    for df in pd.read_csv(file, chunksize=BATCH_SIZE):
+        df.columns = df.columns.str.strip()
+        yield list(frame_to_rows(df))
+
+def open_writer(conn, stats):
+    # Rows whose log_id is already stored are skipped, so re-runs are idempotent
+    archive = ArchiveWriter(TABLE_NAME, ARCHIVE_COLUMNS, 'timestamp') if ARCHIVE_MODE else None
+    return BulkWriter(conn, TABLE_NAME, list(COLUMN_MAP.values()), batch_size=BATCH_SIZE,
+                      use_load_data=USE_LOAD_DATA, stats=stats, on_duplicate='ignore', archive=archive,
+                      archive_key=['log_id'])
+
+def update_summaries(conn=None):
+    """Fold rows inserted since the last call into the dashboard's summary rollups (see ingest/rollups.py)."""
+    own = conn is None
+    conn = conn or connect_for_insert()
+    try:
+        return refresh_summaries(conn, TABLE_NAME, SUMMARY_COLUMNS, 'timestamp', ENTITY_ROLLUPS)
+    finally:
+        if own:
+            conn.close()
+
 def insert_csv_to_db(csv_path):
     conn = None # Initialize conn to None
+    stats = IngestStats(TABLE_NAME)
     try:
-        # Read CSV
-        df = pd.read_csv(csv_path)
+        # Read CSV (.csv.gz/.bz2/.xz/.zst are decompressed while pandas reads them)
+        if PIPELINE_MODE:
+            with open_input(csv_path, stats) as file:
+                pipeline = run_pipeline(iter_row_batches(file), connect_for_insert, open_writer,
+                                        stats, PIPELINE_WRITERS, PIPELINE_QUEUE_DEPTH)
+            print(pipeline.summary())
+        else:
+            with open_input(csv_path, stats) as file, stats.timing('parse'):
+                df = pd.read_csv(file)
 
-        # Clean column names
-        df.columns = df.columns.str.strip()
+            # Clean column names
+            df.columns = df.columns.str.strip()
 
-        # Connect to DB
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            database=MYSQL_DATABASE,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD
-        )
-        cursor = conn.cursor()
+            # Connect to DB
+            conn = connect_for_insert()
 
-        # Insert rows
-        for _, row in df.iterrows():
-            cursor.execute(f"""
-                INSERT INTO {TABLE_NAME}
-                (log_id, timestamp, file_path, malware_type, severity, scan_type, os, detection_method)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                str(row['og_id']),
-                str(row['timestamp']),
-                str(row['file_path']),
-                str(row['malware_type']),
-                str(row['severity']),
-                str(row['scan_type']),
-                str(row['os']),
-                str(row['detection_method'])
-            ))
+            # Insert rows in batches
+            with stats.timing('write'), open_writer(conn, stats) as writer:
+                writer.write_many(frame_to_rows(df))
+        with stats.timing('summaries'):
+            update_summaries(conn)
 
-        conn.commit()
-        print(f"Inserted {len(df)} rows into '{TABLE_NAME}'.")
+        print(f"Inserted {stats.rows} rows into '{TABLE_NAME}' "
+              f"({stats.duplicates} already present).")
 
     except Error as e:
         print("Data insertion error:", e)
     finally:
         if conn is not None and conn.is_connected(): # Check if conn is not None
-            cursor.close()
             conn.close()
 
+    stats.stop()
+    print(stats.summary())
+    return stats
+
+def follow_csv_files(pattern=WATCH_PATTERN, checkpoint_path=CHECKPOINT_FILE):
+    """Tail antivirus exports, inserting only rows appended since the last checkpoint."""
+    conn = None
+    stats = IngestStats(TABLE_NAME)
+    try:
+        conn = connect_for_insert()
+        with open_writer(conn, stats) as writer:
+            def handle(path, lines, header):
+                rows = lines_to_rows(lines, header)
+                writer.ensure_connected()
+                writer.write_many(rows)
+                writer.flush()
+                update_summaries(conn)
+
+            follow(pattern, handle, checkpoint_path, has_header=True)
+    except Error as e:
+        print("Data insertion error:", e)
+    finally:
+        if conn is not None and conn.is_connected():
+            conn.close()
+
+    stats.stop()
+    print(stats.summary())
+    return stats
+
 if __name__ == "__main__":
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_file_path = os.path.join(script_dir, "antivirus_logs.csv") 
+    csv_file_path = os.path.join(script_dir, "antivirus_logs.csv")
+    csv_file_path = find_input(csv_file_path) or csv_file_path
     create_database_and_table()
-    insert_csv_to_db(csv_file_path)
\ No newline at end of file
+    if FOLLOW_MODE:
+        follow_csv_files()
+    else:
+        insert_csv_to_db(csv_file_path)
\ No newline at end of file
@@ -1,13 +1,78 @@
 import pandas as pd
 import mysql.connector
 from mysql.connector import Error
+import io
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingest.archive import ArchiveWriter
+from ingest.bulk_writer import BulkWriter
+from ingest.compression import find_input, open_input
+from ingest.dedup import ensure_row_hash, with_row_hash
+from ingest.schema import add_fulltext_index_if_missing, add_index_if_missing, convert_to_datetime
+from ingest.follow import follow
+from ingest.geoip import enricher, ensure_geo_columns, load_index
+from ingest.pipeline import run_pipeline
+from ingest.rollups import ensure_entity_rollups, ensure_summary_tables, refresh_summaries
+from ingest.stats import IngestStats
+from ingest.timestamps import to_pydatetime
 
 MYSQL_HOST = 'localhost'
 MYSQL_USER = 'root'
 MYSQL_PASSWORD = 'rootroot'
 MYSQL_DATABASE = 'siem'
 TABLE_NAME = 'login_log_data'
+DB_COLUMNS = ['login_timestamp', 'ip_address', 'asn', 'login_successful']
+# Field order of a headerless CSV row (e.g. a syslog payload)
+CSV_HEADER = ['Login Timestamp', 'IP Address', 'ASN', 'Login Successful']
+
+# Migration of pre-existing VARCHAR timestamps ('2020-02-03 12:43:30.772') to DATETIME
+LOGIN_TIMESTAMP_SQL = (
+    "CASE WHEN login_timestamp REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2}' "
+    "THEN CAST(login_timestamp AS DATETIME) END"
+)
+
+BATCH_SIZE = 5000
+USE_LOAD_DATA = False   # True → LOAD DATA LOCAL INFILE instead of multi-row INSERTs
+
+# 🧵 Pipelined ingest: the CSV is parsed chunk by chunk while writer threads insert
+PIPELINE_MODE = True
+PIPELINE_WRITERS = 1
+PIPELINE_QUEUE_DEPTH = 4
+
+# 🌍 The export carries the ASN; the country is looked up offline (see ingest/geoip.py)
+GEOIP_ENRICH = True
+GEO_COLUMNS = ['country']
+
+# 🔎 Text columns behind the dashboard search (n-gram FULLTEXT index)
+SEARCH_COLUMNS = ['ip_address', 'asn']
+
+# 📈 Columns whose value counts the dashboard charts read from the summary rollups
+SUMMARY_COLUMNS = ['login_successful', 'asn']
+
+# 🧭 Indexes behind the dashboard's server-side filters. InnoDB appends the primary
+# key to each, so a filtered page still seeks by id (WHERE col = ? AND id < ? ORDER BY id DESC)
+FILTER_INDEXES = {
+    'idx_ip_address': ['ip_address'],
+    'idx_login_successful': ['login_successful'],
+}
+
+# 📦 Per-IP minute/hour attempt counts (see ingest/rollups.py): metric → SQL summed per bucket
+ENTITY_ROLLUPS = {
+    'ip_address': {'metrics': {'failures': 'NOT login_successful'}},
+}
+
+# Also append every ingested row to the day-partitioned Parquet archive (needs pyarrow)
+ARCHIVE_MODE = False
+ARCHIVE_COLUMNS = {'login_timestamp': 'timestamp', 'ip_address': 'string', 'asn': 'string',
+                   'login_successful': 'bool', 'row_hash': 'string'}
+
+# Follow mode: ingest only rows appended since the last run
+FOLLOW_MODE = False
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WATCH_PATTERN = os.path.join(BASE_DIR, "loginlog*.csv")
+CHECKPOINT_FILE = os.path.join(BASE_DIR, ".login_log_data.checkpoint.json")
 
 def create_database_and_table():
     try:
@@ -26,12 +91,26 @@ def create_database_and_table():
         cursor.execute(f"""
             CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
                 id INT AUTO_INCREMENT PRIMARY KEY,
-                login_timestamp VARCHAR(100),
+                login_timestamp DATETIME,
                 ip_address VARCHAR(45),
                 asn VARCHAR(50),
-                login_successful BOOLEAN
+                login_successful BOOLEAN,
+                row_hash CHAR(40),
+                UNIQUE KEY uq_row_hash (row_hash),
+                INDEX idx_login_timestamp (login_timestamp)
             )
         """)
+        # Older tables: add + backfill row_hash, drop duplicates, enforce uniqueness
+        ensure_row_hash(cursor, TABLE_NAME, DB_COLUMNS)
+        # ...then turn the string timestamps into an indexed DATETIME
+        convert_to_datetime(cursor, TABLE_NAME, 'login_timestamp', LOGIN_TIMESTAMP_SQL, 'idx_login_timestamp')
+        ensure_geo_columns(cursor, TABLE_NAME, GEO_COLUMNS)
+        for index_name, columns in FILTER_INDEXES.items():
+            add_index_if_missing(cursor, TABLE_NAME, index_name, columns)
+        if add_fulltext_index_if_missing(cursor, TABLE_NAME, 'ft_search', SEARCH_COLUMNS):
+            print(f"🔎 Built search index on {', '.join(SEARCH_COLUMNS)}.")
+        ensure_summary_tables(cursor)
+        ensure_entity_rollups(cursor, TABLE_NAME, 'login_timestamp', ENTITY_ROLLUPS)
         print(f"✅ Table '{TABLE_NAME}' ready.")
         conn.commit()
 
@@ -42,37 +121,84 @@ def create_database_and_table():
             cursor.close()
             conn.close()
 
+def connect_for_insert():
+    return mysql.connector.connect(
+        host=MYSQL_HOST,
+        database=MYSQL_DATABASE,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        allow_local_infile=USE_LOAD_DATA
+    )
+
+def frame_to_rows(df):
+    rows = zip(
+        df['Login Timestamp'].astype(str),
+        df['IP Address'].astype(str),
+        df['ASN'].astype(str),
+        df['Login Successful'].astype(bool).tolist()   # Python bools: hashed as 1/0, bindable
+    )
+    # Hash the raw values, store the timestamp as a (UTC) datetime
+    timestamps = pd.to_datetime(df['Login Timestamp'], errors='coerce', utc=True).dt.tz_convert(None)
+    for row, ts in zip(map(with_row_hash, rows), timestamps):
+        yield (to_pydatetime(ts),) + row[1:]
+
+def lines_to_rows(lines, header=",".join(CSV_HEADER)):
+    """CSV lines (without their header) → table rows."""
+    df = pd.read_csv(io.StringIO("\n".join([header] + list(lines))))
+    df.columns = df.columns.str.strip()
+    return list(frame_to_rows(df))
+
+def iter_row_batches(file):
+    """Table rows of an open CSV, BATCH_SIZE rows at a time (only one chunk in memory)."""
+    for df in pd.read_csv(file, chunksize=BATCH_SIZE):
+        df.columns = df.columns.str.strip()
+        yield list(frame_to_rows(df))
+
+def open_writer(conn, stats):
+    # row_hash is unique, so re-loading the same CSV inserts nothing new
+    archive = ArchiveWriter(TABLE_NAME, ARCHIVE_COLUMNS, 'login_timestamp') if ARCHIVE_MODE else None
+    geo = load_index() if GEOIP_ENRICH else None
+    return BulkWriter(conn, TABLE_NAME, DB_COLUMNS + ['row_hash'] + (GEO_COLUMNS if geo else []),
+                      batch_size=BATCH_SIZE, use_load_data=USE_LOAD_DATA, stats=stats, on_duplicate='ignore',
+                      prepare=enricher(geo, DB_COLUMNS.index('ip_address'), GEO_COLUMNS) if geo else None,
+                      archive=archive, archive_key=['row_hash'])
+
+def update_summaries(conn=None):
+    """Fold rows inserted since the last call into the dashboard's summary rollups (see ingest/rollups.py)."""
+    own = conn is None
+    conn = conn or connect_for_insert()
+    try:
+        return refresh_summaries(conn, TABLE_NAME, SUMMARY_COLUMNS, 'login_timestamp', ENTITY_ROLLUPS)
+    finally:
+        if own:
+            conn.close()
+
 def insert_csv_to_db(csv_path):
     conn = None
+    stats = IngestStats(TABLE_NAME)
     try:
         if not os.path.isfile(csv_path):
             raise FileNotFoundError(f"CSV file not found: {csv_path}")
 
-        df = pd.read_csv(csv_path)
-        df.columns = df.columns.str.strip()
+        # .csv.gz/.bz2/.xz/.zst are decompressed while pandas reads them
+        if PIPELINE_MODE:
+            with open_input(csv_path, stats) as file:
+                pipeline = run_pipeline(iter_row_batches(file), connect_for_insert, open_writer,
+                                        stats, PIPELINE_WRITERS, PIPELINE_QUEUE_DEPTH)
+            print(pipeline.summary())
+        else:
+            with open_input(csv_path, stats) as file, stats.timing('parse'):
+                df = pd.read_csv(file)
+            df.columns = df.columns.str.strip()
 
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            database=MYSQL_DATABASE,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD
-        )
-        cursor = conn.cursor()
-
-        for _, row in df.iterrows():
-            cursor.execute(f"""
-                INSERT INTO {TABLE_NAME} 
-                (login_timestamp, ip_address, asn, login_successful)
-                VALUES (%s, %s, %s, %s)
-            """, (
-                str(row['Login Timestamp']),
-                str(row['IP Address']),
-                str(row['ASN']),
-                bool(row['Login Successful'])
-            ))
+            conn = connect_for_insert()
+            with stats.timing('write'), open_writer(conn, stats) as writer:
+                writer.write_many(frame_to_rows(df))
+        with stats.timing('summaries'):
+            update_summaries(conn)
 
-        conn.commit()
-        print(f"✅ Inserted {len(df)} rows into '{TABLE_NAME}'.")
+        print(f"✅ Inserted {stats.rows} rows into '{TABLE_NAME}' "
+              f"({stats.duplicates} already present).")
 
     except FileNotFoundError as fnf:
         print("❌ CSV file not found:", fnf)
@@ -80,9 +206,37 @@ def insert_csv_to_db(csv_path):
         print("❌ Data insertion error:", e)
     finally:
         if conn and conn.is_connected():
-            cursor.close()
             conn.close()
 
+    stats.stop()
+    print(stats.summary())
+    return stats
+
+def follow_csv_files(pattern=WATCH_PATTERN, checkpoint_path=CHECKPOINT_FILE):
+    """Tail login CSVs, inserting only rows appended since the last checkpoint."""
+    conn = None
+    stats = IngestStats(TABLE_NAME)
+    try:
+        conn = connect_for_insert()
+        with open_writer(conn, stats) as writer:
+            def handle(path, lines, header):
+                rows = lines_to_rows(lines, header)
+                writer.ensure_connected()
+                writer.write_many(rows)
+                writer.flush()
+                update_summaries(conn)
+
+            follow(pattern, handle, checkpoint_path, has_header=True)
+    except Exception as e:
+        print("❌ Data insertion error:", e)
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
+    stats.stop()
+    print(stats.summary())
+    return stats
+
 if __name__ == "__main__":
     #csv_file_path = r"C:\Users\MY PC\Desktop\SIEM\SIEM\Login Logs\loginlogoffff.csv"
     # Get the directory of the current Python file
@@ -90,5 +244,9 @@ if __name__ == "__main__":
 
     # Build the path to the CSV file (in the same folder)
     csv_file_path = os.path.join(base_dir, "loginlogoffff.csv")
+    csv_file_path = find_input(csv_file_path) or csv_file_path
     create_database_and_table()
-    insert_csv_to_db(csv_file_path)
+    if FOLLOW_MODE:
+        follow_csv_files()
+    else:
+        insert_csv_to_db(csv_file_path)
@@ -7,10 +7,22 @@ rdp_csv_to_mysql.py  –  ZERO‑ARG RDP loader
 • Inserts into MySQL
 """
 
-import os, sys, pandas as pd, mysql.connector as mc
+import io, os, sys, pandas as pd, mysql.connector as mc
 from datetime import datetime
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from ingest.archive import ArchiveWriter
+from ingest.bulk_writer import BulkWriter
+from ingest.compression import find_input, open_input
+from ingest.dedup import ensure_unique_key
+from ingest.follow import follow
+from ingest.geoip import enricher, ensure_geo_columns, load_index
+from ingest.pipeline import batched, run_pipeline
+from ingest.rollups import ensure_entity_rollups, ensure_summary_tables, refresh_summaries
+from ingest.schema import add_fulltext_index_if_missing, add_index_if_missing
+from ingest.stats import IngestStats
+
 # ─── CONFIG ────────────────────────────────────────────────────────────────
 CSV_FILE      = "rdp_dataset.csv"      # change if your filename differs
 MYSQL         = dict(host="localhost", user="root", password="rootroot")
@@ -20,13 +32,45 @@ REQUIRED_COLS = {
     "session_id", "username", "remote_address",
     "remote_port", "status", "timestamp",
 }
+DB_COLUMNS    = ["session_id", "username", "remote_address", "remote_port", "status", "ts"]
+CSV_HEADER    = ["session_id", "username", "remote_address",   # field order of a headerless
+                 "remote_port", "status", "timestamp"]          # row, e.g. a syslog payload
+BATCH_SIZE    = 5000                   # rows per INSERT batch / commit
+USE_LOAD_DATA = False                  # True → LOAD DATA LOCAL INFILE fast path
+FOLLOW_MODE   = False                  # True → tail CSVs matching WATCH_PATTERN
+PIPELINE_MODE = True                   # True → writer threads insert while rows are built
+PIPELINE_WRITERS = 1
+PIPELINE_QUEUE_DEPTH = 4
+ARCHIVE_MODE  = False                  # True → also append rows to the Parquet archive
+ARCHIVE_COLUMNS = {"session_id": "string", "username": "string", "remote_address": "string",
+                   "remote_port": "int64", "status": "string", "ts": "timestamp"}
+GEOIP_ENRICH  = True                   # True → add the remote address's ASN/country (offline lookup)
+GEO_COLUMNS   = ["asn", "country"]
+SEARCH_COLUMNS = ["session_id", "username", "remote_address", "status"]   # n-gram FULLTEXT for the dashboard search
+FILTER_INDEXES = {                     # dashboard filters; InnoDB appends id, so filtered pages seek by id
+    "idx_status": ["status"],
+    "idx_status_username": ["status", "username"],
+    "idx_username": ["username"],
+    "idx_remote_address": ["remote_address"],
+    "idx_ts": ["ts"],
+}
+SUMMARY_COLUMNS = ["status"]            # value counts the dashboard charts read from the rollups
+ENTITY_ROLLUPS = {                     # per-user minute/hour rollups (see ingest/rollups.py)
+    "username": {"metrics": {"failed": "status = 'failed'"}, "distinct": ["remote_address"]},
+}
+# rdp_dataset*.csv only: rdp_ml1.py writes rdp_analysis_output.csv into this folder too
+WATCH_PATTERN = str(Path(__file__).with_name(Path(CSV_FILE).stem + "*.csv"))
+CHECKPOINT    = str(Path(__file__).with_name(".rdp_events.checkpoint.json"))
 # ───────────────────────────────────────────────────────────────────────────
 
-def load_csv(csv_path: Path) -> pd.DataFrame:
+def load_csv(csv_path: Path, stats: IngestStats = None) -> pd.DataFrame:
     print(f"🔍 Reading CSV → {csv_path.resolve()}")
-    if not csv_path.exists():
+    found = find_input(str(csv_path))          # also accepts rdp_dataset.csv.gz etc.
+    if found is None:
         sys.exit(f"[FATAL] File not found: {csv_path}")
-    df = pd.read_csv(csv_path)
+    stats = stats or IngestStats(TABLE)
+    with open_input(found, stats) as f, stats.timing("parse"):
+        df = pd.read_csv(f)
     df.columns = [c.lower() for c in df.columns]
 
     missing = REQUIRED_COLS - set(df.columns)
@@ -57,33 +101,107 @@ def ensure_schema():
           remote_address  VARCHAR(45),
           remote_port     SMALLINT UNSIGNED,
           status          VARCHAR(30),
-          ts              DATETIME
+          ts              DATETIME,
+          UNIQUE KEY uq_session_ts (session_id, ts)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """)
+    # Natural key (session_id, ts): dedupe + index tables created before it existed
+    ensure_unique_key(cur, TABLE, "uq_session_ts", ["session_id", "ts"])
+    ensure_geo_columns(cur, TABLE, GEO_COLUMNS)
+    for index_name, columns in FILTER_INDEXES.items():
+        add_index_if_missing(cur, TABLE, index_name, columns)
+    if add_fulltext_index_if_missing(cur, TABLE, "ft_search", SEARCH_COLUMNS):
+        print(f"🔎 Built search index on {', '.join(SEARCH_COLUMNS)}.")
+    ensure_summary_tables(cur)
+    ensure_entity_rollups(cur, TABLE, "ts", ENTITY_ROLLUPS)
     conn.commit(); cur.close(); conn.close()
     print("🛠️  Database & table ready.\n")
 
-def insert_rows(df: pd.DataFrame):
-    conn = mc.connect(database=DB_NAME, **MYSQL)
-    cur  = conn.cursor()
-    sql  = (f"INSERT INTO `{TABLE}` "
-            "(session_id, username, remote_address, remote_port, status, ts) "
-            "VALUES (%s,%s,%s,%s,%s,%s)")
-    batch = [
+def frame_to_rows(df: pd.DataFrame):
+    return (
         (
             r.session_id, r.username, r.remote_address,
             int(r.remote_port), r.status, r.timestamp.to_pydatetime()
         )
         for r in df.itertuples(index=False)
-    ]
+    )
+
+def lines_to_rows(lines, header: str = ",".join(CSV_HEADER), origin: str = "input"):
+    """CSV lines (without their header) → table rows, skipping bad timestamps."""
+    df = pd.read_csv(io.StringIO("\n".join([header] + list(lines))))
+    df.columns = [c.lower() for c in df.columns]
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    bad = df["timestamp"].isna()
+    if bad.any():
+        print(f"[WARN] Skipping {int(bad.sum())} row(s) with un‑parsable timestamps in {origin}")
+    return list(frame_to_rows(df[~bad]))
+
+def connect_for_insert():
+    return mc.connect(database=DB_NAME, allow_local_infile=USE_LOAD_DATA, **MYSQL)
+
+def open_writer(conn, stats) -> BulkWriter:
+    # INSERT IGNORE on (session_id, ts) → re-running the loader adds nothing
+    archive = ArchiveWriter(TABLE, ARCHIVE_COLUMNS, "ts") if ARCHIVE_MODE else None
+    geo = load_index() if GEOIP_ENRICH else None
+    return BulkWriter(conn, TABLE, DB_COLUMNS + (GEO_COLUMNS if geo else []), batch_size=BATCH_SIZE,
+                      use_load_data=USE_LOAD_DATA, stats=stats, on_duplicate="ignore",
+                      prepare=enricher(geo, DB_COLUMNS.index("remote_address"), GEO_COLUMNS) if geo else None,
+                      archive=archive, archive_key=["session_id", "ts"])
+
+def update_summaries(conn=None) -> int:
+    """Fold rows inserted since the last call into the dashboard's summary rollups (see ingest/rollups.py)."""
+    own = conn is None
+    conn = conn or connect_for_insert()
+    try:
+        return refresh_summaries(conn, TABLE, SUMMARY_COLUMNS, "ts", ENTITY_ROLLUPS)
+    finally:
+        if own:
+            conn.close()
+
+def insert_rows(df: pd.DataFrame, stats: IngestStats = None):
+    stats = stats or IngestStats(TABLE)
     print("🚀 Inserting rows …")
-    cur.executemany(sql, batch)
-    conn.commit()
-    print(f"✅ {cur.rowcount} rows inserted into {DB_NAME}.{TABLE}")
-    cur.close(); conn.close()
+    if PIPELINE_MODE:
+        pipeline = run_pipeline(batched(frame_to_rows(df), BATCH_SIZE), connect_for_insert, open_writer,
+                                stats, PIPELINE_WRITERS, PIPELINE_QUEUE_DEPTH)
+        print(pipeline.summary())
+    else:
+        conn = connect_for_insert()
+        with stats.timing("write"), open_writer(conn, stats) as writer:
+            writer.write_many(frame_to_rows(df))
+        conn.close()
+    with stats.timing("summaries"):
+        update_summaries()
+    stats.stop()
+    print(f"✅ {stats.rows} rows inserted into {DB_NAME}.{TABLE} "
+          f"({stats.duplicates} already present)")
+    print(stats.summary())
+
+def follow_csvs():
+    """Tail RDP CSVs; only rows appended since the last checkpoint are inserted."""
+    conn  = connect_for_insert()
+    stats = IngestStats(TABLE)
+
+    def handle(path, lines, header):
+        rows = lines_to_rows(lines, header, origin=path)
+        writer.ensure_connected()
+        writer.write_many(rows)
+        writer.flush()
+        update_summaries(conn)
+
+    with open_writer(conn, stats) as writer:
+        follow(WATCH_PATTERN, handle, CHECKPOINT, has_header=True)
+    conn.close()
+    stats.stop()
+    print(stats.summary())
 
 if __name__ == "__main__":
+    if FOLLOW_MODE:
+        ensure_schema()
+        follow_csvs()
+        sys.exit(0)
     csv_path = Path(__file__).with_name(CSV_FILE)   # same folder as script
-    df = load_csv(csv_path)
+    stats = IngestStats(TABLE)                       # decompress/parse/write timings
+    df = load_csv(csv_path, stats)
     ensure_schema()
-    insert_rows(df)
+    insert_rows(df, stats)
@@ -1,15 +1,127 @@
+import io
 import re
 import os
+import sys
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import mysql.connector
 from mysql.connector import Error
 import unicodedata
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingest.archive import ArchiveWriter
+from ingest.bulk_writer import BulkWriter, chain
+from ingest.compression import base_extension, compression_of, find_input, open_input
+from ingest.dedup import ensure_row_hash, with_row_hash
+from ingest.dimensions import DimensionCache, ensure_dimension_column, normalize_existing_rows
+from ingest.schema import add_fulltext_index_if_missing, add_index_if_missing, convert_to_datetime
+from ingest.follow import follow
+from ingest.geoip import enricher, ensure_geo_columns, load_index
+from ingest.pipeline import run_pipeline
+from ingest.rollups import ensure_entity_rollups, ensure_summary_tables, refresh_summaries
+from ingest.stats import IngestStats
+from ingest.timestamps import parse_apache_timestamp
+from ingest.useragent import UA_COLUMNS, classifier, ensure_user_agent_columns
+
 # 🔧 MySQL Credentials
 MYSQL_HOST = 'localhost'
 MYSQL_USER = 'root'
 MYSQL_PASSWORD = 'rootroot'
 MYSQL_DATABASE = 'siem'
+TABLE_NAME = 'server_access_logs'
+
+# 🚚 Bulk writes
+USE_LOAD_DATA = False         # True → LOAD DATA LOCAL INFILE instead of multi-row INSERTs
+
+# 📦 Streaming ingest (bounded memory)
+STREAM_MODE = True            # False → legacy read-everything-then-insert path
+READ_CHUNK_SIZE = 1 << 20     # bytes read from disk per chunk
+STREAM_BATCH_SIZE = 5000      # parsed rows handed to the DB writer per batch
+
+# ⚡ Multi-core parsing: plain-text logs are split into newline-aligned byte ranges
+PARSE_WORKERS = os.cpu_count() or 1   # 1 → parse in this process only
+SHARD_SIZE = 64 << 20                 # upper bound on bytes per range (bounds worker memory)
+PARALLEL_MIN_BYTES = 8 << 20          # smaller files are not worth a process pool
+
+# 🧵 Pipelined ingest: parse here while writer threads insert, via a bounded queue
+PIPELINE_MODE = True
+PIPELINE_WRITERS = 1                  # each writer thread opens its own connection
+PIPELINE_QUEUE_DEPTH = 4              # parsed batches waiting for a writer (bounds memory)
+
+# 👀 Follow mode: tail appended lines instead of re-reading whole files
+FOLLOW_MODE = False
+WATCH_PATTERN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Logs*.txt")
+CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".server_access_logs.checkpoint.json")
+
+LOG_COLUMNS = ['IP', 'LogTimestamp', 'Method', 'URL', 'Status', 'Size', 'Referer', 'UserAgent']
+DB_COLUMNS = ['ip', 'log_timestamp', 'method', 'url', 'status', 'size', 'referer', 'user_agent']
+
+# 🗂️ Normalized storage: url/referer/user_agent live once in dimension tables and
+# log rows carry integer ids; server_access_logs_v joins the text back for readers
+NORMALIZED_STORAGE = False
+DIMENSIONS = {'url': 'urls', 'referer': 'referers', 'user_agent': 'user_agents'}
+NORMALIZED_COLUMNS = [f"{c}_id" if c in DIMENSIONS else c for c in DB_COLUMNS]
+READ_VIEW = 'server_access_logs_v'
+
+# 🤖 User agents are classified once per distinct string (bot, browser family, device class)
+UA_CLASSIFY = True
+
+# 🌍 Annotate each request with the client's ASN and country (offline, see ingest/geoip.py)
+GEOIP_ENRICH = True
+GEO_COLUMNS = ['asn', 'country']
+
+# 🔎 Text columns behind the dashboard search (n-gram FULLTEXT index). With
+# NORMALIZED_STORAGE the url/referer/user_agent text is in the dimension tables instead
+SEARCH_COLUMNS = ['ip', 'method', 'url', 'referer', 'user_agent']
+
+# 📈 Columns whose value counts the dashboard charts read from the summary rollups
+SUMMARY_COLUMNS = ['method', 'status']
+
+# 🧭 Indexes behind the dashboard's server-side filters. InnoDB appends the primary
+# key to each, so a filtered page still seeks by id (WHERE col = ? AND id < ? ORDER BY id DESC)
+FILTER_INDEXES = {
+    'idx_status': ['status'],
+    'idx_status_method': ['status', 'method'],
+    'idx_method': ['method'],
+    'idx_ip': ['ip'],
+}
+
+# 📦 Per-IP minute/hour rollups the ML features aggregate instead of scanning requests:
+# metric → SQL summed per bucket, plus the URLs each IP requested (for distinct counts)
+ENTITY_ROLLUPS = {
+    'ip': {
+        'source': READ_VIEW,
+        'metrics': {
+            'errors': 'status >= 400',
+            'status_2xx': 'status BETWEEN 200 AND 299',
+            'status_3xx': 'status BETWEEN 300 AND 399',
+            'status_4xx': 'status BETWEEN 400 AND 499',
+            'status_5xx': 'status BETWEEN 500 AND 599',
+            'url_length': 'COALESCE(CHAR_LENGTH(url), 0)',
+            'path_depth': "COALESCE(CHAR_LENGTH(url) - CHAR_LENGTH(REPLACE(url, '/', '')), 0)",
+            'with_referer': "referer IS NOT NULL AND referer <> '-'",
+            'bot_requests': 'COALESCE(is_bot, 0)',
+        },
+        'distinct': ['url'],
+    },
+}
+
+# 🧊 Also append every ingested row to the day-partitioned Parquet archive (needs pyarrow)
+ARCHIVE_MODE = False
+ARCHIVE_COLUMNS = {
+    'ip': 'string', 'log_timestamp': 'timestamp', 'method': 'string', 'url': 'string',
+    'status': 'int64', 'size': 'int64', 'referer': 'string', 'user_agent': 'string',
+    'row_hash': 'string',
+}
+
+# Migration of pre-existing VARCHAR timestamps ('22/Jan/2019:03:56:14 +0330') to UTC DATETIME
+LOG_TIMESTAMP_SQL = (
+    "CASE WHEN log_timestamp REGEXP '^[0-9]{2}/[A-Za-z]{3}/[0-9]{4}(:[0-9]{2}){3} [+-][0-9]{4}$' "
+    "THEN CONVERT_TZ(STR_TO_DATE(LEFT(log_timestamp, 20), '%d/%b/%Y:%H:%i:%s'), "
+    "CONCAT(SUBSTRING(log_timestamp, 22, 3), ':', SUBSTRING(log_timestamp, 25, 2)), '+00:00') END"
+)
 
 # 📌 Apache Combined Log Format with STRICT IP Regex
 log_pattern = re.compile(
@@ -24,7 +136,71 @@ log_pattern = re.compile(
     r'"(?P<user_agent>[^"]*)"'
 )
 
-def group_log_data(log_entry):
+# ⚡ Regex-free fast path for well-formed lines; anything unusual goes to log_pattern
+USE_FAST_PARSER = True
+HTTP_METHODS = frozenset(['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS', 'PATCH', 'TRACE', 'CONNECT'])
+
+def _ascii_digits(text):
+    return text.isdigit() and text.isascii()
+
+def _valid_octet(part):
+    # Same octets log_pattern accepts: 25[0-5] | 2[0-4][0-9] | 1?[0-9]{1,2}
+    if not 0 < len(part) <= 3 or not _ascii_digits(part):
+        return False
+    if len(part) < 3 or part[0] == '1':
+        return True
+    return part[0] == '2' and (part[1] in '01234' or (part[1] == '5' and part[2] in '012345'))
+
+@lru_cache(maxsize=65536)
+def _valid_ip(ip):
+    # Client IPs repeat heavily, so the octet checks run once per distinct address
+    octets = ip.split('.')
+    return len(octets) == 4 and all(map(_valid_octet, octets))
+
+def fast_parse_line(log_entry):
+    """Split a Combined Log Format line on its quotes instead of running log_pattern.
+
+    Returns None whenever the line is not plainly well formed, so the caller
+    can fall back to the regex; it never accepts a line the regex rejects.
+    """
+    # ip - - [ts] "request" status size "referer" "user_agent"<anything>
+    parts = log_entry.split('"', 6)
+    if len(parts) != 7 or parts[4] != ' ':
+        return None
+    head, request, status_size, referer, _, user_agent, _ = parts
+
+    ip, sep, timestamp = head.partition(' - - [')
+    if not sep or timestamp[-2:] != '] ' or not _valid_ip(ip):
+        return None
+    timestamp = timestamp[:-2]
+    if not timestamp or ']' in timestamp:
+        return None
+
+    fields = request.split(' ', 2)
+    if len(fields) != 3:
+        return None
+    method, url, protocol = fields
+    # isprintable() rules out every whitespace character that \S would stop at
+    if method not in HTTP_METHODS or not url or not url.isprintable() or not protocol:
+        return None
+
+    # ' 200 1234 ' → ['', '200', '1234', '']
+    fields = status_size.split(' ')
+    if len(fields) != 4 or fields[0] or fields[3]:
+        return None
+    _, status, size, _ = fields
+    if len(status) != 3 or not status.isdigit() or not status.isascii():
+        return None
+    if size == '-':
+        size = 0
+    elif size.isdigit() and size.isascii():
+        size = int(size)
+    else:
+        return None
+
+    return (ip, timestamp, method, url, status, size, referer, user_agent)
+
+def regex_parse_line(log_entry):
     match = log_pattern.match(log_entry)
     if match:
         data = match.groupdict()
@@ -36,24 +212,29 @@ def group_log_data(log_entry):
     else:
         return None
 
+def group_log_data(log_entry):
+    result = fast_parse_line(log_entry) if USE_FAST_PARSER else None
+    return result if result is not None else regex_parse_line(log_entry)
+
 def process_log_file(log_file_path):
     if not os.path.isfile(log_file_path):
         print(f"File does not exist: {log_file_path}")
         return pd.DataFrame()
 
-    _, ext = os.path.splitext(log_file_path)
-    ext = ext.lower()
+    ext = base_extension(log_file_path)
     log_entries = []
 
     try:
         if ext == '.csv':
-            df = pd.read_csv(log_file_path, header=None)
+            with open_input(log_file_path) as file:
+                df = pd.read_csv(file, header=None)
             log_entries = df.iloc[:, 0].astype(str).tolist()
         elif ext in ['.xls', '.xlsx']:
-            df = pd.read_excel(log_file_path, header=None)
+            with open_input(log_file_path) as file:
+                df = pd.read_excel(file, header=None)
             log_entries = df.iloc[:, 0].astype(str).tolist()
         else:
-            with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as file:
+            with io.TextIOWrapper(open_input(log_file_path), encoding='utf-8', errors='ignore') as file:
                 log_entries = file.readlines()
     except Exception as e:
         print(f"Error reading the file: {e}")
@@ -69,9 +250,136 @@ def process_log_file(log_file_path):
         print("No valid log entries matched the expected format.")
         return pd.DataFrame()
 
-    return pd.DataFrame(processed_data, columns=[
-        'IP', 'LogTimestamp', 'Method', 'URL', 'Status', 'Size', 'Referer', 'UserAgent'
-    ])
+    return pd.DataFrame(processed_data, columns=LOG_COLUMNS)
+
+def _decode_line(raw):
+    # Text-mode reads also treat a lone '\r' as a line break; keep that behaviour
+    return raw.decode('utf-8', errors='ignore').split('\r')
+
+def iter_log_lines(log_file_path, chunk_size=READ_CHUNK_SIZE, start=0, end=None, stats=None):
+    """Yield lines of a text log (optionally only bytes [start, end)), read in fixed-size chunks.
+
+    .gz/.bz2/.xz/.zst files are decompressed as they are read; byte ranges
+    only make sense for uncompressed files.
+    """
+    with open_input(log_file_path, stats) as file:
+        if start:
+            file.seek(start)
+        remaining = None if end is None else end - start
+        tail = b''
+        while remaining is None or remaining > 0:
+            chunk = file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            for line in lines:
+                yield from _decode_line(line)
+        if tail:
+            yield from _decode_line(tail)
+
+def iter_log_entries(log_file_path, chunk_size=READ_CHUNK_SIZE, stats=None):
+    """Yield raw log entries from a .txt/.log, .csv or .xls(x) file, optionally compressed."""
+    ext = base_extension(log_file_path)
+    if ext == '.csv':
+        with open_input(log_file_path, stats) as file:
+            for frame in pd.read_csv(file, header=None, chunksize=STREAM_BATCH_SIZE):
+                yield from frame.iloc[:, 0].astype(str)
+    elif ext in ['.xls', '.xlsx']:
+        # Excel workbooks cannot be read incrementally
+        with open_input(log_file_path, stats) as file:
+            yield from pd.read_excel(file, header=None).iloc[:, 0].astype(str)
+    else:
+        yield from iter_log_lines(log_file_path, chunk_size, stats=stats)
+
+def iter_log_batches(log_file_path, batch_size=STREAM_BATCH_SIZE, chunk_size=READ_CHUNK_SIZE, stats=None):
+    """Yield lists of at most batch_size parsed rows, never holding the whole file."""
+    batch = []
+    for entry in iter_log_entries(log_file_path, chunk_size, stats):
+        result = group_log_data(entry.strip())
+        if result:
+            batch.append(result)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def split_byte_ranges(log_file_path, parts):
+    """Split a file into about `parts` byte ranges that each start right after a newline."""
+    size = os.path.getsize(log_file_path)
+    if size == 0:
+        return []
+    step = max(1, -(-size // parts))
+    bounds = [0]
+    with open(log_file_path, 'rb') as file:
+        pos = step
+        while pos < size:
+            # Start one byte early so a newline sitting exactly at pos - 1 ends this range
+            file.seek(pos - 1)
+            file.readline()
+            boundary = file.tell()
+            if boundary >= size:
+                break
+            bounds.append(boundary)
+            pos = boundary + step
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _parse_byte_range(job):
+    # Runs in a worker process; must stay a top-level function so it can be pickled
+    log_file_path, start, end = job
+    rows = []
+    for line in iter_log_lines(log_file_path, READ_CHUNK_SIZE, start, end):
+        result = group_log_data(line.strip())
+        if result:
+            rows.append(result)
+    return rows
+
+def _use_parallel(log_file_path, workers):
+    # Compressed streams cannot be split into byte ranges, so they are parsed in one pass
+    return (workers > 1 and compression_of(log_file_path) is None
+            and base_extension(log_file_path) not in ['.csv', '.xls', '.xlsx']
+            and os.path.getsize(log_file_path) >= PARALLEL_MIN_BYTES)
+
+def iter_parsed_ranges(log_file_path, workers=PARSE_WORKERS):
+    """Parse newline-aligned byte ranges in a process pool, yielding row lists in file order."""
+    size = os.path.getsize(log_file_path)
+    parts = max(workers, -(-size // SHARD_SIZE))
+    jobs = [(log_file_path, start, end) for start, end in split_byte_ranges(log_file_path, parts)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded window of ranges in flight so results can't pile up in memory
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_parse_byte_range, job))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def iter_log_batches_parallel(log_file_path, workers=PARSE_WORKERS, batch_size=STREAM_BATCH_SIZE):
+    """Parallel counterpart of iter_log_batches; yields the same rows in the same order."""
+    for rows in iter_parsed_ranges(log_file_path, workers):
+        for i in range(0, len(rows), batch_size):
+            yield rows[i:i + batch_size]
+
+def process_log_file_parallel(log_file_path, workers=PARSE_WORKERS):
+    """Multi-process version of process_log_file; returns an identical DataFrame."""
+    if not os.path.isfile(log_file_path) or not _use_parallel(log_file_path, workers):
+        return process_log_file(log_file_path)
+
+    processed_data = []
+    for rows in iter_parsed_ranges(log_file_path, workers):
+        processed_data.extend(rows)
+
+    if not processed_data:
+        print("No valid log entries matched the expected format.")
+        return pd.DataFrame()
+
+    return pd.DataFrame(processed_data, columns=LOG_COLUMNS)
 
 def create_database_and_table():
     try:
@@ -89,15 +397,35 @@ def create_database_and_table():
             CREATE TABLE IF NOT EXISTS server_access_logs (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 ip VARCHAR(45),
-                log_timestamp VARCHAR(100),
+                log_timestamp DATETIME,
                 method VARCHAR(10),
                 url TEXT,
                 status INT,
                 size INT,
                 referer TEXT,
-                user_agent TEXT
+                user_agent TEXT,
+                row_hash CHAR(40),
+                UNIQUE KEY uq_row_hash (row_hash),
+                INDEX idx_log_timestamp (log_timestamp)
             )
         """)
+        # Tables created before dedup existed get row_hash added and backfilled
+        # (from the original strings, so this must run before the DATETIME migration)
+        ensure_row_hash(cursor, TABLE_NAME, DB_COLUMNS)
+        convert_to_datetime(cursor, TABLE_NAME, 'log_timestamp', LOG_TIMESTAMP_SQL, 'idx_log_timestamp')
+        ensure_geo_columns(cursor, TABLE_NAME, GEO_COLUMNS)
+        create_dimension_tables(cursor)
+        # Needs the dimension join to see agents stored as ids
+        agents = DIMENSIONS['user_agent']
+        ensure_user_agent_columns(cursor, TABLE_NAME, f"COALESCE(l.user_agent, {agents}.value)",
+                                  f"LEFT JOIN {agents} ON {agents}.id = l.user_agent_id")
+        for index_name, columns in FILTER_INDEXES.items():
+            add_index_if_missing(cursor, TABLE_NAME, index_name, columns)
+        if add_fulltext_index_if_missing(cursor, TABLE_NAME, 'ft_search', SEARCH_COLUMNS):
+            print(f"🔎 Built search index on {', '.join(SEARCH_COLUMNS)}.")
+        create_read_view(cursor)
+        ensure_summary_tables(cursor)
+        ensure_entity_rollups(cursor, TABLE_NAME, 'log_timestamp', ENTITY_ROLLUPS)
         print("Table 'server_access_logs' checked/created successfully.")
         conn.commit()
     except Error as e:
@@ -107,45 +435,198 @@ def create_database_and_table():
             cursor.close()
             conn.close()
 
+def create_dimension_tables(cursor):
+    """Dimension tables and id columns; existing text is moved over in normalized mode."""
+    for column, table in DIMENSIONS.items():
+        dimension = DimensionCache(table)
+        dimension.ensure_table(cursor)
+        ensure_dimension_column(cursor, TABLE_NAME, column, dimension)
+        # Normalized text is only searchable here (the dashboard matches it and joins back)
+        add_fulltext_index_if_missing(cursor, table, 'ft_search', ['value'])
+        if NORMALIZED_STORAGE:
+            moved = normalize_existing_rows(cursor, TABLE_NAME, column, dimension)
+            if moved:
+                print(f"🗂️ Moved {moved} '{column}' values into '{table}'.")
+
+def create_read_view(cursor):
+    """View with the text columns joined back from their dimensions, whatever the storage mode."""
+    joins = []
+    selects = {}
+    for column, table in DIMENSIONS.items():
+        joins.append(f"LEFT JOIN {table} ON {table}.id = l.{column}_id")
+        selects[column] = f"COALESCE(l.{column}, {table}.value) AS {column}"
+
+    select_list = ", ".join(selects.get(c, f"l.{c}") for c in ['id'] + DB_COLUMNS + UA_COLUMNS + GEO_COLUMNS)
+    cursor.execute(
+        f"CREATE OR REPLACE VIEW {READ_VIEW} AS SELECT {select_list} "
+        f"FROM {TABLE_NAME} l {' '.join(joins)}"
+    )
+
+def connect_for_insert():
+    return mysql.connector.connect(
+        host=MYSQL_HOST,
+        database=MYSQL_DATABASE,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        allow_local_infile=USE_LOAD_DATA
+    )
+
+def to_db_row(row):
+    """Parsed tuple → table row: row_hash over the raw fields, timestamp as UTC datetime."""
+    row = with_row_hash(row)
+    return row[:1] + (parse_apache_timestamp(row[1]),) + row[2:]
+
+def lines_to_rows(lines, header=None):
+    """Raw access-log lines → table rows; lines that do not parse are dropped."""
+    return [to_db_row(row) for row in map(group_log_data, map(str.strip, lines)) if row]
+
+def dimension_encoder(conn):
+    """Batch transform replacing url/referer/user_agent text with dimension ids.
+
+    The value → id caches live as long as the writer, so repeated values are
+    resolved in memory and only never-seen ones reach the database.
+    """
+    positions = [(DB_COLUMNS.index(column), DimensionCache(table)) for column, table in DIMENSIONS.items()]
+
+    def encode(rows):
+        rows = [list(row) for row in rows]
+        cursor = conn.cursor()
+        try:
+            for position, dimension in positions:
+                ids = dimension.lookup_many(cursor, [row[position] for row in rows])
+                for row, id_ in zip(rows, ids):
+                    row[position] = id_
+        finally:
+            cursor.close()
+        return [tuple(row) for row in rows]
+
+    return encode
+
+def open_writer(conn, stats, batch_size=STREAM_BATCH_SIZE):
+    # Re-ingesting the same lines is a no-op: row_hash is unique and duplicates are ignored
+    archive = ArchiveWriter(TABLE_NAME, ARCHIVE_COLUMNS, 'log_timestamp') if ARCHIVE_MODE else None
+    geo = load_index() if GEOIP_ENRICH else None
+    columns = (NORMALIZED_COLUMNS if NORMALIZED_STORAGE else DB_COLUMNS) + ['row_hash']
+    # Appended in this order: classification (before the text becomes an id), then geo
+    prepare = chain(classifier(DB_COLUMNS.index('user_agent')) if UA_CLASSIFY else None,
+                    dimension_encoder(conn) if NORMALIZED_STORAGE else None,
+                    enricher(geo, DB_COLUMNS.index('ip'), GEO_COLUMNS) if geo else None)
+    columns += (UA_COLUMNS if UA_CLASSIFY else []) + (GEO_COLUMNS if geo else [])
+    return BulkWriter(conn, TABLE_NAME, columns, batch_size=batch_size,
+                      use_load_data=USE_LOAD_DATA, stats=stats, on_duplicate='ignore',
+                      prepare=prepare, archive=archive, archive_key=['row_hash'])
+
+def update_summaries(conn=None):
+    """Fold rows inserted since the last call into the dashboard's summary rollups (see ingest/rollups.py)."""
+    own = conn is None
+    conn = conn or connect_for_insert()
+    try:
+        return refresh_summaries(conn, TABLE_NAME, SUMMARY_COLUMNS, 'log_timestamp', ENTITY_ROLLUPS)
+    finally:
+        if own:
+            conn.close()
+
 def insert_data_into_db(df):
+    conn = None
+    stats = IngestStats(TABLE_NAME)
     try:
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            database=MYSQL_DATABASE,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD
-        )
+        conn = connect_for_insert()
         if conn.is_connected():
             print("Connected to MySQL database for data insertion.")
-            cursor = conn.cursor()
-            for _, row in df.iterrows():
-                cursor.execute('''
-                    INSERT INTO server_access_logs
-                    (ip, log_timestamp, method, url, status, size, referer, user_agent)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ''', (
-                    row['IP'], row['LogTimestamp'], row['Method'], row['URL'],
-                    int(row['Status']), int(row['Size']), row['Referer'], row['UserAgent']
-                ))
-            conn.commit()
+            with open_writer(conn, stats) as writer:
+                writer.write_many(map(to_db_row, df[LOG_COLUMNS].itertuples(index=False, name=None)))
+            update_summaries(conn)
             print("Data inserted successfully.")
     except Error as e:
         print("Error inserting data into MySQL:", e)
     finally:
-        if conn.is_connected():
-            cursor.close()
+        if conn is not None and conn.is_connected():
+            conn.close()
+
+    stats.stop()
+    print(stats.summary())
+    return stats
+
+def stream_log_file_into_db(log_file_path, batch_size=STREAM_BATCH_SIZE, chunk_size=READ_CHUNK_SIZE,
+                            workers=PARSE_WORKERS):
+    """Parse and insert the log batch by batch so peak memory stays around a few batches."""
+    stats = IngestStats(TABLE_NAME)
+    conn = None
+    try:
+        if _use_parallel(log_file_path, workers):
+            batches = iter_log_batches_parallel(log_file_path, workers, batch_size)
+        else:
+            batches = iter_log_batches(log_file_path, batch_size, chunk_size, stats)
+        if PIPELINE_MODE:
+            rows = ([to_db_row(row) for row in batch] for batch in batches)
+            pipeline = run_pipeline(rows, connect_for_insert, lambda c, s: open_writer(c, s, batch_size),
+                                    stats, PIPELINE_WRITERS, PIPELINE_QUEUE_DEPTH)
+            print(pipeline.summary())
+        else:
+            conn = connect_for_insert()
+            # Reading/decompressing, parsing and writing are timed separately
+            with open_writer(conn, stats, batch_size) as writer:
+                for batch in stats.timed(batches, 'parse'):
+                    with stats.timing('write'):
+                        writer.write_many(map(to_db_row, batch))
+        # After the writers are done, so no lower id can still commit behind the watermark
+        with stats.timing('summaries'):
+            update_summaries(conn)
+    except Error as e:
+        print("Error inserting data into MySQL:", e)
+    finally:
+        if conn is not None and conn.is_connected():
             conn.close()
 
+    stats.stop()
+    if stats.rows == 0 and stats.duplicates == 0:
+        print("No valid log entries found.")
+    print(stats.summary())
+    return stats
+
+def follow_log_files(pattern=WATCH_PATTERN, checkpoint_path=CHECKPOINT_FILE):
+    """Ingest only lines appended since the last run, following rotations and new files."""
+    conn = None
+    stats = IngestStats(TABLE_NAME)
+    try:
+        conn = connect_for_insert()
+        with open_writer(conn, stats) as writer:
+            def handle(path, lines, _header):
+                writer.ensure_connected()
+                writer.write_many(lines_to_rows(lines))
+                writer.flush()
+                update_summaries(conn)
+
+            follow(pattern, handle, checkpoint_path)
+    except Error as e:
+        print("Error inserting data into MySQL:", e)
+    finally:
+        if conn is not None and conn.is_connected():
+            conn.close()
+
+    stats.stop()
+    print(stats.summary())
+    return stats
+
 def main():
-    # Direct path to Logs.txt in the same folder as this script
-    log_file_path = os.path.join(os.path.dirname(__file__), "Logs.txt")
+    if FOLLOW_MODE:
+        create_database_and_table()
+        follow_log_files()
+        return
 
-    if not os.path.exists(log_file_path):
-        print(f"Log file not found at: {log_file_path}")
+    # Direct path to Logs.txt (or Logs.txt.gz, ...) in the same folder as this script
+    log_file_path = find_input(os.path.join(os.path.dirname(__file__), "Logs.txt"))
+
+    if log_file_path is None:
+        print(f"Log file not found at: {os.path.join(os.path.dirname(__file__), 'Logs.txt')}")
         return
 
     create_database_and_table()
-    grouped_data = process_log_file(log_file_path)
+    if STREAM_MODE:
+        stream_log_file_into_db(log_file_path)
+        return
+
+    grouped_data = process_log_file_parallel(log_file_path)
     if grouped_data.empty:
         print("No valid log entries found.")
     else:
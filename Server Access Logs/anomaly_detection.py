@@ -17,7 +17,7 @@ def load_data_from_mysql():
             password=MYSQL_PASSWORD,
             database=MYSQL_DATABASE
         )
-        query = "SELECT ip, status, url, log_timestamp FROM server_access_logs"
+        query = "SELECT ip, status, url, log_timestamp FROM server_access_logs_v"
         df = pd.read_sql(query, conn)
         conn.close()
         return df
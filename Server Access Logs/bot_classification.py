@@ -20,7 +20,7 @@ def load_data_from_mysql():
             password=MYSQL_PASSWORD,
             database=MYSQL_DATABASE
         )
-        query = "SELECT ip, status, url, log_timestamp, referer, user_agent FROM server_access_logs"
+        query = "SELECT ip, status, url, log_timestamp, referer, is_bot FROM server_access_logs_v"
         df = pd.read_sql(query, conn)
         conn.close()
         return df
@@ -29,9 +29,7 @@ def load_data_from_mysql():
         return pd.DataFrame()
 
 def label_data(df):
-    df['label'] = df['user_agent'].str.contains(
-        'bot|crawler|spider|crawl|slurp', case=False, na=False
-    ).astype(int)  # 1 = bot, 0 = human
+    df['label'] = df['is_bot'].fillna(0).astype(int)  # 1 = bot, 0 = human (classified at ingest)
     return df
 
 def feature_engineering(df):
@@ -29,12 +29,15 @@ def load_data_from_mysql():
 
 def prepare_time_series(df):
     """Prepare hourly aggregated time series"""
-    # Parse Apache log timestamp format and remove timezone
-    df['log_timestamp'] = pd.to_datetime(
-        df['log_timestamp'],
-        format='%d/%b/%Y:%H:%M:%S %z',
-        errors='coerce'
-    ).dt.tz_convert(None)
+    # log_timestamp is stored as a UTC DATETIME; only legacy text values need parsing
+    if not pd.api.types.is_datetime64_any_dtype(df['log_timestamp']):
+        # Parse Apache log timestamp format and remove timezone
+        df['log_timestamp'] = pd.to_datetime(
+            df['log_timestamp'],
+            format='%d/%b/%Y:%H:%M:%S %z',
+            errors='coerce',
+            utc=True
+        ).dt.tz_convert(None)
 
     # Drop rows where parsing failed
     df = df.dropna(subset=['log_timestamp'])
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+ingest_benchmark.py  –  end-to-end ingest throughput for all four loaders
+• Generates synthetic inputs (cached under benchmarks/.data) in the exact
+  formats the loaders read: Combined Log Format, loginlogoffff.csv,
+  antivirus_logs.csv and rdp_dataset.csv
+• Runs each (source, size) in its own process so peak RSS is per run
+• Measures parse rate, write rate and peak memory through the loaders' own
+  parse functions and BulkWriter, against SQLite (default stand-in) or MySQL
+  (a separate `siem_bench` database – never the live one)
+• --pipeline runs the parse and write stages concurrently through
+  ingest.pipeline (bounded queue, writer threads) and adds queue-depth,
+  stall and batch-latency figures to each result
+• Writes a JSON report; --baseline compares against an earlier report and
+  exits 1 on regressions
+• Usage: python benchmarks/ingest_benchmark.py [--sizes 10k,1m,10m]
+         [--sources access,login,antivirus,rdp] [--backend sqlite|mysql] [--pipeline]
+         [--out report.json] [--baseline old.json] [--tolerance 0.2]
+"""
+
+import argparse, contextlib, csv, io, json, os, platform, random, sqlite3
+import subprocess, sys, tempfile, time, uuid
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(ROOT)
+sys.path.insert(0, REPO)
+
+from ingest.pipeline import batched, run_pipeline
+from ingest.stats import IngestStats
+
+DATA_DIR   = os.path.join(ROOT, ".data")
+BENCH_DB   = "siem_bench"
+BATCH_ROWS = 5000
+SEED       = 42
+START      = datetime(2025, 1, 1)
+MONTHS     = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+SIZES      = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# source → (loader script, input file suffix, table)
+SOURCES = {
+    "access":    (os.path.join("Server Access Logs", "Server_Access_Logs.py"), ".log", "server_access_logs"),
+    "login":     (os.path.join("Login Logs", "Login_Logs.py"), ".csv", "login_log_data"),
+    "antivirus": (os.path.join("Antivirus Logs", "antivirus_parser.py"), ".csv", "antivirus_logs"),
+    "rdp":       (os.path.join("RDP logs", "rdp.py"), ".csv", "rdp_events"),
+}
+
+# SQLite stand-in schemas, mirroring the MySQL tables and their unique keys
+SQLITE_DDL = {
+    "access": """CREATE TABLE server_access_logs (id INTEGER PRIMARY KEY, ip TEXT, log_timestamp TEXT,
+                 method TEXT, url TEXT, status INTEGER, size INTEGER, referer TEXT, user_agent TEXT,
+                 row_hash TEXT UNIQUE, is_bot INTEGER, ua_family TEXT, device_class TEXT)""",
+    "login": """CREATE TABLE login_log_data (id INTEGER PRIMARY KEY, login_timestamp TEXT, ip_address TEXT,
+                asn TEXT, login_successful INTEGER, row_hash TEXT UNIQUE)""",
+    "antivirus": """CREATE TABLE antivirus_logs (id INTEGER PRIMARY KEY, log_id TEXT UNIQUE, timestamp TEXT,
+                    file_path TEXT, malware_type TEXT, severity TEXT, scan_type TEXT, os TEXT,
+                    detection_method TEXT, machine_id TEXT, action_taken TEXT, file_size_kb REAL,
+                    is_persistent INTEGER, network_activity INTEGER)""",
+    "rdp": """CREATE TABLE rdp_events (id INTEGER PRIMARY KEY, session_id TEXT, username TEXT,
+              remote_address TEXT, remote_port INTEGER, status TEXT, ts TEXT, UNIQUE (session_id, ts))""",
+}
+
+
+# ─── synthetic inputs ──────────────────────────────────────────────────────
+
+def _ip(rnd):
+    return f"{rnd.randint(1, 223)}.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}"
+
+
+def _access_lines(rnd, rows):
+    ips    = [_ip(rnd) for _ in range(50_000)]
+    urls   = [f"/{rnd.choice(['product', 'filter', 'static', 'api', 'm'])}/{rnd.randint(1, 99999)}"
+              f"{rnd.choice(['', '?page=2', '.jpg', '/reviews'])}" for _ in range(5000)]
+    refs   = ["-"] + [f"https://www.example{i}.com/page/{i * 7}" for i in range(100)]
+    agents = [f"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0 Safari/537.36"
+              for v in range(60, 160)] + [f"Googlebot/2.{v} (+http://www.google.com/bot.html)" for v in range(10)]
+    methods, statuses = ["GET"] * 8 + ["POST", "HEAD"], [200] * 14 + [301, 302, 304, 404, 500]
+    for i in range(rows):
+        t = START + timedelta(seconds=i // 3)
+        size = rnd.randint(0, 60000) if rnd.random() > 0.05 else "-"
+        yield (f'{rnd.choice(ips)} - - [{t.day:02d}/{MONTHS[t.month - 1]}/{t.year}:{t:%H:%M:%S} +0330] '
+               f'"{rnd.choice(methods)} {rnd.choice(urls)} HTTP/1.1" {rnd.choice(statuses)} {size} '
+               f'"{rnd.choice(refs)}" "{rnd.choice(agents)}"\n')
+
+
+def _login_rows(rnd, rows):
+    yield ["index", "Login Timestamp", "User ID", "Round-Trip Time [ms]", "IP Address", "Country", "Region",
+           "City", "ASN", "User Agent String", "Browser Name and Version", "OS Name and Version",
+           "Device Type", "Login Successful", "Is Attack IP", "Is Account Takeover"]
+    ips = [_ip(rnd) for _ in range(50_000)]
+    for i in range(rows):
+        t = START + timedelta(milliseconds=i * 1371)
+        yield [i, t.strftime("%Y-%m-%d %H:%M:%S.") + f"{t.microsecond // 1000:03d}", rnd.getrandbits(62),
+               rnd.choice(["", rnd.randint(100, 900)]), rnd.choice(ips), rnd.choice(["NO", "US", "DE", "IN"]),
+               "-", "-", rnd.randint(1000, 400000),
+               "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)",
+               "Chrome 79.0.3945", "Windows 10", rnd.choice(["desktop", "mobile"]),
+               rnd.random() > 0.3, False, False]
+
+
+def _antivirus_rows(rnd, rows):
+    yield ["og_id", "timestamp", "machine_id", "os", "file_path", "malware_type", "detection_method",
+           "scan_type", "action_taken", "severity", "file_size_kb", "is_persistent", "network_activity"]
+    for i in range(rows):
+        t = START + timedelta(seconds=i * 7)
+        yield [str(uuid.UUID(int=rnd.getrandbits(128), version=4)), t.strftime("%d-%m-%Y %H:%M"),
+               f"Machine_{rnd.randint(1, 50)}",
+               rnd.choice(["Windows 11", "Windows 10", "Windows 7", "macOS", "Linux"]),
+               f"C:/Users/User{rnd.randint(1, 99)}/Downloads/file_{rnd.randint(1, 9999)}.{rnd.choice(['exe', 'bat', 'dll', 'js'])}",
+               rnd.choice(["Trojan", "Worm", "Adware", "Spyware", "Ransomware", "Rootkit", "Keylogger", "Backdoor"]),
+               rnd.choice(["Signature-based", "Heuristic", "Behavioral", "Sandbox"]),
+               rnd.choice(["Full Scan", "Quick Scan", "Custom Scan"]),
+               rnd.choice(["Blocked", "Ignored", "Deleted", "Quarantined"]),
+               rnd.choice(["Low", "Medium", "High", "Critical"]),
+               round(rnd.uniform(1, 10000), 2), rnd.randint(0, 1), rnd.randint(0, 1)]
+
+
+def _rdp_rows(rnd, rows):
+    yield ["session_id", "username", "remote_address", "remote_port", "status", "timestamp"]
+    for i in range(rows):
+        t = START + timedelta(seconds=i * 5)
+        yield [f"{rnd.randint(1000, 9999)}-{i % 10000:04d}",
+               rnd.choice(["admin", "remote", "john", "alice", "user1", "guest", "bob", "test"]),
+               _ip(rnd), 3389, rnd.choice(["connected", "disconnected", "failed"]), f"{t:%Y-%m-%d %H:%M:%S}"]
+
+
+GENERATORS = {"login": _login_rows, "antivirus": _antivirus_rows, "rdp": _rdp_rows}
+
+
+def generate(source, rows, data_dir=DATA_DIR):
+    """Path of a synthetic input for `source` with `rows` records (generated once, then reused)."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"{source}_{rows}{SOURCES[source][1]}")
+    if os.path.exists(path):
+        return path
+    rnd = random.Random(SEED)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        if source == "access":
+            f.writelines(_access_lines(rnd, rows))
+        else:
+            csv.writer(f).writerows(GENERATORS[source](rnd, rows))
+    os.replace(tmp_path, path)
+    return path
+
+
+# ─── backends ──────────────────────────────────────────────────────────────
+
+class SQLiteCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    @staticmethod
+    def _sql(sql):
+        return sql.replace("INSERT IGNORE", "INSERT OR IGNORE").replace("%s", "?")
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(self._sql(sql), params)
+
+    def executemany(self, sql, rows):
+        self.cursor.executemany(self._sql(sql), rows)
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def close(self):
+        self.cursor.close()
+
+
+class SQLiteConnection:
+    """The slice of the mysql.connector API that BulkWriter uses, on top of sqlite3."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+
+    def cursor(self):
+        return SQLiteCursor(self.db.cursor())
+
+    def commit(self):
+        self.db.commit()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self.db.close()
+
+
+def load_loader(source):
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(f"bench_{source}", os.path.join(REPO, SOURCES[source][0]))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # Measure the plain write path only
+    for flag in ("ARCHIVE_MODE", "NORMALIZED_STORAGE", "USE_LOAD_DATA", "FOLLOW_MODE", "GEOIP_ENRICH"):
+        if hasattr(module, flag):
+            setattr(module, flag, False)
+    return module
+
+
+def connect(source, loader, backend, workdir):
+    table = SOURCES[source][2]
+    if backend == "sqlite":
+        sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+        path = os.path.join(workdir, f"{source}.sqlite")
+        if os.path.exists(path):
+            os.remove(path)
+        conn = SQLiteConnection(path)
+        conn.db.execute(SQLITE_DDL[source])
+        return conn
+
+    # MySQL: the loader's own schema, in a throwaway database
+    if hasattr(loader, "DB_NAME"):
+        loader.DB_NAME = BENCH_DB
+    else:
+        loader.MYSQL_DATABASE = BENCH_DB
+    with contextlib.redirect_stdout(io.StringIO()):
+        (getattr(loader, "ensure_schema", None) or loader.create_database_and_table)()
+    conn = loader.connect_for_insert()
+    cursor = conn.cursor()
+    cursor.execute(f"DELETE FROM {table}")
+    conn.commit()
+    cursor.close()
+    return conn
+
+
+# ─── one benchmark case (runs in a child process) ──────────────────────────
+
+def parsed_batches(source, loader, path, stats):
+    """Batches of table rows, produced by the loader's own parsing code."""
+    if source == "access":
+        for batch in loader.iter_log_batches(path, BATCH_ROWS, stats=stats):
+            yield [loader.to_db_row(row) for row in batch]
+        return
+    if source == "rdp":
+        from pathlib import Path
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = loader.load_csv(Path(path), stats)
+        yield from batched(loader.frame_to_rows(df), BATCH_ROWS)
+        return
+    # login / antivirus: chunked CSV reads, as the loaders do
+    with loader.open_input(path, stats) as f:
+        yield from loader.iter_row_batches(f)
+
+
+def run_case(source, rows, backend, data_dir, workdir, pipeline=False, writers=1):
+    path = generate(source, rows, data_dir)
+    loader = load_loader(source)
+    conn = connect(source, loader, backend, workdir)
+    stats = IngestStats(SOURCES[source][2])
+    pipeline_stats = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        if pipeline:
+            # Schema is ready; every writer thread opens its own connection
+            conn.close()
+            if backend == "sqlite":
+                db_path = os.path.join(workdir, f"{source}.sqlite")
+                connect_writer = lambda: SQLiteConnection(db_path)
+            else:
+                connect_writer = loader.connect_for_insert
+            pipeline_stats = run_pipeline(parsed_batches(source, loader, path, stats), connect_writer,
+                                          loader.open_writer, stats, writers)
+        else:
+            with loader.open_writer(conn, stats) as writer:
+                for batch in stats.timed(parsed_batches(source, loader, path, stats), "parse"):
+                    with stats.timing("write"):
+                        writer.write_many(batch)
+                with stats.timing("write"):
+                    writer.flush()
+            conn.close()
+    stats.stop()
+
+    timings = stats.timings
+    parse_sec = sum(timings.get(phase, 0.0) for phase in ("read", "decompress", "parse"))
+    write_sec = timings.get("write", 0.0)
+    result = stats.as_dict()
+    result.update({
+        "source": source,
+        "input_rows": rows,
+        "input_bytes": os.path.getsize(path),
+        "backend": backend,
+        "parse_sec": round(parse_sec, 3),
+        "parse_rows_per_sec": round(rows / parse_sec, 1) if parse_sec else None,
+        "write_sec": round(write_sec, 3),
+        "write_rows_per_sec": round(stats.rows / write_sec, 1) if write_sec else None,
+    })
+    if pipeline_stats is not None:
+        result["pipeline"] = pipeline_stats.as_dict()
+    return result
+
+
+# ─── driver ────────────────────────────────────────────────────────────────
+
+def _size(text):
+    return SIZES.get(text.lower()) or int(text)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    """Print rate changes against a previous report; returns the list of regressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["source"], r["input_rows"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get((r["source"], r["input_rows"]))
+        if old is None:
+            continue
+        for metric in ("parse_rows_per_sec", "write_rows_per_sec"):
+            if r.get(metric) and old.get(metric):
+                change = r[metric] / old[metric] - 1
+                flag = "❌" if change < -tolerance else "  "
+                print(f"{flag} {r['source']:<10}{r['input_rows']:>10}  {metric:<20}{change:+8.1%}")
+                if change < -tolerance:
+                    regressions.append((r["source"], r["input_rows"], metric, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest throughput benchmark for the four loaders.")
+    parser.add_argument("--sizes", default="10k,1m", help="comma list of 10k/1m/10m or row counts")
+    parser.add_argument("--sources", default=",".join(SOURCES))
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing")
+    parser.add_argument("--pipeline", action="store_true", help="parse and write concurrently")
+    parser.add_argument("--writers", type=int, default=1, help="writer threads with --pipeline")
+    parser.add_argument("--case", help=argparse.SUPPRESS)   # internal: run one case in this process
+    args = parser.parse_args()
+
+    if args.case:
+        case = json.loads(args.case)
+        result = run_case(case["source"], case["rows"], args.backend, args.data_dir, case["workdir"],
+                          args.pipeline, args.writers)
+        print(json.dumps(result))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for source in args.sources.split(","):
+            for rows in map(_size, args.sizes.split(",")):
+                print(f"⏱️  {source} × {rows:,} rows ({args.backend}) …", file=sys.stderr)
+                generate(source, rows, args.data_dir)
+                case = json.dumps({"source": source, "rows": rows, "workdir": workdir})
+                proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", case,
+                                       "--backend", args.backend, "--data-dir", args.data_dir,
+                                       "--writers", str(args.writers)] + (["--pipeline"] if args.pipeline else []),
+                                      capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(proc.stderr, file=sys.stderr)
+                    sys.exit(f"[FATAL] {source} × {rows} failed")
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print(f"   parse {result['parse_rows_per_sec'] or 0:>12,.0f} rows/s   "
+                      f"write {result['write_rows_per_sec'] or 0:>12,.0f} rows/s   "
+                      f"peak RSS {result['peak_rss_mb']:>8.1f} MB", file=sys.stderr)
+                if "pipeline" in result:
+                    p = result["pipeline"]
+                    print(f"   elapsed {result['elapsed_sec']}s, queue depth avg {p['avg_queue_depth']} "
+                          f"(max {p['max_queue_depth']}), parser stalled {p['producer_stall_sec']}s, "
+                          f"batch latency p95 {p['batch_latency_p95_ms']} ms", file=sys.stderr)
+
+    report = {
+        "generated_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "backend": args.backend,
+        "pipeline": args.pipeline,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"📝 Report written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
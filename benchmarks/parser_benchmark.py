@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+parser_benchmark.py  –  access-log parser micro-benchmark
+• Times the regex-only path against the fast path (with regex fallback)
+• Defaults to the bundled Server Access Logs/Logs.txt
+• Usage: python benchmarks/parser_benchmark.py [log_file] [repeats]
+"""
+
+import os, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Server Access Logs"))
+import Server_Access_Logs as sal
+
+DEFAULT_LOG = os.path.join(ROOT, "Server Access Logs", "Logs.txt")
+
+
+def lines_per_sec(parse, lines, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for line in lines:
+            parse(line)
+        best = min(best, time.perf_counter() - started)
+    return len(lines) / best if best > 0 else 0.0
+
+
+def main():
+    log_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LOG
+    repeats  = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    lines = [line.strip() for line in sal.iter_log_lines(log_path)]
+    sal.USE_FAST_PARSER = True
+
+    fast_hits  = sum(sal.fast_parse_line(line) is not None for line in lines)
+    mismatches = sum(sal.group_log_data(line) != sal.regex_parse_line(line) for line in lines)
+
+    regex_rate = lines_per_sec(sal.regex_parse_line, lines, repeats)
+    fast_rate  = lines_per_sec(sal.group_log_data, lines, repeats)
+
+    print(f"📄 {log_path}: {len(lines)} lines, best of {repeats}")
+    print(f"   fast path handled {fast_hits} lines, {len(lines) - fast_hits} fell back to regex")
+    print(f"   regex only        : {regex_rate:12,.0f} lines/sec")
+    print(f"   fast + fallback   : {fast_rate:12,.0f} lines/sec  ({fast_rate / regex_rate:.2f}x)")
+    if mismatches:
+        print(f"❌ {mismatches} lines parsed differently by the two paths")
+        sys.exit(1)
+    print("✅ Both paths produced identical rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import time
+import uuid
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:           # optional: pip install pyarrow
+    pa = pq = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_DIR = os.path.join(REPO_ROOT, "archive")
+ARCHIVE_BATCH_ROWS = 100_000      # rows buffered before a partition file is written
+UNKNOWN_DAY = "unknown"           # partition for rows without a timestamp
+
+
+def _arrow_type(name):
+    return {
+        "string": pa.string(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us"),
+    }[name]
+
+
+class ArchiveWriter:
+    """Append rows to a day-partitioned Parquet archive of one source.
+
+    Layout: <root>/<table>/date=YYYY-MM-DD/part-*.parquet (Hive style), the
+    day taken from `time_column`. ``columns`` maps column name → one of
+    'string', 'int64', 'float64', 'bool', 'timestamp' so every file of a
+    source has the same schema. Files are written under a temporary name and
+    renamed, so readers never see a partial file.
+    """
+
+    def __init__(self, table, columns, time_column, root=ARCHIVE_DIR, batch_rows=ARCHIVE_BATCH_ROWS):
+        if pa is None:
+            raise ImportError("the Parquet archive needs pyarrow (pip install pyarrow)")
+        self.table = table
+        self.columns = list(columns)
+        self.schema = pa.schema([(name, _arrow_type(kind)) for name, kind in columns.items()])
+        self.time_index = self.columns.index(time_column)
+        self.root = os.path.join(root, table)
+        self.batch_rows = batch_rows
+        self.days = {}
+        self.buffered = 0
+        self.rows_archived = 0
+        self.files_written = 0
+
+    def write_many(self, rows):
+        for row in rows:
+            ts = row[self.time_index]
+            day = ts.strftime("%Y-%m-%d") if ts is not None else UNKNOWN_DAY
+            self.days.setdefault(day, []).append(row)
+            self.buffered += 1
+        if self.buffered >= self.batch_rows:
+            self.flush()
+
+    def _to_table(self, rows):
+        arrays = []
+        for i, field in enumerate(self.schema):
+            # Infer first, then cast: parsers hand over numbers as text
+            arrays.append(pa.array([row[i] for row in rows]).cast(field.type))
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def flush(self):
+        for day, rows in self.days.items():
+            directory = os.path.join(self.root, f"date={day}")
+            os.makedirs(directory, exist_ok=True)
+            name = f"part-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+            tmp_path = os.path.join(directory, "." + name + ".tmp")
+            pq.write_table(self._to_table(rows), tmp_path, compression="zstd")
+            os.replace(tmp_path, os.path.join(directory, name))
+            self.rows_archived += len(rows)
+            self.files_written += 1
+        self.days = {}
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
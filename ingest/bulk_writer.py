@@ -0,0 +1,203 @@
+import os
+import tempfile
+from datetime import datetime
+
+BATCH_SIZE = 5000
+RECONNECT_ATTEMPTS = 3
+RECONNECT_DELAY = 5          # seconds between reconnect attempts
+
+
+def _tsv_field(value):
+    # Encode one value for LOAD DATA ... FIELDS TERMINATED BY '\t' ESCAPED BY '\\'
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return (str(value)
+            .replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r"))
+
+
+def chain(*steps):
+    """Compose `prepare` steps left to right, skipping None."""
+    steps = [step for step in steps if step is not None]
+    if not steps:
+        return None
+
+    def prepare(rows):
+        for step in steps:
+            rows = step(rows)
+        return rows
+
+    return prepare
+
+
+class BulkWriter:
+    """Buffer rows and write them in batches, committing once per batch.
+
+    Batches go through ``executemany`` (which mysql.connector turns into one
+    multi-row INSERT) or, with ``use_load_data=True``, through
+    ``LOAD DATA LOCAL INFILE`` on a temporary TSV file. The latter needs a
+    connection opened with ``allow_local_infile=True``.
+
+    ``on_duplicate`` decides what happens to rows that collide with a unique
+    key: ``None`` lets MySQL raise, ``"ignore"`` skips them (INSERT IGNORE)
+    and ``"update"`` overwrites ``update_columns`` (ON DUPLICATE KEY UPDATE;
+    REPLACE on the LOAD DATA path).
+
+    ``prepare``, if given, is called with each buffered batch right before it
+    is written and returns the rows to write – the hook for batch-level
+    transforms such as dictionary-encoding text columns.
+
+    ``archive``, if given, receives every committed batch (before
+    ``prepare``) through ``write_many`` and is closed with the writer. With
+    ``on_duplicate="ignore"`` it only gets the rows that were inserted:
+    ``archive_key`` names the unique key the duplicates collide on (columns
+    present in the buffered rows), whose stored values are looked up before
+    each batch is inserted. Without it, only batches that were ignored as a
+    whole are kept out of the archive. A duplicate inserted concurrently
+    by another writer between the lookup and the insert can still be
+    archived twice.
+    """
+
+    def __init__(self, conn, table, columns, batch_size=BATCH_SIZE, use_load_data=False, stats=None,
+                 on_duplicate=None, update_columns=None, prepare=None, archive=None, archive_key=None):
+        if on_duplicate not in (None, "ignore", "update"):
+            raise ValueError(f"on_duplicate must be None, 'ignore' or 'update', not {on_duplicate!r}")
+        self.conn = conn
+        self.table = table
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self.use_load_data = use_load_data
+        self.stats = stats
+        self.on_duplicate = on_duplicate
+        self.update_columns = list(update_columns) if update_columns else self.columns
+        self.prepare = prepare
+        self.archive = archive
+        self.archive_key = list(archive_key) if archive_key else None
+        self.key_positions = [self.columns.index(c) for c in self.archive_key] if self.archive_key else None
+        self.rows_written = 0
+        self.rows_skipped = 0
+        self.buffer = []
+        self.cursor = conn.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        self.close()
+        return False
+
+    def close(self):
+        self.cursor.close()
+        if self.archive is not None:
+            self.archive.close()
+
+    def ensure_connected(self):
+        """Reconnect if the server dropped the connection; returns True if it had to.
+
+        The cursor is opened again with it: the old one belongs to the dead
+        session. Long-lived writers (follow mode, the receiver) call this
+        before each batch instead of pinging the connection themselves.
+        """
+        if self.conn.is_connected():
+            return False
+        self.conn.reconnect(attempts=RECONNECT_ATTEMPTS, delay=RECONNECT_DELAY)
+        self.cursor = self.conn.cursor()
+        return True
+
+    @property
+    def insert_sql(self):
+        cols = ", ".join(self.columns)
+        placeholders = ", ".join(["%s"] * len(self.columns))
+        verb = "INSERT IGNORE" if self.on_duplicate == "ignore" else "INSERT"
+        sql = f"{verb} INTO {self.table} ({cols}) VALUES ({placeholders})"
+        if self.on_duplicate == "update":
+            sql += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in self.update_columns)
+        return sql
+
+    @property
+    def load_data_sql(self):
+        modifier = {"ignore": "IGNORE ", "update": "REPLACE "}.get(self.on_duplicate, "")
+        return (f"LOAD DATA LOCAL INFILE %s {modifier}INTO TABLE {self.table} "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                "LINES TERMINATED BY '\\n' "
+                f"({', '.join(self.columns)})")
+
+    def write(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def _key(self, row):
+        return tuple(row[i] for i in self.key_positions)
+
+    def _stored_keys(self, rows):
+        """archive_key values of `rows` that are already in the table."""
+        keys = list({self._key(row) for row in rows})
+        columns = ", ".join(self.archive_key)
+        one = "(" + ", ".join(["%s"] * len(self.archive_key)) + ")"
+        self.cursor.execute(f"SELECT {columns} FROM {self.table} WHERE ({columns}) IN ({', '.join([one] * len(keys))})",
+                            [value for key in keys for value in key])
+        return {tuple(row) for row in self.cursor.fetchall()}
+
+    def _inserted(self, stored):
+        """The buffered rows INSERT IGNORE kept: new keys, first occurrence of each."""
+        seen, rows = set(stored), []
+        for row in self.buffer:
+            key = self._key(row)
+            if key not in seen:
+                seen.add(key)
+                rows.append(row)
+        return rows
+
+    def flush(self):
+        if not self.buffer:
+            return 0
+        dedup_archive = self.archive is not None and self.on_duplicate == "ignore"
+        stored = self._stored_keys(self.buffer) if dedup_archive and self.archive_key else None
+        rows = self.prepare(self.buffer) if self.prepare is not None else self.buffer
+        if self.use_load_data:
+            self._load_data(rows)
+        else:
+            self.cursor.executemany(self.insert_sql, rows)
+        affected = self.cursor.rowcount
+        self.conn.commit()
+
+        written = len(self.buffer)
+        # With INSERT IGNORE the affected-row count is the number of new rows
+        skipped = max(written - affected, 0) if self.on_duplicate == "ignore" and affected >= 0 else 0
+        if self.archive is not None:
+            if not dedup_archive or not skipped:
+                self.archive.write_many(self.buffer)
+            elif stored is not None:
+                self.archive.write_many(self._inserted(stored))
+            elif skipped < written:
+                self.archive.write_many(self.buffer)
+        self.rows_written += written - skipped
+        self.rows_skipped += skipped
+        if self.stats is not None:
+            self.stats.add_batch(written - skipped, skipped)
+        self.buffer = []
+        return written
+
+    def _load_data(self, rows):
+        fd, path = tempfile.mkstemp(suffix=".tsv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                for row in rows:
+                    f.write("\t".join(_tsv_field(v) for v in row) + "\n")
+            self.cursor.execute(self.load_data_sql, (path.replace("\\", "/"),))
+        finally:
+            os.remove(path)
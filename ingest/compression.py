@@ -0,0 +1,96 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import time
+
+try:
+    import zstandard          # optional: pip install zstandard
+except ImportError:
+    zstandard = None
+
+READ_BUFFER_SIZE = 1 << 20
+
+
+def _open_zstd(path):
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+
+# suffix → opener returning a binary stream of the decompressed bytes
+DECOMPRESSORS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+if zstandard is not None:
+    DECOMPRESSORS[".zst"] = _open_zstd
+
+
+def compression_of(path):
+    """'.gz', '.bz2', '.xz' or '.zst' if `path` is a supported compressed file, else None."""
+    ext = os.path.splitext(path)[1].lower()
+    return ext if ext in DECOMPRESSORS else None
+
+
+def base_extension(path):
+    """Extension with any compression suffix removed: 'antivirus.csv.gz' → '.csv'."""
+    if compression_of(path):
+        path = os.path.splitext(path)[0]
+    return os.path.splitext(path)[1].lower()
+
+
+def find_input(path):
+    """`path` itself, or the first existing compressed variant of it (path.gz, ...), or None."""
+    for candidate in [path] + [path + suffix for suffix in DECOMPRESSORS]:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+class TimedReader(io.RawIOBase):
+    """Raw stream that charges the time spent reading from `raw` to a stats phase."""
+
+    def __init__(self, raw, stats, phase):
+        self.raw = raw
+        self.stats = stats
+        self.phase = phase
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        started = time.perf_counter()
+        n = self.raw.readinto(buffer)
+        if self.stats is not None:
+            self.stats.add_time(self.phase, time.perf_counter() - started)
+        return n
+
+    def seekable(self):
+        return self.raw.seekable()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.raw.seek(offset, whence)
+
+    def tell(self):
+        return self.raw.tell()
+
+    def close(self):
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+def open_input(path, stats=None, buffer_size=READ_BUFFER_SIZE):
+    """Open a plain or compressed file as one buffered binary stream.
+
+    Compressed files are decompressed on the fly as the caller reads – no
+    temporary file. Time spent inside reads is recorded on `stats` as
+    'decompress' (compressed input) or 'read' (plain files).
+    """
+    opener = DECOMPRESSORS.get(compression_of(path))
+    if opener is None:
+        raw, phase = open(path, "rb"), "read"
+    else:
+        raw, phase = opener(path), "decompress"
+    return io.BufferedReader(TimedReader(raw, stats, phase), buffer_size)
@@ -0,0 +1,78 @@
+import hashlib
+import math
+from datetime import datetime
+
+from ingest.schema import add_column_if_missing, index_exists
+
+ROW_HASH_COLUMN = "row_hash"
+ROW_HASH_INDEX = "uq_row_hash"
+FLOAT_DIGITS = 6                # floats are hashed fixed-point, so both sides round alike
+
+
+def _hash_text(value):
+    """`value` as MySQL's CAST(... AS CHAR) renders it inside row_hash_sql()."""
+    if isinstance(value, str):
+        return value
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float):
+        return f"{value:.{FLOAT_DIGITS}f}"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S") + (f".{value.microsecond:06d}" if value.microsecond else "")
+    return str(value)
+
+
+def row_hash(values):
+    """SHA-1 of the values joined by \\x1f – mirrors row_hash_sql() so backfills agree.
+
+    None (and NaN) hash as '', booleans as 1/0, floats with FLOAT_DIGITS
+    decimals and datetimes as 'YYYY-MM-DD HH:MM:SS[.ffffff]'.
+    """
+    text = "\x1f".join(map(_hash_text, values))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def with_row_hash(row):
+    return tuple(row) + (row_hash(row),)
+
+
+def row_hash_sql(columns, float_columns=()):
+    """SQL computing row_hash() from the stored `columns`; `float_columns` are FLOAT/DOUBLE ones."""
+    def text(column):
+        if column in float_columns:
+            return f"COALESCE(CAST({column} AS DECIMAL(65, {FLOAT_DIGITS})), '')"
+        return f"COALESCE(CAST({column} AS CHAR), '')"
+    return f"SHA1(CONCAT_WS(CHAR(31), {', '.join(map(text, columns))}))"
+
+
+def ensure_unique_key(cursor, table, index_name, columns):
+    """Add a UNIQUE index on `columns`, deleting older duplicate rows first."""
+    if index_exists(cursor, table, index_name):
+        return False
+    key = ", ".join(columns)
+    join_on = " AND ".join(f"t.{c} <=> d.{c}" for c in columns)
+    cursor.execute(f"""
+        DELETE t FROM {table} t
+        JOIN (
+            SELECT {key}, MIN(id) AS keep_id
+            FROM {table}
+            GROUP BY {key}
+            HAVING COUNT(*) > 1
+        ) d ON {join_on} AND t.id <> d.keep_id
+    """)
+    if cursor.rowcount:
+        print(f"🧹 Removed {cursor.rowcount} duplicate rows from '{table}'.")
+    cursor.execute(f"CREATE UNIQUE INDEX {index_name} ON {table} ({key})")
+    return True
+
+
+def ensure_row_hash(cursor, table, source_columns, float_columns=()):
+    """Content-hash dedup for sources without a natural key: add, backfill and index row_hash."""
+    add_column_if_missing(cursor, table, ROW_HASH_COLUMN, "CHAR(40)")
+    cursor.execute(
+        f"UPDATE {table} SET {ROW_HASH_COLUMN} = {row_hash_sql(source_columns, float_columns)} "
+        f"WHERE {ROW_HASH_COLUMN} IS NULL"
+    )
+    ensure_unique_key(cursor, table, ROW_HASH_INDEX, [ROW_HASH_COLUMN])
@@ -0,0 +1,112 @@
+import hashlib
+from collections import OrderedDict
+
+from ingest.schema import add_column_if_missing, add_index_if_missing, constraint_exists
+
+DIMENSION_CACHE_SIZE = 200_000   # ids kept in memory per dimension (LRU beyond that)
+LOOKUP_CHUNK = 1000              # hashes per SELECT ... IN (...)
+
+
+def value_hash(value):
+    # Same as SHA1(value) in MySQL, which is what the backfill query uses
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+class DimensionCache:
+    """value → id mapping for one dimension table, cached in-process.
+
+    Unknown values are added with one INSERT IGNORE per batch and their ids
+    read back with one SELECT, so once the cache is warm a batch costs no
+    lookup queries at all.
+    """
+
+    def __init__(self, table, max_entries=DIMENSION_CACHE_SIZE):
+        self.table = table
+        self.max_entries = max_entries
+        self.ids = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def ensure_table(self, cursor):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                id INT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+                value_hash CHAR(40) NOT NULL,
+                value TEXT NOT NULL,
+                UNIQUE KEY uq_value_hash (value_hash)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+    def _remember(self, value, id_):
+        self.ids[value] = id_
+        if len(self.ids) > self.max_entries:
+            self.ids.popitem(last=False)
+
+    def lookup_many(self, cursor, values):
+        """Ids for `values` in the same order (None stays None), creating missing rows."""
+        resolved = {}
+        missing = []
+        for value in set(values):
+            if value is None:
+                continue
+            id_ = self.ids.get(value)
+            if id_ is None:
+                missing.append(value)
+            else:
+                self.ids.move_to_end(value)
+                resolved[value] = id_
+        self.hits += len(resolved)
+        self.misses += len(missing)
+
+        if missing:
+            by_hash = {value_hash(v): v for v in missing}
+            cursor.executemany(
+                f"INSERT IGNORE INTO {self.table} (value_hash, value) VALUES (%s, %s)",
+                list(by_hash.items())
+            )
+            hashes = list(by_hash)
+            for i in range(0, len(hashes), LOOKUP_CHUNK):
+                chunk = hashes[i:i + LOOKUP_CHUNK]
+                cursor.execute(
+                    f"SELECT value_hash, id FROM {self.table} "
+                    f"WHERE value_hash IN ({', '.join(['%s'] * len(chunk))})",
+                    chunk
+                )
+                for h, id_ in cursor.fetchall():
+                    value = by_hash[h]
+                    resolved[value] = id_
+                    self._remember(value, id_)
+
+        return [None if v is None else resolved[v] for v in values]
+
+
+def ensure_dimension_column(cursor, fact_table, text_column, dimension):
+    """Add `<text_column>_id` to the fact table, indexed and referencing the dimension."""
+    id_column = f"{text_column}_id"
+    add_column_if_missing(cursor, fact_table, id_column, "INT UNSIGNED NULL")
+    add_index_if_missing(cursor, fact_table, f"idx_{id_column}", [id_column])
+    fk_name = f"fk_{fact_table}_{id_column}"
+    if not constraint_exists(cursor, fact_table, fk_name):
+        cursor.execute(
+            f"ALTER TABLE {fact_table} ADD CONSTRAINT {fk_name} "
+            f"FOREIGN KEY ({id_column}) REFERENCES {dimension.table} (id)"
+        )
+    return id_column
+
+
+def normalize_existing_rows(cursor, fact_table, text_column, dimension):
+    """Move text already stored on fact rows into the dimension and keep only the id."""
+    id_column = f"{text_column}_id"
+    cursor.execute(f"""
+        INSERT IGNORE INTO {dimension.table} (value_hash, value)
+        SELECT DISTINCT SHA1({text_column}), {text_column}
+        FROM {fact_table}
+        WHERE {id_column} IS NULL AND {text_column} IS NOT NULL
+    """)
+    cursor.execute(f"""
+        UPDATE {fact_table} f
+        JOIN {dimension.table} d ON d.value_hash = SHA1(f.{text_column})
+        SET f.{id_column} = d.id, f.{text_column} = NULL
+        WHERE f.{id_column} IS NULL AND f.{text_column} IS NOT NULL
+    """)
+    return cursor.rowcount
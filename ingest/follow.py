@@ -0,0 +1,136 @@
+import glob
+import json
+import os
+import time
+
+POLL_INTERVAL = 2.0          # seconds between directory scans
+READ_CHUNK_BYTES = 16 << 20  # bytes read per step while catching up on a file
+
+
+def _file_key(st):
+    # (device, inode) identifies a file across renames; the path does not
+    return f"{st.st_dev}:{st.st_ino}"
+
+
+def _decode(raw_line):
+    return raw_line.decode("utf-8", errors="ignore").rstrip("\r")
+
+
+class Checkpoints:
+    """Durable {file identity: {path, offset, header}} map kept in a JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        # Write-then-rename so a crash never leaves a half-written checkpoint
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def iter_new_lines(path, offset, chunk_bytes=READ_CHUNK_BYTES):
+    """Yield (lines, end_offset) for complete lines written after `offset`.
+
+    A trailing line without its newline is left for the next poll, since the
+    writer may still be in the middle of it.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        pending = b""
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                return
+            pending += data
+            cut = pending.rfind(b"\n")
+            if cut == -1:
+                continue
+            complete, pending = pending[:cut], pending[cut + 1:]
+            offset += cut + 1
+            yield [_decode(line) for line in complete.split(b"\n")], offset
+
+
+def _find_moved_file(directory, key):
+    for name in os.listdir(directory or "."):
+        candidate = os.path.join(directory, name)
+        try:
+            if os.path.isfile(candidate) and _file_key(os.stat(candidate)) == key:
+                return candidate
+        except OSError:
+            continue
+    return None
+
+
+def _ingest_file(path, key, entry, handle, has_header, checkpoints):
+    for lines, offset in iter_new_lines(path, entry["offset"]):
+        if has_header and entry["header"] is None:
+            entry["header"] = lines.pop(0)
+        if lines:
+            handle(path, lines, entry["header"])
+        # Only advance once the handler has committed the rows
+        entry["offset"] = offset
+        checkpoints.entries[key] = entry
+        checkpoints.save()
+
+
+def poll_once(pattern, handle, checkpoints, has_header=False):
+    """Ingest whatever was appended to files matching `pattern` since the last checkpoint."""
+    current = {}
+    for path in sorted(glob.glob(pattern)):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        current[_file_key(st)] = (path, st.st_size)
+
+    # Files rotated out of the pattern (e.g. Logs.txt → Logs.txt.1): drain their tail once
+    for key, entry in list(checkpoints.entries.items()):
+        if key in current:
+            continue
+        moved = _find_moved_file(os.path.dirname(entry["path"]), key)
+        if moved:
+            print(f"🔁 {entry['path']} was rotated to {moved}; reading its remaining lines.")
+            _ingest_file(moved, key, entry, handle, has_header, checkpoints)
+        del checkpoints.entries[key]
+        checkpoints.save()
+
+    for key, (path, size) in current.items():
+        entry = checkpoints.entries.get(key)
+        if entry is None:
+            print(f"📂 Watching new file: {path}")
+            entry = {"path": path, "offset": 0, "header": None}
+        elif size < entry["offset"]:
+            print(f"✂️  {path} was truncated; re-reading from the start.")
+            entry = {"path": path, "offset": 0, "header": None}
+        entry["path"] = path
+        _ingest_file(path, key, entry, handle, has_header, checkpoints)
+        checkpoints.entries[key] = entry
+    checkpoints.save()
+
+
+def follow(pattern, handle, checkpoint_path, has_header=False, poll_interval=POLL_INTERVAL, once=False):
+    """Keep ingesting lines appended to files matching `pattern` until interrupted.
+
+    ``handle(path, lines, header)`` must write the lines durably before
+    returning; the checkpoint is advanced right after it. CSV sources pass
+    ``has_header=True`` so each file's header line is remembered and not
+    handed over as data.
+    """
+    checkpoints = Checkpoints(checkpoint_path)
+    print(f"👀 Following {pattern} (checkpoint: {checkpoint_path})")
+    try:
+        while True:
+            poll_once(pattern, handle, checkpoints, has_header)
+            if once:
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("⏹️  Follow mode stopped.")
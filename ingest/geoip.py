@@ -0,0 +1,223 @@
+"""Offline IP → ASN / country lookups from a local IP-range database.
+
+The database is the iptoasn.com format – one range per line, tab or comma
+separated: range_start, range_end, AS_number, country_code, AS_description
+(ip2asn-v4.tsv, ip2asn-combined.tsv, optionally .gz/.bz2/.xz/.zst). Rows
+keyed by a CIDR network instead (network, asn, country[, org]) work too.
+
+Ranges are kept in sorted arrays, one per address family, and found with a
+binary search narrowed by a prefix table; an LRU in front answers repeated
+IPs without searching.
+Nothing here touches the network.
+
+    python -m ingest.geoip [db] [ip ...]     # look up IPs, or time lookups
+"""
+import csv
+import io
+import ipaddress
+import itertools
+import os
+import random
+import socket
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from ingest.compression import find_input, open_input
+from ingest.schema import add_column_if_missing
+
+GEOIP_DB = os.path.join(REPO_ROOT, "data", "ip2asn-combined.tsv")   # also found as .gz etc.
+GEOIP_CACHE_SIZE = 100_000      # hot IPs kept by the LRU
+UNROUTED = ("None", "Not routed", "")
+GEO_COLUMN_TYPES = {"asn": "INT UNSIGNED", "country": "CHAR(2)", "org": "VARCHAR(255)"}
+
+
+def _to_int(ip):
+    """'1.2.3.4' → (4, 16909060); IPv6 → (6, int); anything else → (None, None)."""
+    try:
+        if ":" in ip:
+            return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+        if ip.count(".") == 3:   # inet_aton alone would also accept '1.2' and '42'
+            return 4, int.from_bytes(socket.inet_aton(ip), "big")
+    except (OSError, ValueError):
+        pass
+    return None, None
+
+
+def _range(fields):
+    if "/" in fields[0]:
+        network = ipaddress.ip_network(fields[0].strip(), strict=False)
+        return network.version, int(network.network_address), int(network.broadcast_address), fields[1:]
+    (version, start), (_, end) = _to_int(fields[0].strip()), _to_int(fields[1].strip())
+    if start is None or end is None:
+        raise ValueError(f"not an IP range: {fields[:2]}")
+    return version, start, end, fields[2:]
+
+
+class IpRangeIndex:
+    """Sorted, non-overlapping IP ranges → (asn, country, organisation).
+
+    Each family is one sorted array of boundaries – every range start, and
+    the address after every range end – with the value that starts at each
+    one (None for a hole), so a lookup is a single bisect and no end check.
+    A table indexed by the top PREFIX_BITS bits of the address narrows the
+    bisect to the few boundaries inside that prefix.
+    """
+
+    PREFIX_BITS = 16
+
+    def __init__(self, ranges, cache_size=GEOIP_CACHE_SIZE):
+        # family → (boundaries, slot values, prefix → first boundary, prefix shift)
+        self.families = {}
+        self.ranges = 0
+        interned = {}
+        by_family = {4: [], 6: []}
+        for version, start, end, info in ranges:
+            by_family[version].append((start, end, interned.setdefault(info, info)))
+        for version, rows in by_family.items():
+            rows.sort()
+            bounds, slots = [], [None]
+            for start, end, info in rows:
+                if bounds and bounds[-1] == start:
+                    slots[-1] = info        # adjacent ranges: no hole between them
+                else:
+                    bounds.append(start)
+                    slots.append(info)
+                bounds.append(end + 1)
+                slots.append(None)
+            if version == 4:
+                bounds = array("Q", bounds)
+            shift = (32 if version == 4 else 128) - self.PREFIX_BITS
+            block = array("I", (bisect_left(bounds, prefix << shift) for prefix in range((1 << self.PREFIX_BITS) + 1)))
+            self.families[version] = (bounds, slots, block, shift)
+            self.ranges += len(rows)
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __len__(self):
+        return self.ranges
+
+    @classmethod
+    def load(cls, path, cache_size=GEOIP_CACHE_SIZE):
+        ranges = []
+        with open_input(path) as raw:
+            text = io.TextIOWrapper(raw, encoding="utf-8", errors="replace", newline="")
+            first = text.readline()
+            delimiter = "\t" if "\t" in first else ","
+            for fields in csv.reader(itertools.chain([first], text), delimiter=delimiter):
+                ranges.extend(cls._parse(fields))
+        return cls(ranges, cache_size)
+
+    @staticmethod
+    def _parse(fields):
+        if len(fields) < 2 or fields[0].startswith("#"):
+            return ()
+        try:
+            version, start, end, rest = _range(fields)
+        except ValueError:
+            return ()    # header line or garbage
+        rest = [f.strip() for f in rest] + ["", "", ""]
+        asn = int(rest[0]) if rest[0].isdigit() and rest[0] != "0" else None
+        if asn is None and rest[1] in UNROUTED:
+            return ()
+        country = rest[1] if rest[1] not in UNROUTED else None
+        return ((version, start, end, (asn, country, rest[2] or None)),)
+
+    def _lookup(self, ip):
+        try:
+            # IPv4 fast path (inet_pton, unlike inet_aton, takes dotted quads only);
+            # IPv6 and junk fall through to _to_int
+            version, value = 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+        except (OSError, TypeError):
+            version, value = _to_int(ip) if isinstance(ip, str) else (None, None)
+            if value is None:
+                return None
+        bounds, slots, block, shift = self.families[version]
+        prefix = value >> shift
+        return slots[bisect_right(bounds, value, block[prefix], block[prefix + 1])]
+
+    def cache_info(self):
+        return self.lookup.cache_info()
+
+
+@lru_cache(maxsize=None)
+def load_index(path=GEOIP_DB):
+    """The index for `path`, loaded once per process; None if no database is there."""
+    found = find_input(path)
+    if found is None:
+        print(f"⚠️ No IP range database at {path}; events are stored without ASN/country.")
+        return None
+    started = time.perf_counter()
+    index = IpRangeIndex.load(found)
+    print(f"🌍 Loaded {len(index):,} IP ranges from {os.path.basename(found)} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return index
+
+
+def enricher(index, ip_position, fields=("asn", "country")):
+    """BulkWriter `prepare` step appending the looked-up `fields` to each row.
+
+    `ip_position` is the IP's index in the row. IPs that are missing,
+    malformed or not in any range get None.
+    """
+    positions = [("asn", "country", "org").index(f) for f in fields]
+    empty = (None,) * len(positions)
+    lookup = index.lookup
+
+    def enrich(rows):
+        out = []
+        for row in rows:
+            info = lookup(row[ip_position])
+            out.append(tuple(row) + (tuple(info[p] for p in positions) if info else empty))
+        return out
+
+    return enrich
+
+
+def ensure_geo_columns(cursor, table, fields=("asn", "country")):
+    """Add the enrichment columns to `table` if it predates them."""
+    for field in fields:
+        add_column_if_missing(cursor, table, field, GEO_COLUMN_TYPES[field])
+
+
+def _benchmark(index, lookups=1_000_000):
+    """Lookups/s without and with the LRU, for IP streams of decreasing repetition.
+
+    Each stream draws from `distinct` random IPs with exponentially skewed
+    popularity (a few busy clients, a long tail), as access logs do.
+    """
+    rnd = random.Random(42)
+    print(f"   {'distinct IPs':>12} {'uncached':>12} {'with LRU':>12} {'hit ratio':>10}")
+    for distinct in (lookups, 200_000, 50_000):
+        ips = [socket.inet_ntoa(rnd.getrandbits(32).to_bytes(4, "big")) for _ in range(distinct)]
+        stream = [ips[min(int(rnd.expovariate(10 / distinct)), distinct - 1)] for _ in range(lookups)]
+        rates = []
+        index.lookup.cache_clear()
+        for fn in (index._lookup, index.lookup):
+            started = time.perf_counter()
+            for ip in stream:
+                fn(ip)
+            rates.append(lookups / (time.perf_counter() - started))
+        info = index.cache_info()
+        print(f"   {distinct:>12,} {rates[0]:>12,.0f} {rates[1]:>12,.0f} {info.hits / lookups:>10.1%}")
+
+
+def main(argv=sys.argv[1:]):
+    path = argv[0] if argv and not _to_int(argv[0])[1] else GEOIP_DB
+    ips = argv[1:] if argv and path == argv[0] else argv
+    index = load_index(path)
+    if index is None:
+        sys.exit(1)
+    if not ips:
+        _benchmark(index)
+    for ip in ips:
+        print(f"{ip}\t{index.lookup(ip)}")
+
+
+if __name__ == "__main__":
+    main()
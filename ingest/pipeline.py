@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+
+QUEUE_DEPTH = 4        # parsed batches allowed to wait for a writer
+WRITER_THREADS = 1     # each writer thread has its own connection
+_DONE = object()
+
+
+def batched(rows, size):
+    """Group an iterable of rows into lists of at most `size`."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class PipelineStats:
+    """Queue depth, stall and latency figures for one run_pipeline() call."""
+
+    def __init__(self, capacity, writers):
+        self.capacity = capacity
+        self.writers = writers
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.producer_stall = 0.0   # parser blocked on a full queue
+        self.writer_idle = 0.0      # writers waiting on an empty queue (summed over writers)
+        self.latencies = []         # enqueue → committed, per batch
+        self._lock = threading.Lock()
+
+    def sample_depth(self, depth):
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def add_idle(self, seconds):
+        with self._lock:
+            self.writer_idle += seconds
+
+    def add_latency(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def _latency_ms(self, q):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    def as_dict(self):
+        return {
+            "queue_capacity": self.capacity,
+            "writer_threads": self.writers,
+            "batches": len(self.latencies),
+            "avg_queue_depth": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            "max_queue_depth": self.max_depth,
+            "producer_stall_sec": round(self.producer_stall, 3),
+            "writer_idle_sec": round(self.writer_idle, 3),
+            "batch_latency_p50_ms": round(self._latency_ms(0.5), 1),
+            "batch_latency_p95_ms": round(self._latency_ms(0.95), 1),
+            "batch_latency_max_ms": round(max(self.latencies, default=0.0) * 1000, 1),
+        }
+
+    def summary(self):
+        s = self.as_dict()
+        return (f"🧵 pipeline: queue depth avg {s['avg_queue_depth']}/{s['queue_capacity']} "
+                f"(max {s['max_queue_depth']}), parser stalled {s['producer_stall_sec']}s, "
+                f"writers idle {s['writer_idle_sec']}s, batch latency p50 {s['batch_latency_p50_ms']} ms "
+                f"/ p95 {s['batch_latency_p95_ms']} ms")
+
+
+def _write_batches(jobs, connect, open_writer, stats, pstats, failures):
+    conn = None
+    try:
+        conn = connect()
+        with open_writer(conn, stats) as writer:
+            while True:
+                waited = time.perf_counter()
+                item = jobs.get()
+                pstats.add_idle(time.perf_counter() - waited)
+                if item is _DONE:
+                    break
+                enqueued, rows = item
+                with stats.timing("write"):
+                    writer.write_many(rows)
+                    writer.flush()
+                pstats.add_latency(time.perf_counter() - enqueued)
+    except Exception as e:
+        failures.append(e)
+        # Keep draining so the parser is never left blocked on a full queue
+        while jobs.get() is not _DONE:
+            pass
+    finally:
+        if conn is not None and conn.is_connected():
+            conn.close()
+
+
+def run_pipeline(batches, connect, open_writer, stats, writers=WRITER_THREADS, queue_depth=QUEUE_DEPTH):
+    """Parse in the calling thread while writer threads insert, joined by a bounded queue.
+
+    `batches` yields lists of table rows; iterating it is the parse stage.
+    Each of the `writers` threads opens its own connection with `connect()`
+    and a writer with `open_writer(conn, stats)`, and commits every batch it
+    takes. When the queue is full the parser blocks, so at most
+    queue_depth + writers batches are in memory. With more than one writer,
+    rows are not committed in input order. The first writer error is
+    re-raised once the pipeline has wound down. Returns a PipelineStats.
+    """
+    pstats = PipelineStats(queue_depth, writers)
+    jobs = queue.Queue(maxsize=queue_depth)
+    failures = []
+    threads = [threading.Thread(target=_write_batches, name=f"ingest-writer-{i}",
+                                args=(jobs, connect, open_writer, stats, pstats, failures), daemon=True)
+               for i in range(writers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for rows in stats.timed(batches, "parse"):
+            if failures:
+                break
+            pstats.sample_depth(jobs.qsize())
+            blocked = time.perf_counter()
+            jobs.put((time.perf_counter(), rows))
+            pstats.producer_stall += time.perf_counter() - blocked
+    finally:
+        for _ in threads:
+            jobs.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    if failures:
+        raise failures[0]
+    return pstats
@@ -0,0 +1,380 @@
+"""Long-running ingest service: syslog (UDP/TCP) and JSON lines over HTTP.
+
+Every message is routed to one of the four loaders, buffered per source and
+written in micro-batches – when MAX_BATCH_ROWS messages are pending or every
+MAX_BATCH_DELAY seconds, whichever comes first. Each source keeps a single
+connection and BulkWriter on its own thread, so the event loop never blocks
+on MySQL and there is no connection per event.
+
+Syslog: the tag / APP-NAME picks the source (see SYSLOG_TAGS) and the message
+body is the raw line – an access-log line, or a headerless CSV row in the
+loader's CSV_HEADER order for login, rdp and antivirus.
+
+HTTP:   POST /ingest/<source> with one JSON value per line, either
+        {"line": "<raw line>"} or an object keyed by the CSV_HEADER names.
+        An object may carry "source" to override the one in the path.
+
+Run from the repository root:  python -m ingest.receiver
+"""
+import asyncio
+import csv
+import importlib.util
+import io
+import json
+import logging
+import os
+import re
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from ingest.rollups import reconcile_counts
+from ingest.stats import IngestStats
+
+log = logging.getLogger("ingest.receiver")
+
+LISTEN_HOST = "127.0.0.1"
+SYSLOG_PORT = 5514            # UDP and TCP
+HTTP_PORT = 8514
+MAX_BATCH_ROWS = 1000         # flush a source once this many messages are pending
+MAX_BATCH_DELAY = 1.0         # ...or after this many seconds
+MAX_HTTP_BODY = 16 << 20
+RECONCILE_INTERVAL = 3600     # seconds between exact recounts of each source's row count
+
+# source → (loader script, schema setup function)
+SOURCES = {
+    "access": (os.path.join("Server Access Logs", "Server_Access_Logs.py"), "create_database_and_table"),
+    "login": (os.path.join("Login Logs", "Login_Logs.py"), "create_database_and_table"),
+    "rdp": (os.path.join("RDP logs", "rdp.py"), "ensure_schema"),
+    "antivirus": (os.path.join("Antivirus Logs", "antivirus_parser.py"), "create_database_and_table"),
+}
+
+SYSLOG_TAGS = {
+    "access": "access", "apache": "access", "httpd": "access", "nginx": "access",
+    "login": "login", "rdp": "rdp", "antivirus": "antivirus",
+}
+
+# <PRI>1 TIMESTAMP HOST APP-NAME PROCID MSGID [SD] MSG
+RFC5424 = re.compile(r"<\d{1,3}>1 \S+ \S+ (?P<tag>\S+) \S+ \S+ (?:-|(?:\[.*?\])+) ?(?P<msg>.*)", re.S)
+# <PRI>Mmm dd hh:mm:ss HOST TAG[PID]: MSG
+RFC3164 = re.compile(r"<\d{1,3}>(?:[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d )?(?:\S+ )?"
+                     r"(?P<tag>[^:\[\s]+)(?:\[\d+\])?: ?(?P<msg>.*)", re.S)
+
+
+def load_loader(source):
+    script, _ = SOURCES[source]
+    spec = importlib.util.spec_from_file_location(f"loader_{source}", os.path.join(REPO_ROOT, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_syslog(text):
+    """'<13>Oct 11 22:14:15 web nginx: 1.2.3.4 - - [...' → ('nginx', '1.2.3.4 - - [...')."""
+    text = text.rstrip("\r\n")
+    match = RFC5424.match(text) or RFC3164.match(text)
+    if match is None:
+        return None, text
+    return match.group("tag").lower(), match.group("msg")
+
+
+def _csv_line(values):
+    out = io.StringIO()
+    csv.writer(out, lineterminator="").writerow(values)
+    return out.getvalue()
+
+
+class SourceSink:
+    """Pending messages of one source plus the connection and writer that store them."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.pending = []
+        self.received = 0
+        self.stats = IngestStats(getattr(loader, "TABLE_NAME", None) or loader.TABLE)
+        self.lock = asyncio.Lock()
+        # One thread per source: the connection is only ever used from it
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ingest-{name}")
+        self.conn = None
+        self.writer = None
+
+    def to_line(self, record):
+        """A JSON value from the HTTP endpoint → the raw line the loader parses."""
+        if isinstance(record, str):
+            return record
+        if "line" in record:
+            return record["line"]
+        header = getattr(self.loader, "CSV_HEADER", None)
+        if header is None:
+            raise ValueError(f"'{self.name}' records need a \"line\" field")
+        return _csv_line(["" if record.get(c) is None else record[c] for c in header])
+
+    def add(self, line):
+        self.pending.append(line)
+        self.received += 1
+        return len(self.pending) >= MAX_BATCH_ROWS
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+            lines, self.pending = self.pending, []
+            await asyncio.get_running_loop().run_in_executor(self.executor, self._write, lines)
+
+    def _parse(self, lines):
+        """Table rows of `lines`; a line that fails to parse is rejected on its own, not with its batch."""
+        try:
+            rows = self.loader.lines_to_rows(lines)
+        except Exception:
+            # Some line broke the batch parse: find it (and any others) line by line
+            rows = []
+            for line in lines:
+                try:
+                    parsed = self.loader.lines_to_rows([line])
+                except Exception as e:
+                    parsed, reason = [], f"{type(e).__name__}: {e}"
+                else:
+                    reason = "no row parsed"
+                if not parsed:
+                    self.stats.add_rejected()
+                    log.warning("%s: rejected message (%s): %.200r", self.name, reason, line)
+                rows.extend(parsed)
+            return rows
+        if len(rows) < len(lines):
+            # The loader skipped lines it could not read (e.g. a bad timestamp)
+            self.stats.add_rejected(len(lines) - len(rows))
+            log.warning("%s: rejected %d of %d message(s) that did not parse",
+                        self.name, len(lines) - len(rows), len(lines))
+        return rows
+
+    def _write(self, lines):
+        # Parsing happens here too, off the event loop
+        rows = self._parse(lines)
+        if not rows:
+            return
+        try:
+            if self.conn is None:
+                self.conn = self.loader.connect_for_insert()
+                self.writer = self.loader.open_writer(self.conn, self.stats)
+            self.writer.ensure_connected()
+            self.writer.write_many(rows)
+            self.writer.flush()
+        except Exception as e:
+            log.error("%s: could not store %d row(s): %s", self.name, len(rows), e)
+            if self.writer is not None:
+                self.writer.buffer = []
+            if self.conn is not None and self.conn.is_connected():
+                self.conn.rollback()
+            return
+        try:
+            self.loader.update_summaries(self.conn)
+        except Exception as e:
+            # The batch itself is committed; the next refresh picks its rows up
+            log.warning("%s: summary rollups not refreshed: %s", self.name, e)
+
+    async def reconcile(self):
+        async with self.lock:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self._reconcile)
+
+    def _reconcile(self):
+        if self.conn is None:
+            return      # nothing received yet
+        try:
+            self.writer.ensure_connected()
+            reconcile_counts(self.conn, self.stats.source, getattr(self.loader, "SUMMARY_COLUMNS", None),
+                             getattr(self.loader, "ENTITY_ROLLUPS", {}))
+        except Exception as e:
+            log.warning("%s: row count not reconciled: %s", self.name, e)
+
+    def _close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.conn is not None and self.conn.is_connected():
+            self.conn.close()
+
+    async def close(self):
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._close)
+        self.executor.shutdown()
+        self.stats.stop()
+        print(f"{self.stats.summary()} ({self.received} messages received)")
+
+
+class Receiver:
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self.unrouted = 0
+        self.tasks = set()
+
+    def route(self, source, line):
+        """Queue one line; returns the sink if it is now due for a flush."""
+        sink = self.sinks.get(source)
+        if sink is None or not line:
+            self.unrouted += 1
+            return None
+        return sink if sink.add(line) else None
+
+    def flush_soon(self, sink):
+        task = asyncio.ensure_future(sink.flush())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def on_syslog(self, text):
+        tag, message = parse_syslog(text)
+        return self.route(SYSLOG_TAGS.get(tag), message)
+
+    async def flush_all(self):
+        await asyncio.gather(*(sink.flush() for sink in self.sinks.values()))
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(MAX_BATCH_DELAY)
+            await self.flush_all()
+
+    async def reconcile_periodically(self):
+        while True:
+            await asyncio.sleep(RECONCILE_INTERVAL)
+            for sink in self.sinks.values():
+                await sink.reconcile()
+
+    async def handle_syslog_tcp(self, reader, writer):
+        # Newline-framed messages; awaiting full sinks pushes back on the sender
+        try:
+            async for raw in reader:
+                sink = self.on_syslog(raw.decode("utf-8", errors="ignore"))
+                if sink is not None:
+                    await sink.flush()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_http(self, reader, writer):
+        try:
+            status, payload = await self._http_request(reader)
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError) as e:
+            status, payload = 400, {"error": str(e)}
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                     "Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _http_request(self, reader):
+        method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        parts = target.split("?", 1)[0].strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "ingest" or parts[1] not in self.sinks:
+            return 404, {"error": f"POST to /ingest/<{'|'.join(self.sinks)}>"}
+        length = int(headers.get("content-length", 0))
+        if length > MAX_HTTP_BODY:
+            return 413, {"error": f"body larger than {MAX_HTTP_BODY} bytes"}
+        body = await reader.readexactly(length)
+
+        accepted = rejected = 0
+        due = set()
+        for line in body.decode("utf-8", errors="ignore").splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                rejected += 1
+                continue
+            if not isinstance(record, (dict, str)):
+                rejected += 1       # valid JSON, but neither a record nor a raw line: [1, 2], 3, null
+                continue
+            try:
+                source = record.get("source", parts[1]) if isinstance(record, dict) else parts[1]
+                sink = self.route(source, self.sinks[source].to_line(record))
+            except (ValueError, TypeError, KeyError):
+                rejected += 1
+                continue
+            accepted += 1
+            if sink is not None:
+                due.add(sink)
+        for sink in due:
+            await sink.flush()
+        return 202, {"accepted": accepted, "rejected": rejected}
+
+
+HTTP_REASONS = {202: "Accepted", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class SyslogUDP(asyncio.DatagramProtocol):
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        sink = self.receiver.on_syslog(data.decode("utf-8", errors="ignore"))
+        if sink is not None:
+            # UDP has no backpressure: flush in the background
+            self.receiver.flush_soon(sink)
+
+
+async def serve(sources=tuple(SOURCES)):
+    sinks = {}
+    for source in sources:
+        loader = load_loader(source)
+        getattr(loader, SOURCES[source][1])()
+        sinks[source] = SourceSink(source, loader)
+    receiver = Receiver(sinks)
+
+    loop = asyncio.get_running_loop()
+    udp, _ = await loop.create_datagram_endpoint(lambda: SyslogUDP(receiver),
+                                                 local_addr=(LISTEN_HOST, SYSLOG_PORT))
+    tcp = await asyncio.start_server(receiver.handle_syslog_tcp, LISTEN_HOST, SYSLOG_PORT)
+    http = await asyncio.start_server(receiver.handle_http, LISTEN_HOST, HTTP_PORT)
+    print(f"📡 Syslog on udp/tcp {LISTEN_HOST}:{SYSLOG_PORT}, JSON lines on http://{LISTEN_HOST}:{HTTP_PORT}/ingest/<source>")
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass   # Windows: Ctrl+C cancels serve() instead
+    ticker = asyncio.create_task(receiver.flush_periodically())
+    recounter = asyncio.create_task(receiver.reconcile_periodically())
+    try:
+        await stop.wait()
+    finally:
+        ticker.cancel()
+        recounter.cancel()
+        udp.close()
+        tcp.close()
+        http.close()
+        for sink in sinks.values():
+            await sink.close()
+        if receiver.unrouted:
+            print(f"⚠️ {receiver.unrouted} message(s) had no matching source and were dropped.")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
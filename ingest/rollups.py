@@ -0,0 +1,566 @@
+"""Summary rollups and row counts behind the dashboard.
+
+For each (source table, column, value) the loaders keep a running count,
+both per hour bucket (log_summaries) and all-time (log_summary_totals),
+so a chart reads O(distinct values) rows instead of grouping the whole
+log table. The pseudo-column '*' counts every row per hour bucket, and
+log_sources keeps each table's total, so neither the home page counters
+nor its 1h/24h/7d figures touch the log tables. Its data_version goes up
+whenever a table's rows or rollups change; the dashboard's query cache
+drops results computed under an older version.
+
+Rollups are folded in from the log table itself: rows with an id above
+the source's watermark (log_sources.last_id) are grouped and added, then
+the watermark moves up. Rows skipped as duplicates never reach the table
+and so are never counted. Writers may run concurrently: ids still missing
+when the watermark passes them are kept in log_rollup_gaps and folded
+when their rows commit (see refresh_summaries). purge_before() subtracts
+what it deletes, and reconcile_counts() replaces the running total with
+an exact recount and rebuilds any rollup that no longer matches the rows.
+
+Entity rollups (<table>_by_<entity>, e.g. server_access_logs_by_ip) are
+folded in under the same watermark: per entity and minute/hour bucket,
+an `events` count plus the SUM of each metric expression the loader
+declares (ENTITY_ROLLUPS). Values whose distinct count per entity is
+wanted (e.g. URLs per IP) go to <table>_by_<entity>_distinct as
+(entity, value hash, last seen). ML features then aggregate buckets, so
+their cost follows entities x buckets instead of rows.
+
+    python -m ingest.rollups reconcile [source ...]
+    python -m ingest.rollups purge DAYS [source ...]
+"""
+import os
+import sys
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from ingest.schema import add_column_if_missing, table_exists
+
+SUMMARY_TABLE = "log_summaries"
+TOTALS_TABLE = "log_summary_totals"
+REGISTRY_TABLE = "log_sources"
+ALL_ROWS = "*"                              # pseudo-column: every row, per hour bucket
+NO_TIME_BUCKET = "1970-01-01 00:00:00"     # bucket of rows without a timestamp
+MAX_VALUE_LENGTH = 255
+GAPS_TABLE = "log_rollup_gaps"
+PURGE_CHUNK_ROWS = 10_000                   # rows deleted (and subtracted) per transaction
+REFRESH_CHUNK_ROWS = 50_000                 # rows folded per transaction
+GAP_RETENTION = timedelta(hours=1)          # how long a missing id below the watermark is waited for
+# Entity rollup granularities → bucket format (DATE_FORMAT)
+ENTITY_BUCKETS = {"minute": "%Y-%m-%d %H:%i:00", "hour": "%Y-%m-%d %H:00:00"}
+
+
+def ensure_summary_tables(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+            source VARCHAR(64) NOT NULL,
+            column_name VARCHAR(64) NOT NULL,
+            value VARCHAR({MAX_VALUE_LENGTH}) NOT NULL,
+            bucket DATETIME NOT NULL,
+            count BIGINT UNSIGNED NOT NULL,
+            PRIMARY KEY (source, column_name, value, bucket),
+            INDEX idx_column_bucket (column_name, bucket)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TOTALS_TABLE} (
+            source VARCHAR(64) NOT NULL,
+            column_name VARCHAR(64) NOT NULL,
+            value VARCHAR({MAX_VALUE_LENGTH}) NOT NULL,
+            count BIGINT UNSIGNED NOT NULL,
+            PRIMARY KEY (source, column_name, value)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {REGISTRY_TABLE} (
+            source VARCHAR(64) PRIMARY KEY,
+            time_column VARCHAR(64) NOT NULL,
+            last_id BIGINT UNSIGNED NOT NULL,
+            row_count BIGINT UNSIGNED NOT NULL,
+            reconciled_at DATETIME NULL
+        ) ENGINE=InnoDB
+    """)
+    add_column_if_missing(cursor, REGISTRY_TABLE, "data_version", "BIGINT UNSIGNED NOT NULL DEFAULT 0")
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {GAPS_TABLE} (
+            source VARCHAR(64) NOT NULL,
+            first_id BIGINT UNSIGNED NOT NULL,
+            last_id BIGINT UNSIGNED NOT NULL,
+            found_at DATETIME NOT NULL,
+            PRIMARY KEY (source, first_id)
+        ) ENGINE=InnoDB
+    """)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _value_sql(column):
+    return f"COALESCE(LEFT(CAST({column} AS CHAR), {MAX_VALUE_LENGTH}), '')"
+
+
+def _bucket_sql(time_column):
+    # Doubled %: the statements run with parameters
+    return f"COALESCE(DATE_FORMAT({time_column}, '%%Y-%%m-%%d %%H:00:00'), '{NO_TIME_BUCKET}')"
+
+
+def _lock_source(cursor, table):
+    """(time_column, last_id) of `table`, row-locked until the transaction ends; None if unregistered."""
+    cursor.execute(f"SELECT time_column, last_id FROM {REGISTRY_TABLE} WHERE source = %s FOR UPDATE", (table,))
+    return cursor.fetchone()
+
+
+def _summary_columns(cursor, table):
+    cursor.execute(f"SELECT DISTINCT column_name FROM {TOTALS_TABLE} WHERE source = %s", (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _entity_rollup(table, entity):
+    return f"{table}_by_{entity}"
+
+
+def _entity_metrics(spec):
+    return {"events": "1", **spec.get("metrics", {})}
+
+
+def ensure_entity_rollups(cursor, table, time_column, entities):
+    """Create the entity rollup tables of `table`; new ones are backfilled up to its watermark.
+
+    `entities` maps an entity column to {"metrics": {name: SQL expression},
+    "distinct": [columns], "source": table or view to read from}. Metric
+    expressions are summed per bucket and run with parameters, so a literal
+    % must be written %%.
+    """
+    cursor.execute(f"SELECT last_id FROM {REGISTRY_TABLE} WHERE source = %s", (table,))
+    registered = cursor.fetchone()
+    for entity, spec in entities.items():
+        rollup = _entity_rollup(table, entity)
+        created = not table_exists(cursor, rollup)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {rollup} (
+                entity VARCHAR({MAX_VALUE_LENGTH}) NOT NULL,
+                granularity ENUM({", ".join(f"'{g}'" for g in ENTITY_BUCKETS)}) NOT NULL,
+                bucket DATETIME NOT NULL,
+                events BIGINT UNSIGNED NOT NULL,
+                PRIMARY KEY (entity, granularity, bucket),
+                INDEX idx_granularity_bucket (granularity, bucket)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+        for metric in spec.get("metrics", {}):
+            add_column_if_missing(cursor, rollup, metric, "BIGINT NOT NULL DEFAULT 0")
+        if spec.get("distinct"):
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {rollup}_distinct (
+                    entity VARCHAR({MAX_VALUE_LENGTH}) NOT NULL,
+                    column_name VARCHAR(64) NOT NULL,
+                    value_hash BINARY(20) NOT NULL,
+                    last_seen DATETIME NOT NULL,
+                    PRIMARY KEY (entity, column_name, value_hash),
+                    INDEX idx_last_seen (last_seen)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+        if created and registered and registered[0]:
+            _fold_entities(cursor, table, time_column, {entity: spec}, *folded_sql(table, registered[0]))
+            print(f"📦 Backfilled {rollup} from {registered[0]} existing row(s).")
+
+
+def _fold_entities(cursor, table, time_column, entities, where, params):
+    """Add the rows matching `where` to the entity rollups."""
+    for entity, spec in entities.items():
+        rollup = _entity_rollup(table, entity)
+        source = spec.get("source", table)
+        metrics = _entity_metrics(spec)
+        condition = f"({where}) AND {entity} IS NOT NULL AND {time_column} IS NOT NULL"
+        sums = ", ".join(f"COALESCE(SUM({expr}), 0)" for expr in metrics.values())
+        updates = ", ".join(f"{m} = {m} + VALUES({m})" for m in metrics)
+        for granularity, fmt in ENTITY_BUCKETS.items():
+            bucket = f"DATE_FORMAT({time_column}, '{fmt}')".replace("%", "%%")
+            cursor.execute(
+                f"INSERT INTO {rollup} (entity, granularity, bucket, {', '.join(metrics)}) "
+                f"SELECT LEFT({entity}, {MAX_VALUE_LENGTH}), %s, {bucket}, {sums} "
+                f"FROM {source} WHERE {condition} GROUP BY 1, 3 "
+                f"ON DUPLICATE KEY UPDATE {updates}",
+                (granularity,) + tuple(params)
+            )
+        for column in spec.get("distinct", []):
+            cursor.execute(
+                f"INSERT INTO {rollup}_distinct (entity, column_name, value_hash, last_seen) "
+                f"SELECT LEFT({entity}, {MAX_VALUE_LENGTH}), %s, UNHEX(SHA1({column})), MAX({time_column}) "
+                f"FROM {source} WHERE {condition} AND {column} IS NOT NULL GROUP BY 1, 3 "
+                f"ON DUPLICATE KEY UPDATE last_seen = GREATEST(last_seen, VALUES(last_seen))",
+                (column,) + tuple(params)
+            )
+
+
+def _fold(cursor, table, columns, time_column, entities, where, params):
+    """Add the rows matching `where` to every rollup of `table`."""
+    bucket = _bucket_sql(time_column)
+    params = tuple(params)
+    for column in columns:
+        cursor.execute(
+            f"INSERT INTO {SUMMARY_TABLE} (source, column_name, value, bucket, count) "
+            f"SELECT %s, %s, {_value_sql(column)}, {bucket}, COUNT(*) FROM {table} "
+            f"WHERE {where} GROUP BY 3, 4 "
+            f"ON DUPLICATE KEY UPDATE count = count + VALUES(count)",
+            (table, column) + params
+        )
+        cursor.execute(
+            f"INSERT INTO {TOTALS_TABLE} (source, column_name, value, count) "
+            f"SELECT %s, %s, {_value_sql(column)}, COUNT(*) FROM {table} "
+            f"WHERE {where} GROUP BY 3 "
+            f"ON DUPLICATE KEY UPDATE count = count + VALUES(count)",
+            (table, column) + params
+        )
+    cursor.execute(
+        f"INSERT INTO {SUMMARY_TABLE} (source, column_name, value, bucket, count) "
+        f"SELECT %s, %s, '', {bucket}, COUNT(*) FROM {table} "
+        f"WHERE {where} GROUP BY 4 "
+        f"ON DUPLICATE KEY UPDATE count = count + VALUES(count)",
+        (table, ALL_ROWS) + params
+    )
+    _fold_entities(cursor, table, time_column, entities, where, params)
+
+
+def _ranges_sql(ranges):
+    """(SQL, params) matching ids inside any of the (first, last) `ranges`."""
+    return " OR ".join(["id BETWEEN %s AND %s"] * len(ranges)), [i for r in ranges for i in r]
+
+
+def folded_sql(table, last_id):
+    """(SQL, params) matching the rows of `table` already in its rollups: at or below the
+    watermark and outside every open gap."""
+    return (f"id <= %s AND NOT EXISTS (SELECT 1 FROM {GAPS_TABLE} g "
+            f"WHERE g.source = %s AND id BETWEEN g.first_id AND g.last_id)", (last_id, table))
+
+
+def id_gaps(after, upto, ids):
+    """(first, last) ranges of the ids in after < id <= upto missing from the sorted `ids`."""
+    gaps, expected = [], after + 1
+    for i in ids:
+        if i > expected:
+            gaps.append((expected, i - 1))
+        expected = i + 1
+    if expected <= upto:
+        gaps.append((expected, upto))
+    return gaps
+
+
+def plan_refresh(last_id, upto, new_ids, gaps, gap_ids):
+    """What one refresh folds in: (id ranges to fold, gaps closed, gaps opened).
+
+    `new_ids` are the ids now committed in last_id < id <= upto, `gaps` the
+    open (first, last, found_at) ranges and `gap_ids` the ids now committed
+    inside them, both sorted. Missing ids become gaps (found_at None = now); a gap whose
+    rows showed up is folded whole and replaced by what is still missing.
+    """
+    fold = [(last_id + 1, upto)] if new_ids else []
+    closed = []
+    opened = [(first, last, None) for first, last in id_gaps(last_id, upto, new_ids)]
+    for first, last, found_at in gaps:
+        found = gap_ids[bisect_left(gap_ids, first):bisect_right(gap_ids, last)]
+        if found:
+            fold.append((first, last))
+            closed.append((first, last, found_at))
+            opened.extend((a, b, found_at) for a, b in id_gaps(first - 1, last, found))
+    return fold, closed, opened
+
+
+def refresh_summaries(conn, table, columns, time_column, entities=None, chunk_rows=REFRESH_CHUNK_ROWS):
+    """Add rows of `table` not yet in its rollups to them and its row count; returns rows folded in.
+
+    The first refresh of a table backfills everything already in it,
+    `chunk_rows` per transaction. Several writers may insert while this
+    runs: ids that are missing when the watermark passes them (a writer's
+    transaction still open, or ids burnt by INSERT IGNORE) are kept as
+    gaps, and rows that commit into a gap later are folded by a later
+    refresh. Gaps older than GAP_RETENTION are given up; reconcile_counts()
+    repairs anything that arrives after that. Every statement of a chunk
+    reads the same id ranges, share-locked first, so the count and the
+    rollups agree. Concurrent refreshes of the same table queue on its
+    registry row.
+    """
+    cursor = conn.cursor()
+    folded = 0
+    try:
+        cursor.execute(
+            f"INSERT IGNORE INTO {REGISTRY_TABLE} (source, time_column, last_id, row_count) VALUES (%s, %s, 0, 0)",
+            (table, time_column)
+        )
+        cursor.execute(f"SELECT MAX(id) FROM {table}")
+        max_id = cursor.fetchone()[0] or 0
+        conn.commit()       # ends the read view: later reads must not predate the locks below
+        first_chunk = True
+        while True:
+            _, last_id = _lock_source(cursor, table)
+            gaps, gap_ids = [], []
+            if first_chunk:
+                cursor.execute(f"DELETE FROM {GAPS_TABLE} WHERE source = %s AND found_at < %s",
+                               (table, _utcnow() - GAP_RETENTION))
+                cursor.execute(f"SELECT first_id, last_id, found_at FROM {GAPS_TABLE} WHERE source = %s "
+                               f"ORDER BY first_id", (table,))
+                gaps = cursor.fetchall()
+                if gaps:
+                    cursor.execute(
+                        f"SELECT t.id FROM {table} t JOIN {GAPS_TABLE} g ON g.source = %s "
+                        f"AND t.id BETWEEN g.first_id AND g.last_id ORDER BY t.id LOCK IN SHARE MODE",
+                        (table,)
+                    )
+                    gap_ids = [row[0] for row in cursor.fetchall()]
+            # Share-locking the new ids waits out writers still inserting below max_id and keeps
+            # new rows out of the range until commit, so every fold below sees exactly these rows
+            cursor.execute(
+                f"SELECT id FROM {table} WHERE id > %s AND id <= %s ORDER BY id LIMIT %s LOCK IN SHARE MODE",
+                (last_id, max(max_id, last_id), chunk_rows)
+            )
+            new_ids = [row[0] for row in cursor.fetchall()]
+            upto = new_ids[-1] if len(new_ids) == chunk_rows else max(max_id, last_id)
+            fold, closed, opened = plan_refresh(last_id, upto, new_ids, gaps, gap_ids)
+            if fold:
+                where, params = _ranges_sql(fold)
+                _fold(cursor, table, columns, time_column, entities or {}, where, params)
+            for first, _, _ in closed:
+                cursor.execute(f"DELETE FROM {GAPS_TABLE} WHERE source = %s AND first_id = %s", (table, first))
+            if opened:
+                now = _utcnow()
+                cursor.executemany(
+                    f"INSERT INTO {GAPS_TABLE} (source, first_id, last_id, found_at) VALUES (%s, %s, %s, %s)",
+                    [(table, first, last, found_at or now) for first, last, found_at in opened]
+                )
+            rows = len(new_ids) + len(gap_ids)
+            cursor.execute(
+                f"UPDATE {REGISTRY_TABLE} SET last_id = %s, row_count = row_count + %s, time_column = %s, "
+                f"data_version = data_version + %s WHERE source = %s",
+                (upto, rows, time_column, int(rows > 0), table)
+            )
+            conn.commit()
+            folded += rows
+            first_chunk = False
+            if upto >= max_id:
+                return folded
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _subtract(cursor, table, columns, time_column, where, params):
+    """Take the rows matching `where` out of the rollups (they are about to be deleted)."""
+    bucket = _bucket_sql(time_column)
+    for column in columns + [ALL_ROWS]:
+        value = "''" if column == ALL_ROWS else _value_sql(column)
+        cursor.execute(
+            f"UPDATE {SUMMARY_TABLE} s JOIN ("
+            f"SELECT {value} AS value, {bucket} AS bucket, COUNT(*) AS n FROM {table} WHERE {where} GROUP BY 1, 2"
+            f") d ON s.source = %s AND s.column_name = %s AND s.value = d.value AND s.bucket = d.bucket "
+            f"SET s.count = s.count - d.n",
+            params + (table, column)
+        )
+        if column == ALL_ROWS:
+            continue
+        cursor.execute(
+            f"UPDATE {TOTALS_TABLE} t JOIN ("
+            f"SELECT {value} AS value, COUNT(*) AS n FROM {table} WHERE {where} GROUP BY 1"
+            f") d ON t.source = %s AND t.column_name = %s AND t.value = d.value "
+            f"SET t.count = t.count - d.n",
+            params + (table, column)
+        )
+
+
+def _subtract_entities(cursor, table, time_column, entities, where, params):
+    """Take the rows matching `where` out of the entity rollups."""
+    for entity, spec in entities.items():
+        rollup = _entity_rollup(table, entity)
+        if not table_exists(cursor, rollup):
+            continue
+        metrics = _entity_metrics(spec)
+        sums = ", ".join(f"COALESCE(SUM({expr}), 0) AS {m}" for m, expr in metrics.items())
+        for granularity, fmt in ENTITY_BUCKETS.items():
+            bucket = f"DATE_FORMAT({time_column}, '{fmt}')".replace("%", "%%")
+            cursor.execute(
+                f"UPDATE {rollup} r JOIN ("
+                f"SELECT LEFT({entity}, {MAX_VALUE_LENGTH}) AS entity, {bucket} AS bucket, {sums} "
+                f"FROM {spec.get('source', table)} WHERE {where} AND {entity} IS NOT NULL "
+                f"AND {time_column} IS NOT NULL GROUP BY 1, 2"
+                f") d ON r.entity = d.entity AND r.granularity = %s AND r.bucket = d.bucket "
+                f"SET {', '.join(f'r.{m} = r.{m} - d.{m}' for m in metrics)}",
+                params + (granularity,)
+            )
+        cursor.execute(f"DELETE FROM {rollup} WHERE events = 0")
+
+
+def _trim_distinct(cursor, table, entities, cutoff):
+    """Forget distinct values last seen before `cutoff`: their rows are gone."""
+    for entity, spec in entities.items():
+        rollup = _entity_rollup(table, entity)
+        if spec.get("distinct") and table_exists(cursor, f"{rollup}_distinct"):
+            cursor.execute(f"DELETE FROM {rollup}_distinct WHERE last_seen < %s", (cutoff,))
+
+
+def purge_before(conn, table, cutoff, chunk_rows=PURGE_CHUNK_ROWS, entities=None):
+    """Delete rows of `table` older than `cutoff` (UTC), keeping rollups and row count in step.
+
+    Only rows already folded into the rollups are deleted, `chunk_rows`
+    per transaction. `entities` is the loader's ENTITY_ROLLUPS, whose
+    buckets are decremented too. Returns the number of rows deleted.
+    """
+    cursor = conn.cursor()
+    deleted = 0
+    try:
+        while True:
+            source = _lock_source(cursor, table)
+            if source is None:
+                conn.rollback()
+                raise ValueError(f"'{table}' has no rollups yet; run its loader first")
+            time_column, last_id = source
+            folded, folded_params = folded_sql(table, last_id)
+            cursor.execute(
+                f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE {time_column} < %s AND {folded} "
+                f"ORDER BY id LIMIT %s) chunk",
+                (cutoff,) + folded_params + (chunk_rows,)
+            )
+            upto = cursor.fetchone()[0]
+            if upto is None:
+                _trim_distinct(cursor, table, entities or {}, cutoff)
+                conn.commit()
+                return deleted
+            # Rows in open gaps are not in the rollups yet: leave them for after their fold
+            folded, folded_params = folded_sql(table, upto)
+            where, params = f"{time_column} < %s AND {folded}", (cutoff,) + folded_params
+            _subtract(cursor, table, _summary_columns(cursor, table), time_column, where, params)
+            _subtract_entities(cursor, table, time_column, entities or {}, where, params)
+            cursor.execute(f"DELETE FROM {table} WHERE {where}", params)
+            removed = cursor.rowcount
+            cursor.execute(f"UPDATE {REGISTRY_TABLE} SET row_count = GREATEST(row_count, %s) - %s, "
+                           f"data_version = data_version + 1 WHERE source = %s", (removed, removed, table))
+            for rollup in (SUMMARY_TABLE, TOTALS_TABLE):
+                cursor.execute(f"DELETE FROM {rollup} WHERE source = %s AND count = 0", (table,))
+            conn.commit()
+            deleted += removed
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _rollups_drifted(cursor, table, columns, time_column, entities, folded, params):
+    """Names of the rollups of `table` that disagree with a recount of the folded rows."""
+    drifted = []
+    for column in columns:
+        cursor.execute(f"SELECT {_value_sql(column)}, COUNT(*) FROM {table} WHERE {folded} GROUP BY 1", params)
+        exact = dict(cursor.fetchall())
+        cursor.execute(f"SELECT value, count FROM {TOTALS_TABLE} WHERE source = %s AND column_name = %s",
+                       (table, column))
+        if dict(cursor.fetchall()) != exact:
+            drifted.append(column)
+    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {folded}", params)
+    exact = cursor.fetchone()[0]
+    cursor.execute(f"SELECT COALESCE(SUM(count), 0) FROM {SUMMARY_TABLE} WHERE source = %s AND column_name = %s",
+                   (table, ALL_ROWS))
+    if cursor.fetchone()[0] != exact:
+        drifted.append(ALL_ROWS)
+    for entity, spec in entities.items():
+        rollup = _entity_rollup(table, entity)
+        cursor.execute(f"SELECT COUNT(*) FROM {spec.get('source', table)} WHERE ({folded}) "
+                       f"AND {entity} IS NOT NULL AND {time_column} IS NOT NULL", params)
+        exact = cursor.fetchone()[0]
+        cursor.execute(f"SELECT COALESCE(SUM(events), 0) FROM {rollup} WHERE granularity = 'hour'")
+        if cursor.fetchone()[0] != exact:
+            drifted.append(rollup)
+    return drifted
+
+
+def _rebuild(cursor, table, columns, time_column, entities, folded, params):
+    """Replace every rollup of `table` with a fresh fold of its folded rows."""
+    for rollup in (SUMMARY_TABLE, TOTALS_TABLE):
+        cursor.execute(f"DELETE FROM {rollup} WHERE source = %s", (table,))
+    for entity, spec in entities.items():
+        rollup = _entity_rollup(table, entity)
+        cursor.execute(f"DELETE FROM {rollup}")
+        if spec.get("distinct"):
+            cursor.execute(f"DELETE FROM {rollup}_distinct")
+    _fold(cursor, table, columns, time_column, entities, folded, params)
+
+
+def reconcile_counts(conn, table, columns=None, entities=None):
+    """Recount `table` and repair its row count and rollups; returns (old, exact) row counts or None.
+
+    Counts the rows already folded in (up to the watermark, outside open
+    gaps), so loads in flight do not show up as drift. The value totals,
+    the '*' buckets and the entity rollups (`entities`, the loader's
+    ENTITY_ROLLUPS) are checked against the same rows; if any disagree,
+    all rollups of `table` are rebuilt from them. `columns` defaults to
+    the summary columns already in the rollups. Call it between
+    transactions: it sets the isolation level of the one it starts.
+    """
+    cursor = conn.cursor()
+    try:
+        # No gap locks: writers keep inserting above the watermark while the table is recounted.
+        # Rows at or below it only change under the registry lock held here (refresh, purge).
+        # First statement: MySQL refuses it once a transaction is open
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+        entities = {entity: spec for entity, spec in (entities or {}).items()
+                    if table_exists(cursor, _entity_rollup(table, entity))}
+        source = _lock_source(cursor, table)
+        if source is None:
+            conn.rollback()
+            return None
+        time_column, last_id = source
+        columns = columns or _summary_columns(cursor, table)
+        folded, params = folded_sql(table, last_id)
+        cursor.execute(f"SELECT row_count FROM {REGISTRY_TABLE} WHERE source = %s", (table,))
+        old = cursor.fetchone()[0]
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {folded}", params)
+        exact = cursor.fetchone()[0]
+        drifted = _rollups_drifted(cursor, table, columns, time_column, entities, folded, params)
+        if drifted:
+            _rebuild(cursor, table, columns, time_column, entities, folded, params)
+        changed = old != exact or bool(drifted)
+        cursor.execute(f"UPDATE {REGISTRY_TABLE} SET row_count = %s, reconciled_at = UTC_TIMESTAMP(), "
+                       f"data_version = data_version + %s WHERE source = %s", (exact, int(changed), table))
+        conn.commit()
+        if old != exact:
+            print(f"🧮 {table}: row count corrected from {old} to {exact}.")
+        if drifted:
+            print(f"🧮 {table}: rollups rebuilt ({', '.join(drifted)} had drifted).")
+        return old, exact
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def main(argv=sys.argv[1:]):
+    from ingest.receiver import SOURCES, load_loader
+
+    if not argv or argv[0] not in ("reconcile", "purge") or (argv[0] == "purge" and len(argv) < 2):
+        sys.exit(__doc__.split("\n\n")[-1])
+    command, args = argv[0], argv[1:]
+    if command == "purge":
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=float(args[0]))
+        args = args[1:]
+    for name in args or SOURCES:
+        loader = load_loader(name)
+        table = getattr(loader, "TABLE_NAME", None) or loader.TABLE
+        conn = loader.connect_for_insert()
+        try:
+            if command == "reconcile":
+                result = reconcile_counts(conn, table, getattr(loader, "SUMMARY_COLUMNS", None),
+                                          getattr(loader, "ENTITY_ROLLUPS", {}))
+                print(f"{table}: {'no rollups yet' if result is None else f'{result[1]} rows'}")
+            else:
+                deleted = purge_before(conn, table, cutoff, entities=getattr(loader, "ENTITY_ROLLUPS", {}))
+                print(f"{table}: deleted {deleted} rows older than {cutoff:%Y-%m-%d %H:%M} UTC")
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+def table_exists(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, index_name):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index_name)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def constraint_exists(cursor, table, constraint_name):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.TABLE_CONSTRAINTS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = %s",
+        (table, constraint_name)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def add_column_if_missing(cursor, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless it is already there. Returns True if added."""
+    if column_exists(cursor, table, column):
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+
+def add_index_if_missing(cursor, table, index_name, columns, unique=False):
+    """Create an index unless one with that name exists. Returns True if created."""
+    if index_exists(cursor, table, index_name):
+        return False
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    cursor.execute(f"CREATE {kind} {index_name} ON {table} ({', '.join(columns)})")
+    return True
+
+
+def add_fulltext_index_if_missing(cursor, table, index_name, columns):
+    """Create an n-gram FULLTEXT index unless one with that name exists. Returns True if created.
+
+    The ngram parser indexes every 2-character slice, so a quoted phrase
+    search finds substrings (IPs, paths, ids) that word tokenising would
+    miss. Stopwords are switched off for the build, otherwise slices such
+    as 'at' or 'is' would be left out of the index.
+    """
+    if index_exists(cursor, table, index_name):
+        return False
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    cursor.execute(f"CREATE FULLTEXT INDEX {index_name} ON {table} ({', '.join(columns)}) WITH PARSER ngram")
+    return True
+
+
+def column_type(cursor, table, column):
+    cursor.execute(
+        "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    value = row[0]
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode()
+    return value.lower()
+
+
+def convert_to_datetime(cursor, table, column, expression, index_name):
+    """Migrate a string timestamp column to an indexed DATETIME in place.
+
+    ``expression`` is SQL over the old value that yields a DATETIME (or NULL
+    for anything unparseable). Values are rewritten as ISO text first so the
+    final MODIFY is a plain cast and the column keeps its position.
+    """
+    if column_type(cursor, table, column) not in (None, "datetime"):
+        cursor.execute(f"UPDATE {table} SET {column} = DATE_FORMAT({expression}, '%Y-%m-%d %H:%i:%s')")
+        cursor.execute(f"ALTER TABLE {table} MODIFY COLUMN {column} DATETIME")
+        print(f"🕒 Converted {table}.{column} to DATETIME.")
+    add_index_if_missing(cursor, table, index_name, [column])
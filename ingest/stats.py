@@ -0,0 +1,124 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource          # Unix only
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in KiB everywhere else
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class IngestStats:
+    """Running counters for one ingest run (rows, batches, throughput, memory).
+
+    ``timings`` accumulates seconds per phase. Reads record 'read' or
+    'decompress' themselves; timing() and timed() record everything else and
+    leave out time already charged to a phase inside them (I/O, nested
+    timers), so phases never double count. Counters may be updated from
+    several threads (pipelined writers); phases then overlap in wall time.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.rows = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.batches = 0
+        self.timings = {}
+        self.started = time.perf_counter()
+        self.finished = None
+        self._lock = threading.Lock()
+        self._thread = threading.local()   # time charged by the current thread
+
+    def add_batch(self, row_count, duplicate_count=0):
+        with self._lock:
+            self.rows += row_count
+            self.duplicates += duplicate_count
+            self.batches += 1
+
+    def add_rejected(self, count=1):
+        """Count input records that could not be parsed into rows."""
+        with self._lock:
+            self.rejected += count
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        self._thread.charged = self._charged() + seconds
+
+    def _charged(self):
+        return getattr(self._thread, "charged", 0.0)
+
+    @contextmanager
+    def timing(self, phase):
+        charged_before = self._charged()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            charged_inside = self._charged() - charged_before
+            self.add_time(phase, time.perf_counter() - started - charged_inside)
+
+    def timed(self, iterable, phase):
+        """Yield from `iterable`, charging the time spent producing items to `phase`."""
+        iterator = iter(iterable)
+        while True:
+            with self.timing(phase):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "source": self.source,
+            "rows": self.rows,
+            "duplicates_skipped": self.duplicates,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "elapsed_sec": round(self.elapsed, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "peak_rss_mb": round(peak_rss_mb() or 0.0, 1),
+            "timings_sec": {phase: round(sec, 3) for phase, sec in self.timings.items()},
+        }
+
+    def summary(self):
+        s = self.as_dict()
+        line = (f"📊 {s['source']}: {s['rows']} rows in {s['batches']} batches, "
+                f"{s['elapsed_sec']}s ({s['rows_per_sec']} rows/sec), "
+                f"peak RSS {s['peak_rss_mb']} MB")
+        if self.duplicates:
+            line += f", {self.duplicates} duplicates skipped"
+        if self.rejected:
+            line += f", {self.rejected} rejected"
+        if self.timings:
+            line += " | " + ", ".join(f"{phase} {sec}s" for phase, sec in s["timings_sec"].items())
+        return line
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+MONTHS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+
+
+@lru_cache(maxsize=65536)
+def parse_apache_timestamp(text):
+    """'22/Jan/2019:03:56:14 +0330' → naive UTC datetime, or None if malformed.
+
+    Cached because every request within the same second repeats the string.
+    Month names are matched directly, so the result does not depend on locale.
+    """
+    if (len(text) != 26 or text[2] != "/" or text[6] != "/" or text[11] != ":"
+            or text[14] != ":" or text[17] != ":" or text[20] != " " or text[21] not in "+-"):
+        return None
+    try:
+        local = datetime(int(text[7:11]), MONTHS[text[3:6]], int(text[0:2]),
+                         int(text[12:14]), int(text[15:17]), int(text[18:20]))
+        offset = timedelta(hours=int(text[22:24]), minutes=int(text[24:26]))
+    except (KeyError, ValueError):
+        return None
+    return local - offset if text[21] == "+" else local + offset
+
+
+def to_pydatetime(value):
+    """pandas Timestamp/NaT → datetime/None so mysql.connector can bind it."""
+    if value is None or value != value:   # NaT is not equal to itself
+        return None
+    return value.to_pydatetime() if hasattr(value, "to_pydatetime") else value
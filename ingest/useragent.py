@@ -0,0 +1,104 @@
+import re
+from functools import lru_cache
+
+from ingest.dimensions import value_hash
+from ingest.schema import add_column_if_missing
+
+UA_CACHE_SIZE = 50_000          # distinct user agents remembered (far fewer than requests)
+
+# Ordered by priority: a Chrome UA also says "Safari", an Edge UA also says "Chrome"
+BROWSER_PATTERNS = [
+    ("edge", r"Edg(?:e|A|iOS)?/"),
+    ("opera", r"OPR/|Opera"),
+    ("samsung", r"SamsungBrowser/"),
+    ("firefox", r"Firefox/|FxiOS/"),
+    ("chrome", r"Chrome/|CriOS/|Chromium/"),
+    ("safari", r"Safari/"),
+    ("ie", r"MSIE |Trident/"),
+    ("cli", r"curl/|[Ww]get/|python-requests|Python-urllib|Go-http-client|Java/|okhttp|libwww-perl"),
+]
+DEVICE_PATTERNS = [
+    ("tablet", r"iPad|Tablet|Kindle|Silk/|Android(?!.*Mobile)"),
+    ("mobile", r"Mobi|iPhone|iPod|Android|Windows Phone|BlackBerry"),
+    ("desktop", r"Windows NT|Macintosh|X11|CrOS"),
+]
+BOT_PATTERN = r"bot|crawler|spider|crawl|slurp|facebookexternalhit|headless|lighthouse|monitor"
+
+BROWSER_FAMILIES = [name for name, _ in BROWSER_PATTERNS] + ["other"]
+DEVICE_CLASSES = ["bot"] + [name for name, _ in DEVICE_PATTERNS] + ["other"]
+
+# Table columns, in the order classify() returns them
+UA_COLUMNS = ["is_bot", "ua_family", "device_class"]
+UA_COLUMN_TYPES = {
+    "is_bot": "BOOLEAN",
+    "ua_family": "ENUM({})".format(", ".join(f"'{f}'" for f in BROWSER_FAMILIES)),
+    "device_class": "ENUM({})".format(", ".join(f"'{d}'" for d in DEVICE_CLASSES)),
+}
+
+
+def _alternation(patterns):
+    return re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns))
+
+
+# Matched against the lower-cased agent: an IGNORECASE alternation is several times slower
+_BOT = re.compile(BOT_PATTERN)
+# One search per family in priority order: each has a literal prefix the regex engine
+# skips ahead to, where a single alternation of all of them is tried at every position
+_BROWSERS = [(name, re.compile(pattern)) for name, pattern in BROWSER_PATTERNS]
+_DEVICE = _alternation(DEVICE_PATTERNS)
+
+
+@lru_cache(maxsize=UA_CACHE_SIZE)
+def classify(user_agent):
+    """Raw User-Agent → (is_bot, ua_family, device_class); None/'-' → (None, None, None)."""
+    if not user_agent or user_agent == "-":
+        return (None, None, None)
+    family = next((name for name, pattern in _BROWSERS if pattern.search(user_agent)), "other")
+    if _BOT.search(user_agent.lower()):
+        return (True, family, "bot")
+    device = _DEVICE.search(user_agent)
+    return (False, family, device.lastgroup if device else "other")
+
+
+def classifier(ua_position):
+    """BulkWriter `prepare` step appending classify() of the row's user agent."""
+    def classify_rows(rows):
+        return [tuple(row) + classify(row[ua_position]) for row in rows]
+
+    return classify_rows
+
+
+def ensure_user_agent_columns(cursor, table, ua_sql, joins=""):
+    """Add the classification columns to `table`; on first add, label the rows already there.
+
+    Each distinct agent is classified once in Python and applied with a
+    single UPDATE through a temporary lookup table. `ua_sql` is the SQL
+    expression for the raw agent over alias ``l`` plus `joins`.
+    """
+    added = [column for column, definition in UA_COLUMN_TYPES.items()
+             if add_column_if_missing(cursor, table, column, definition)]
+    if not added:
+        return 0
+    cursor.execute(f"SELECT DISTINCT {ua_sql} FROM {table} l {joins} WHERE {ua_sql} IS NOT NULL")
+    labels = []
+    for (agent,) in cursor.fetchall():
+        agent = agent.decode("utf-8") if isinstance(agent, (bytes, bytearray)) else agent
+        if classify(agent)[0] is not None:
+            labels.append((value_hash(agent),) + classify(agent))
+    if not labels:
+        return 0
+    cursor.execute(f"""
+        CREATE TEMPORARY TABLE ua_labels (
+            value_hash CHAR(40) PRIMARY KEY,
+            {", ".join(f"{c} {UA_COLUMN_TYPES[c]}" for c in UA_COLUMNS)}
+        )
+    """)
+    cursor.executemany(f"INSERT IGNORE INTO ua_labels VALUES ({', '.join(['%s'] * (len(UA_COLUMNS) + 1))})", labels)
+    cursor.execute(
+        f"UPDATE {table} l {joins} JOIN ua_labels t ON t.value_hash = SHA1({ua_sql}) "
+        f"SET {', '.join(f'l.{c} = t.{c}' for c in UA_COLUMNS)}"
+    )
+    updated = cursor.rowcount
+    cursor.execute("DROP TEMPORARY TABLE ua_labels")
+    print(f"🤖 Classified {len(labels)} user agents on {updated} existing row(s) of '{table}'.")
+    return updated
@@ -1,4 +1,5 @@
 # config.py
+import os
 
 class Config:
     MYSQL_HOST = "localhost"
@@ -7,13 +8,23 @@ class Config:
     MYSQL_DB = "siem"
     MYSQL_PORT = 3306
 
-import mysql.connector
+    # One connection pool per dashboard process (db_utils/connection.py)
+    DB_POOL_SIZE = 8                    # connections kept open at most
+    DB_POOL_TIMEOUT = 10                # seconds a request waits for a free connection
+    DB_POOL_HEALTH_CHECK_AFTER = 30     # ping connections idle longer than this before reuse
+
+    # Dashboard query-result cache (db_utils/cache.py); results also go stale when a loader
+    # bumps the table's data version. QUERY_CACHE_TTL = 0 turns the cache off
+    QUERY_CACHE_TTL = 30                # seconds a result is served at most
+    QUERY_CACHE_SIZE = 512              # results kept, least recently used dropped first
+    QUERY_CACHE_VERSION_CHECK = 2       # seconds between reads of the tables' data versions
+
+    # Parquet archive written by the loaders (ARCHIVE_MODE); ML loaders read it instead of MySQL
+    USE_PARQUET_ARCHIVE = False
+    ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archive")
+    ARCHIVE_LOOKBACK_DAYS = None    # e.g. 30 → only the last 30 days of partitions are read
 
 def get_db_connection():
-    return mysql.connector.connect(
-        host=Config.MYSQL_HOST,
-        user=Config.MYSQL_USER,
-        password=Config.MYSQL_PASSWORD,
-        database=Config.MYSQL_DB,
-        port=Config.MYSQL_PORT
-    )
+    # Pooled; imported here because db_utils.connection itself imports Config
+    from db_utils.connection import get_pool
+    return get_pool().get_connection()
@@ -0,0 +1,57 @@
+import os
+from datetime import datetime, timedelta
+
+from config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:           # optional: pip install pyarrow
+    pa = ds = None
+
+# table → (timestamp column, columns identifying a row)
+ARCHIVE_TABLES = {
+    "server_access_logs": ("log_timestamp", ["row_hash"]),
+    "login_log_data": ("login_timestamp", ["row_hash"]),
+    "antivirus_logs": ("timestamp", ["log_id"]),
+    "rdp_events": ("ts", ["session_id", "ts"]),
+}
+
+
+def archive_available(table_name):
+    """True if the ML loaders should read `table_name` from the Parquet archive."""
+    return (Config.USE_PARQUET_ARCHIVE and ds is not None
+            and os.path.isdir(os.path.join(Config.ARCHIVE_DIR, table_name)))
+
+
+def read_archive(table_name, columns, start=None, end=None):
+    """DataFrame of `columns` from the archive, limited to timestamps in [start, end).
+
+    Only the requested columns are decoded and only the day partitions that
+    overlap the range are opened. Without `start`, Config.ARCHIVE_LOOKBACK_DAYS
+    applies. Rows archived twice (a file ingested again) are returned once.
+    """
+    time_column, key = ARCHIVE_TABLES[table_name]
+    if start is None and Config.ARCHIVE_LOOKBACK_DAYS:
+        start = datetime.utcnow() - timedelta(days=Config.ARCHIVE_LOOKBACK_DAYS)
+
+    path = os.path.join(Config.ARCHIVE_DIR, table_name)
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+    if any(column not in dataset.schema.names for column in columns):
+        # Columns added to a source later: merge every file's schema, older files read as null
+        schema = pa.unify_schemas([fragment.physical_schema for fragment in dataset.get_fragments()]
+                                  + [partitioning.schema])
+        dataset = ds.dataset(path, format="parquet", partitioning=partitioning, schema=schema)
+    condition = None
+    if start is not None:
+        condition = ((ds.field("date") >= start.strftime("%Y-%m-%d"))
+                     & (ds.field(time_column) >= pa.scalar(start, pa.timestamp("us"))))
+    if end is not None:
+        before_end = ((ds.field("date") <= end.strftime("%Y-%m-%d"))
+                      & (ds.field(time_column) < pa.scalar(end, pa.timestamp("us"))))
+        condition = before_end if condition is None else condition & before_end
+
+    wanted = list(dict.fromkeys(list(columns) + key))
+    df = dataset.to_table(columns=wanted, filter=condition).to_pandas()
+    return df.drop_duplicates(subset=key)[list(columns)].reset_index(drop=True)
@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+from mysql.connector import Error
+from db_utils.connection import get_pool
+
+_MISSING = object()
+
+
+class QueryCache:
+    """Process-wide LRU of query results keyed by (table, query shape, params).
+
+    An entry is served while it is younger than ``ttl`` seconds and was
+    computed under the table's current data version (log_sources.data_version,
+    bumped by the loaders whenever rows or rollups change). At most
+    ``max_entries`` results are kept; the least recently used go first.
+    Concurrent misses on one key run the query once and share the result.
+    Cached results are shared between requests: treat them as read-only.
+    """
+
+    def __init__(self, max_entries, ttl, version_check_interval):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.entries = OrderedDict()        # key → (result, data version, expires at)
+        self.inflight = {}                  # key → Event set when its query finishes
+        self.lock = threading.Lock()
+        self.versions = {}
+        self.versions_checked = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.invalidated = 0
+        self.evictions = 0
+
+    def data_version(self, table_name):
+        """The table's data version (all tables' for None); None if the loaders keep none yet.
+
+        Read from the registry at most every ``version_check_interval`` seconds.
+        """
+        now = time.monotonic()
+        with self.lock:
+            fresh = self.versions_checked is not None and now - self.versions_checked < self.version_check_interval
+            versions = self.versions
+        if not fresh:
+            versions = self._read_versions()
+            with self.lock:
+                self.versions, self.versions_checked = versions, now
+        if versions is None:
+            return None
+        if table_name is None:
+            return tuple(sorted(versions.items()))
+        return versions.get(table_name)
+
+    @staticmethod
+    def _read_versions():
+        conn = cursor = None
+        try:
+            conn = get_pool().get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT source, data_version FROM log_sources")
+            return dict(cursor.fetchall())
+        except Error:
+            return None         # registry (or its data_version column) not created yet: TTL only
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if conn is not None:
+                conn.close()
+
+    def _lookup(self, key, version, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return _MISSING
+        result, entry_version, expires_at = entry
+        if entry_version != version:
+            self.invalidated += 1
+        elif now >= expires_at:
+            self.expired += 1
+        else:
+            self.entries.move_to_end(key)
+            return result
+        del self.entries[key]
+        return _MISSING
+
+    def get_or_compute(self, table_name, shape, params, compute):
+        """Cached result of `compute()` for (table_name, shape, params); errors are raised, not cached.
+
+        `table_name` None means the result depends on every table.
+        """
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return compute()
+        key = (table_name, shape, params)
+        version = self.data_version(table_name)
+        while True:
+            with self.lock:
+                result = self._lookup(key, version, time.monotonic())
+                if result is not _MISSING:
+                    self.hits += 1
+                    return result
+                running = self.inflight.get(key)
+                if running is None:
+                    self.misses += 1
+                    running = self.inflight[key] = threading.Event()
+                    break
+                self.coalesced += 1
+            # Another request is running this query: wait for it, then look again
+            running.wait(Config.DB_POOL_TIMEOUT)
+        try:
+            result = compute()
+            with self.lock:
+                self.entries[key] = (result, version, time.monotonic() + self.ttl)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+            return result
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            running.set()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.versions_checked = None
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self.entries), "max_entries": self.max_entries, "ttl_s": self.ttl,
+                    "hits": self.hits, "misses": self.misses, "coalesced_waits": self.coalesced,
+                    "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                    "expired": self.expired, "invalidated": self.invalidated, "evictions": self.evictions,
+                    "data_versions": dict(self.versions or {})}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache(Config.QUERY_CACHE_SIZE, Config.QUERY_CACHE_TTL,
+                                Config.QUERY_CACHE_VERSION_CHECK)
+        return _cache
@@ -1,19 +1,167 @@
+import threading
+import time
+from collections import deque
+
 from config import Config
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+
+class PooledConnection:
+    """A pooled MySQL connection; close() hands it back to the pool instead of closing it."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise PoolError("connection already returned to the pool")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """Process-wide pool of MySQL connections shared by every route and ML loader.
+
+    At most ``size`` connections exist; a checkout waits up to ``timeout``
+    seconds for one to come back and then raises PoolError. Connections
+    idle for longer than ``health_check_after`` seconds are pinged before
+    being handed out and replaced if dead. ``stats()`` reports checkout
+    latency (time from asking to holding a working connection).
+    """
+
+    def __init__(self, size, timeout, health_check_after, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.connect_args = connect_args
+        self.idle = []                       # (connection, returned at); last in, first out
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.checkouts = 0
+        self.in_use = 0
+        self.created = 0
+        self.replaced = 0
+        self.timeouts = 0
+
+    def _healthy(self, conn, idle_since):
+        if time.monotonic() - idle_since < self.health_check_after:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def get_connection(self):
+        started = time.perf_counter()
+        if not self.slots.acquire(timeout=self.timeout):
+            with self.lock:
+                self.timeouts += 1
+            raise PoolError(f"no free MySQL connection after {self.timeout}s (pool size {self.size})")
+        try:
+            conn = None
+            while conn is None:
+                with self.lock:
+                    conn, idle_since = self.idle.pop() if self.idle else (None, None)
+                if conn is None:
+                    conn = mysql.connector.connect(**self.connect_args)
+                    with self.lock:
+                        self.created += 1
+                elif not self._healthy(conn, idle_since):
+                    self._discard(conn)
+                    with self.lock:
+                        self.replaced += 1
+                    conn = None
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.latencies.append(time.perf_counter() - started)
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        try:
+            # Hand out a clean session: no open transaction or unread result
+            if conn.is_connected():
+                if conn.unread_result:
+                    conn.consume_results()
+                conn.rollback()
+                with self.lock:
+                    self.idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+        except Error:
+            self._discard(conn)
+        finally:
+            with self.lock:
+                self.in_use -= 1
+            self.slots.release()
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            idle = len(self.idle)
+            counters = {"checkouts": self.checkouts, "created": self.created,
+                        "replaced_unhealthy": self.replaced, "timeouts": self.timeouts}
+            in_use = self.in_use
+
+        def ms(q):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3)
+
+        return dict(counters, size=self.size, in_use=in_use, idle=idle,
+                    checkout_ms_avg=round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+                    checkout_ms_p50=ms(0.5), checkout_ms_p95=ms(0.95), checkout_ms_max=ms(1.0))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                Config.DB_POOL_SIZE, Config.DB_POOL_TIMEOUT, Config.DB_POOL_HEALTH_CHECK_AFTER,
+                host=Config.MYSQL_HOST,
+                user=Config.MYSQL_USER,
+                password=Config.MYSQL_PASSWORD,
+                database=Config.MYSQL_DB,
+                port=Config.MYSQL_PORT
+            )
+        return _pool
 
 
 def get_db_connection():
+    """A connection from the shared pool; close() returns it. None if MySQL is unreachable."""
     try:
-        connection = mysql.connector.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            port=Config.MYSQL_PORT
-        )
-        if connection.is_connected():
-            return connection
+        return get_pool().get_connection()
     except Error as e:
         print(f"[Error] Could not connect to MySQL: {e}")
         return None
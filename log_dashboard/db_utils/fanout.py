@@ -0,0 +1,46 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from config import Config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Threads that run a request's independent queries; one per pooled connection."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.DB_POOL_SIZE, thread_name_prefix="db-fanout")
+        return _executor
+
+
+def _timed(call):
+    started = time.perf_counter()
+    result = call()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def fan_out(**calls):
+    """Run independent zero-argument query calls concurrently: ({name: result}, {name: ms}).
+
+    Each call checks out its own pooled connection, so the wait is about
+    the slowest call instead of the sum. Timings include "total" (wall
+    time of the whole fan-out). An exception from a call is raised once
+    every call has finished. Calls must not fan out themselves.
+    """
+    started = time.perf_counter()
+    futures = {name: get_executor().submit(_timed, call) for name, call in calls.items()}
+    wait(futures.values())
+    results, timings = {}, {}
+    for name, future in futures.items():
+        results[name], timings[name] = future.result()
+    timings["total"] = (time.perf_counter() - started) * 1000
+    return results, timings
+
+
+def server_timing(timings):
+    """Server-Timing header value for `timings` in ms (shown in the browser's network panel)."""
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
@@ -1,62 +1,278 @@
-import mysql.connector
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
 from mysql.connector import Error
+from db_utils.cache import get_query_cache
+from db_utils.connection import get_pool
+
+# Tables whose rows are read through a view (server access text columns may live
+# in dimension tables, see Server_Access_Logs.NORMALIZED_STORAGE)
+READ_SOURCES = {
+    "server_access_logs": "server_access_logs_v",
+}
+
+# Columns of each table's n-gram FULLTEXT index `ft_search` (created by the loaders,
+# see SEARCH_COLUMNS there); also the tables the log explorer may read
+SEARCH_COLUMNS = {
+    "antivirus_logs": ["log_id", "file_path", "malware_type", "severity", "scan_type", "machine_id", "detection_method"],
+    "login_log_data": ["ip_address", "asn"],
+    "rdp_events": ["session_id", "username", "remote_address", "status"],
+    "server_access_logs": ["ip", "method", "url", "referer", "user_agent"],
+}
+
+# The server's ngram_token_size: shorter search terms are not in the FULLTEXT index
+NGRAM_TOKEN_SIZE = 2
+
+# Searched columns whose text may live in a dimension table instead (normalized
+# storage, see Server_Access_Logs.DIMENSIONS): column → dimension table, whose
+# `value` has its own `ft_search` index; rows point at it through `{column}_id`
+SEARCH_DIMENSIONS = {
+    "server_access_logs": {"url": "urls", "referer": "referers", "user_agent": "user_agents"},
+}
 
-DB_CONFIG = {
-    "host": "localhost",
-    "user": "root",
-    "password": "rootroot",
-    "database": "siem"
+# Server-side filters per table: request parameter → column (indexed by the loaders, see FILTER_INDEXES)
+FILTER_COLUMNS = {
+    "antivirus_logs": {"severity": "severity", "malware_type": "malware_type", "machine_id": "machine_id"},
+    "login_log_data": {"status": "login_successful", "ip": "ip_address"},
+    "rdp_events": {"status": "status", "username": "username", "ip": "remote_address"},
+    "server_access_logs": {"status": "status", "method": "method", "ip": "ip"},
+}
+# Column the since/until time range applies to (UTC DATETIME)
+TIME_COLUMNS = {
+    "antivirus_logs": "timestamp",
+    "login_log_data": "login_timestamp",
+    "rdp_events": "ts",
+    "server_access_logs": "log_timestamp",
 }
+LOGIN_STATUS = {"successful": 1, "failed": 0}
+# Home page activity windows: label → how far back from the current hour bucket they reach
+RECENT_WINDOWS = {"1h": timedelta(hours=1), "24h": timedelta(hours=24), "7d": timedelta(days=7)}
 
 def get_connection():
-    return mysql.connector.connect(**DB_CONFIG)
-
-def fetch_logs(table_name, limit=50, offset=0, search=""):
-    try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = f"SELECT * FROM {table_name}"
-        if search:
-            # Search all text columns
-            query += " WHERE CONCAT_WS(' ', " \
-                     "id, log_timestamp, ip, username, session_id, remote_address, method, url, status, size, file_path, malware_type, severity, scan_type) " \
-                     f"LIKE '%{search}%'"
-        query += f" LIMIT {limit} OFFSET {offset}"
-        cursor.execute(query)
-        return cursor.fetchall()
+    """A connection from the shared pool (raises on failure); close() returns it."""
+    return get_pool().get_connection()
+
+def encode_cursor(last_id):
+    """Opaque "Show more" cursor pointing just past the row with id `last_id`."""
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """The id a cursor points past; None for no cursor. Raises ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["id"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return last_id
+
+def _like_pattern(term):
+    """LIKE pattern matching `term` anywhere, with its wildcards escaped."""
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def search_condition(table_name, search):
+    """(SQL, params) matching rows whose indexed text contains `search`; None if there is nothing to match.
+
+    The term is searched as one quoted phrase, which over n-gram tokens
+    means "contains this substring". Run against the base table so views
+    (server_access_logs_v) can use the index too. Terms shorter than an
+    n-gram have no tokens to look up, so they fall back to a LIKE scan of
+    the same columns (on whatever the caller reads from). Columns kept in
+    dimension tables are matched there and joined back through their ids.
+    """
+    phrase = search.replace('"', " ").strip()
+    if not phrase:
+        return None
+    columns = SEARCH_COLUMNS[table_name]
+    if len(phrase) < NGRAM_TOKEN_SIZE:
+        return "(" + " OR ".join(f"{column} LIKE %s" for column in columns) + ")", [_like_pattern(phrase)] * len(columns)
+    conditions = [f"id IN (SELECT id FROM {table_name} "
+                  f"WHERE MATCH({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE))"]
+    for column, dimension in SEARCH_DIMENSIONS.get(table_name, {}).items():
+        conditions.append(f"id IN (SELECT id FROM {table_name} WHERE {column}_id IN "
+                          f"(SELECT id FROM {dimension} WHERE MATCH(value) AGAINST (%s IN BOOLEAN MODE)))")
+    if len(conditions) == 1:
+        return conditions[0], [f'"{phrase}"']
+    return "(" + " OR ".join(conditions) + ")", [f'"{phrase}"'] * len(conditions)
+
+def _filter_value(column, value):
+    if column == "login_successful":
+        if value.lower() not in LOGIN_STATUS:
+            raise ValueError(f"status must be one of {', '.join(LOGIN_STATUS)}")
+        return LOGIN_STATUS[value.lower()]
+    return value
+
+def _utc(value, name):
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date/time, got {value!r}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def filter_conditions(table_name, filters):
+    """(conditions, params) for the known, non-empty filters of `table_name`; raises ValueError on bad values.
+
+    `filters` maps request parameters to values: the names in FILTER_COLUMNS
+    (exact match) plus since/until (inclusive/exclusive ISO times, naive = UTC).
+    Anything else in it is ignored.
+    """
+    conditions, params = [], []
+    for name, column in FILTER_COLUMNS[table_name].items():
+        value = (filters.get(name) or "").strip()
+        if value:
+            conditions.append(f"{column} = %s")
+            params.append(_filter_value(column, value))
+    for name, operator in (("since", ">="), ("until", "<")):
+        value = (filters.get(name) or "").strip()
+        if value:
+            conditions.append(f"{TIME_COLUMNS[table_name]} {operator} %s")
+            params.append(_utc(value, name))
+    return conditions, params
+
+def _run(query, params=(), dictionary=True, one=False):
+    """Rows of `query` (the first row only with `one`) on a pooled connection; raises on MySQL errors."""
+    conn = get_connection()
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=dictionary)
+        cursor.execute(query, params)
+        return cursor.fetchone() if one else cursor.fetchall()
+    finally:
+        if cursor is not None:
+            cursor.close()
+        conn.close()
+
+def fetch_logs(table_name, limit=50, before_id=None, search="", filters=None):
+    """Newest rows first; with `before_id`, only rows older than it (keyset seek on the primary key).
+
+    `filters` are applied in SQL (see filter_conditions); a bad filter
+    value raises ValueError before any query runs. Results are cached
+    per (table, query, params), see db_utils/cache.py.
+    """
+    conditions, params = filter_conditions(table_name, filters or {})
+    query = f"SELECT * FROM {READ_SOURCES.get(table_name, table_name)}"
+    if before_id is not None:
+        conditions.append("id < %s")
+        params.append(before_id)
+    matched = search_condition(table_name, search)
+    if matched:
+        conditions.append(matched[0])
+        params.extend(matched[1])
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id DESC LIMIT %s"
+    params.append(limit)
+    try:
+        return get_query_cache().get_or_compute(table_name, query, tuple(params), lambda: _run(query, params))
     except Error as e:
         print(f"Error: {e}")
         return []
-    finally:
-        cursor.close()
-        conn.close()
+
+def fetch_page(table_name, limit=50, cursor=None, search="", filters=None):
+    """One "Show more" page: (rows, cursor for the next page or None after the last page)."""
+    rows = fetch_logs(table_name, limit=limit, before_id=decode_cursor(cursor), search=search, filters=filters)
+    next_cursor = encode_cursor(rows[-1]["id"]) if len(rows) == limit else None
+    return rows, next_cursor
+
+def _summary_rows(table_name, column_name):
+    try:
+        built = _run("SELECT 1 FROM log_sources WHERE source = %s", (table_name,))
+    except Error:
+        built = []      # rollup tables not created yet
+    if built:
+        return _run(
+            f"SELECT NULLIF(value, '') AS {column_name}, count FROM log_summary_totals "
+            "WHERE source = %s AND column_name = %s ORDER BY value",
+            (table_name, column_name)
+        )
+    return _run(f"SELECT {column_name}, COUNT(*) as count FROM {table_name} GROUP BY {column_name}")
 
 def fetch_summary(table_name, column_name):
+    """Value counts of `column_name`, from the rollups the loaders maintain (O(distinct values)).
+
+    Values come back as text (NULL as None). Until a loader has built the
+    rollups for `table_name` this falls back to a GROUP BY over the table.
+    """
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = f"SELECT {column_name}, COUNT(*) as count FROM {table_name} GROUP BY {column_name}"
-        cursor.execute(query)
-        return cursor.fetchall()
+        return get_query_cache().get_or_compute(table_name, "summary", (column_name,),
+                                                lambda: _summary_rows(table_name, column_name))
     except Error as e:
         print(f"Error: {e}")
         return []
-    finally:
-        cursor.close()
-        conn.close()
+
+def _row_count(table_name):
+    try:
+        registered = _run("SELECT row_count FROM log_sources WHERE source = %s", (table_name,),
+                          dictionary=False, one=True)
+    except Error:
+        registered = None    # registry not created yet
+    if registered is not None:
+        return registered[0]
+    return _run(f"SELECT COUNT(*) FROM {table_name}", dictionary=False, one=True)[0] or 0
 
 def fetch_count(table_name):
     """
-    Returns total number of rows in a table
+    Returns total number of rows in a table, from the row-count registry the
+    loaders maintain (exact COUNT(*) only for tables not registered yet)
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-        return cursor.fetchone()[0] or 0
+        return get_query_cache().get_or_compute(table_name, "count", (), lambda: _row_count(table_name))
     except Error as e:
         print(f"Error fetching count from {table_name}: {e}")
         return 0
+
+def fetch_recent_counts(windows=RECENT_WINDOWS):
+    """{table: {"1h": n, "24h": n, "7d": n}} from the hourly row-count rollups; {} if there are none.
+
+    Windows are whole hour buckets: "1h" is the current hour so far plus
+    the previous one, so figures can run up to an hour long.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    starts = {label: now - hours_back for label, hours_back in windows.items()}
+    sums = ", ".join(f"SUM(IF(bucket >= %s, count, 0)) AS `{label}`" for label in starts)
+    query = (f"SELECT source, {sums} FROM log_summaries "
+             "WHERE column_name = '*' AND bucket >= %s GROUP BY source")
+    params = tuple(starts.values()) + (min(starts.values()),)
+
+    def recent():
+        return {row["source"]: {label: int(row[label] or 0) for label in starts} for row in _run(query, params)}
+
+    try:
+        # Reads every source's buckets, so any table's new data invalidates it
+        return get_query_cache().get_or_compute(None, query, params, recent)
+    except Error as e:
+        print(f"Error fetching recent counts: {e}")
+        return {}
+
+def entity_rollup_query(conn, table_name, entity, metrics, distinct=(), granularity="hour"):
+    """
+    SQL for one row per entity from the loaders' entity rollups (<table>_by_<entity>):
+    its event count, the SUM of each rollup metric, and distinct_<column> counts.
+    None if that rollup table does not exist yet (read the raw rows instead).
+    """
+    rollup = f"{table_name}_by_{entity}"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (rollup,)
+        )
+        if not cursor.fetchone()[0]:
+            return None
     finally:
         cursor.close()
-        conn.close()
+    selects = [f"r.entity AS {entity}", "SUM(r.events) AS events"] + [f"SUM(r.{m}) AS {m}" for m in metrics]
+    joins = []
+    for i, column in enumerate(distinct):
+        selects.append(f"COALESCE(MAX(d{i}.n), 0) AS distinct_{column}")
+        joins.append(
+            f"LEFT JOIN (SELECT entity, COUNT(*) AS n FROM {rollup}_distinct WHERE column_name = '{column}' "
+            f"GROUP BY entity) d{i} ON d{i}.entity = r.entity"
+        )
+    return (f"SELECT {', '.join(selects)} FROM {rollup} r {' '.join(joins)} "
+            f"WHERE r.granularity = '{granularity}' GROUP BY r.entity")
@@ -1,37 +1,19 @@
 import pandas as pd
-import mysql.connector
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.preprocessing import OneHotEncoder
 from sklearn.ensemble import IsolationForest
 import os
+from ml_models.antivirus_ml.features import build_features, fetch_data
 
 OUTPUT_FOLDER = "static/antivirus_outputs"
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-def fetch_data():
-    conn = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="rootroot",
-        database="siem"
-    )
-    query = "SELECT file_path, timestamp, malware_type, severity, scan_type, os, detection_method FROM antivirus_logs"
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
-
 def run_anomaly_detection():
     df = fetch_data()
-    df_clean = df.drop(columns=["file_path", "timestamp"])
-    categorical_cols = df_clean.select_dtypes(include=["object"]).columns.tolist()
-    
-    encoder = OneHotEncoder(handle_unknown="ignore")
-    encoded = encoder.fit_transform(df_clean[categorical_cols])
-    df_encoded = pd.DataFrame(encoded.toarray(), columns=encoder.get_feature_names_out(categorical_cols))
+    features = build_features(df)
 
     iso_forest = IsolationForest(contamination=0.05, random_state=42)
-    anomaly_labels = iso_forest.fit_predict(df_encoded)
+    anomaly_labels = iso_forest.fit_predict(features)
     
     df["Anomaly_Flag"] = anomaly_labels
     df["Anomaly_Flag"] = df["Anomaly_Flag"].map({1: "Normal", -1: "Anomaly"})
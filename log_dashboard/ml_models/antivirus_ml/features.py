@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from db_utils.archive import archive_available, read_archive
+from db_utils.queries import get_connection
+
+# Columns the antivirus models read (typed in MySQL and in the archive)
+COLUMNS = ["log_id", "file_path", "timestamp", "machine_id", "os", "malware_type", "detection_method",
+           "scan_type", "action_taken", "severity", "file_size_kb", "is_persistent", "network_activity"]
+
+SEVERITY_ORDER = ["Low", "Medium", "High", "Critical"]
+CATEGORICAL = ["os", "malware_type", "detection_method", "scan_type", "action_taken"]
+
+
+def fetch_data():
+    if archive_available("antivirus_logs"):
+        return read_archive("antivirus_logs", COLUMNS)
+    conn = get_connection()
+    query = f"SELECT {', '.join(COLUMNS)} FROM antivirus_logs"
+    df = pd.read_sql(query, conn)
+    conn.close()
+    return df
+
+
+def build_features(df, target=None):
+    """Compact numeric feature frame: one small-int column per field, no one-hot.
+
+    Low-cardinality text becomes category codes, severity its rank,
+    machine_id the number of detections on that machine, and the timestamp
+    hour/weekday. `target` is left out of the features.
+    """
+    ts = pd.to_datetime(df["timestamp"], errors="coerce")
+    features = pd.DataFrame({
+        "file_size_kb": pd.to_numeric(df["file_size_kb"], errors="coerce").fillna(0).astype(np.float32),
+        "is_persistent": df["is_persistent"].fillna(0).astype(np.int8),
+        "network_activity": df["network_activity"].fillna(0).astype(np.int8),
+        "severity": pd.Categorical(df["severity"], categories=SEVERITY_ORDER, ordered=True).codes,
+        "machine_detections": df.groupby("machine_id")["machine_id"].transform("size").fillna(0).astype(np.int32),
+        "hour": ts.dt.hour.fillna(-1).astype(np.int8),
+        "weekday": ts.dt.weekday.fillna(-1).astype(np.int8),
+    }, index=df.index)
+    for column in CATEGORICAL:
+        features[column] = df[column].astype("category").cat.codes
+    return features.drop(columns=[target], errors="ignore")
@@ -1,43 +1,20 @@
 import pandas as pd
-import mysql.connector
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.preprocessing import OneHotEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import classification_report
 import os
+from ml_models.antivirus_ml.features import build_features, fetch_data
 
 OUTPUT_FOLDER = "static/antivirus_outputs"
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-def fetch_data():
-    conn = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="rootroot",
-        database="siem"
-    )
-    query = "SELECT file_path, timestamp, malware_type, severity, scan_type, os, detection_method FROM antivirus_logs"
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
-
 def run_severity_prediction():
     df = fetch_data()
-    df_clean = df.drop(columns=["file_path", "timestamp"])
-    
-    categorical_cols = df_clean.select_dtypes(include=["object"]).columns.tolist()
-    numerical_cols = df_clean.select_dtypes(include=["int64","float64"]).columns.tolist()
-    
-    encoder = OneHotEncoder(handle_unknown="ignore")
-    encoded = encoder.fit_transform(df_clean[categorical_cols])
-    encoded_df = pd.DataFrame(encoded.toarray(), columns=encoder.get_feature_names_out(categorical_cols))
-    
-    df_encoded = pd.concat([encoded_df, df_clean[numerical_cols].reset_index(drop=True)], axis=1)
     
     # Features & target
-    X = df_encoded.drop(columns=[col for col in df_encoded.columns if col.startswith("severity_")])
+    X = build_features(df, target="severity")
     y = df["severity"]
     
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
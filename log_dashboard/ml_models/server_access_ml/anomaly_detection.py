@@ -1,29 +1,22 @@
 import pandas as pd
 from sklearn.ensemble import IsolationForest
-import mysql.connector
 from mysql.connector import Error
 import matplotlib.pyplot as plt
 import os
-
-# Database credentials
-MYSQL_HOST = 'localhost'
-MYSQL_USER = 'root'
-MYSQL_PASSWORD = 'rootroot'
-MYSQL_DATABASE = 'siem'
+from db_utils.archive import archive_available, read_archive
+from db_utils.queries import entity_rollup_query, get_connection
 
 OUTPUT_DIR = os.path.join('static', 'server_outputs')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def load_data_from_mysql():
-    """Load server access logs from MySQL."""
+    """Load per-IP request totals from the hourly IP rollups (raw rows from the Parquet archive when enabled)."""
+    if archive_available("server_access_logs"):
+        return read_archive("server_access_logs", ["ip", "status", "url", "log_timestamp"])
     try:
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD,
-            database=MYSQL_DATABASE
-        )
-        query = "SELECT ip, status, url, log_timestamp FROM server_access_logs"
+        conn = get_connection()
+        query = (entity_rollup_query(conn, "server_access_logs", "ip", ["errors"], distinct=["url"])
+                 or "SELECT ip, status, url, log_timestamp FROM server_access_logs_v")
         df = pd.read_sql(query, conn)
         conn.close()
         return df
@@ -36,6 +29,16 @@ def feature_engineering(df):
     if df.empty:
         return pd.DataFrame()
 
+    if 'events' in df.columns:
+        # Already one row per IP (rollup sums)
+        events = pd.to_numeric(df['events'])
+        return pd.DataFrame({
+            'ip': df['ip'],
+            'request_count': events,
+            'error_ratio': pd.to_numeric(df['errors']) / events,
+            'unique_url_count': pd.to_numeric(df['distinct_url']),
+        })
+
     df['log_timestamp'] = pd.to_datetime(df['log_timestamp'], errors='coerce')
     df = df.dropna(subset=['ip'])
 
@@ -2,30 +2,29 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix
-import mysql.connector
 from mysql.connector import Error
 import matplotlib.pyplot as plt
 import os
+from db_utils.archive import archive_available, read_archive
+from db_utils.queries import entity_rollup_query, get_connection
 import seaborn as sns
 
-MYSQL_HOST = 'localhost'
-MYSQL_USER = 'root'
-MYSQL_PASSWORD = 'rootroot'
-MYSQL_DATABASE = 'siem'
-
 OUTPUT_DIR = os.path.join('static', 'server_outputs')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Per-IP rollup sums behind the features (see ENTITY_ROLLUPS in Server_Access_Logs.py)
+ROLLUP_METRICS = ['errors', 'url_length', 'path_depth', 'with_referer', 'bot_requests']
+
 def load_data():
-    """Load server access logs from MySQL."""
+    """Load per-IP totals from the hourly IP rollups (raw rows from MySQL or the Parquet archive otherwise)."""
+    if archive_available("server_access_logs"):
+        return read_archive("server_access_logs",
+                            ["ip", "status", "method", "url", "size", "referer", "user_agent"])
     try:
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD,
-            database=MYSQL_DATABASE
-        )
-        query = "SELECT ip, status, method, url, size, referer, user_agent FROM server_access_logs"
+        conn = get_connection()
+        # is_bot is set at ingest, so the agent text itself is not needed
+        query = (entity_rollup_query(conn, "server_access_logs", "ip", ROLLUP_METRICS)
+                 or "SELECT ip, status, method, url, size, referer, is_bot FROM server_access_logs_v")
         df = pd.read_sql(query, conn)
         conn.close()
         return df
@@ -35,13 +34,32 @@ def load_data():
 
 def label_data(df):
     """Label requests as bot or human based on User-Agent."""
-    df['label'] = df['user_agent'].str.contains(
-        'bot|crawler|spider|crawl|slurp', case=False, na=False
-    ).astype(int)
+    if 'bot_requests' in df.columns:
+        df['label'] = (pd.to_numeric(df['bot_requests']) > 0).astype(int)
+        return df
+    if 'is_bot' in df.columns:
+        df['label'] = df['is_bot'].fillna(0).astype(int)
+        return df
+    # Archive rows carry only the raw agent: match each distinct one once
+    agents = df['user_agent'].drop_duplicates()
+    bots = agents[agents.str.contains('bot|crawler|spider|crawl|slurp', case=False, na=False)]
+    df['label'] = df['user_agent'].isin(bots).astype(int)
     return df
 
 def feature_engineering(df):
     """Extract numeric behavioral features."""
+    if 'events' in df.columns:
+        # Already one row per IP: per-request means are rollup sums over the request count
+        events = pd.to_numeric(df['events'])
+        return pd.DataFrame({
+            'ip': df['ip'],
+            'url_length': pd.to_numeric(df['url_length']) / events,
+            'path_depth': pd.to_numeric(df['path_depth']) / events,
+            'is_error': pd.to_numeric(df['errors']) / events,
+            'has_referer': pd.to_numeric(df['with_referer']) / events,
+            'label': df['label'],
+        })
+
     df['url_length'] = df['url'].astype(str).apply(len)
     df['path_depth'] = df['url'].astype(str).apply(lambda x: x.count('/'))
     df['is_error'] = df['status'].apply(lambda x: 1 if int(x) >= 400 else 0)
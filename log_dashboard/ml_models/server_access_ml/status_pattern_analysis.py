@@ -1,36 +1,23 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import mysql.connector
 from mysql.connector import Error
 import os
-
-MYSQL_HOST = 'localhost'
-MYSQL_USER = 'root'
-MYSQL_PASSWORD = 'rootroot'
-MYSQL_DATABASE = 'siem'
+from db_utils.archive import archive_available, read_archive
+from db_utils.queries import entity_rollup_query, get_connection
 
 OUTPUT_DIR = os.path.join('static', 'server_outputs')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def analyze_status_patterns():
-    """Analyze status code distribution and request patterns."""
-    try:
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD,
-            database=MYSQL_DATABASE
-        )
-        query = "SELECT ip, status, method, size FROM server_access_logs"
-        df = pd.read_sql(query, conn)
-        conn.close()
-    except Error as e:
-        return {"summary": f"MySQL error: {e}", "plot": None, "metrics": {}}
+# Status group → column of the per-IP rollups (see ENTITY_ROLLUPS in Server_Access_Logs.py)
+STATUS_GROUPS = {
+    '2xx Success': 'status_2xx',
+    '3xx Redirect': 'status_3xx',
+    '4xx Client Error': 'status_4xx',
+    '5xx Server Error': 'status_5xx',
+}
 
-    if df.empty:
-        return {"summary": "⚠️ No server access log data found.", "plot": None, "metrics": {}}
-
-    # Clean up data
+def status_groups_from_rows(df):
+    """IP × status group request counts from raw rows."""
     df['status'] = pd.to_numeric(df['status'], errors='coerce')
     df['size'] = pd.to_numeric(df['size'], errors='coerce')
     df = df.dropna(subset=['status', 'size', 'method'])
@@ -42,9 +29,35 @@ def analyze_status_patterns():
                   '4xx Client Error' if 400 <= x < 500 else
                   '5xx Server Error' if 500 <= x < 600 else 'Other'
     )
+    return df.groupby(['ip', 'status_group']).size().unstack(fill_value=0)
+
+def status_groups_from_rollup(df):
+    """IP × status group request counts from the per-IP rollup sums."""
+    agg = pd.DataFrame({group: pd.to_numeric(df[column]) for group, column in STATUS_GROUPS.items()})
+    agg['Other'] = pd.to_numeric(df['events']) - agg.sum(axis=1)
+    agg.index = df['ip']
+    agg.columns.name = 'status_group'
+    return agg.loc[:, agg.sum() > 0]   # like the row path: only groups that occur
+
+def analyze_status_patterns():
+    """Analyze status code distribution and request patterns."""
+    if archive_available("server_access_logs"):
+        df = read_archive("server_access_logs", ["ip", "status", "method", "size"])
+    else:
+        try:
+            conn = get_connection()
+            query = (entity_rollup_query(conn, "server_access_logs", "ip", list(STATUS_GROUPS.values()))
+                     or "SELECT ip, status, method, size FROM server_access_logs")
+            df = pd.read_sql(query, conn)
+            conn.close()
+        except Error as e:
+            return {"summary": f"MySQL error: {e}", "plot": None, "metrics": {}}
+
+    if df.empty:
+        return {"summary": "⚠️ No server access log data found.", "plot": None, "metrics": {}}
 
     # Aggregation
-    agg = df.groupby(['ip', 'status_group']).size().unstack(fill_value=0)
+    agg = status_groups_from_rollup(df) if 'events' in df.columns else status_groups_from_rows(df)
     agg['total_requests'] = agg.sum(axis=1)
     agg['error_rate'] = (agg.get('4xx Client Error', 0) + agg.get('5xx Server Error', 0)) / agg['total_requests']
 
@@ -53,12 +66,12 @@ def analyze_status_patterns():
 
     # Summary metrics
     summary = {
-        "Total Unique IPs": len(df['ip'].unique()),
+        "Total Unique IPs": len(agg),
         "Average Error Rate": f"{agg['error_rate'].mean() * 100:.2f}%"
     }
 
     # Visualization
-    status_counts = df['status_group'].value_counts()
+    status_counts = agg.drop(columns=['total_requests', 'error_rate']).sum().sort_values(ascending=False)
     plt.figure(figsize=(6, 4))
     status_counts.plot(kind='bar', color=['green', 'blue', 'orange', 'red', 'gray'])
     plt.title("HTTP Status Code Distribution")
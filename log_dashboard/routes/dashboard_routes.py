@@ -1,20 +1,36 @@
-from flask import Blueprint, render_template
-from db_utils.queries import fetch_count  # import your new fetch_count function
+from functools import partial
+
+from flask import Blueprint, jsonify, make_response, render_template
+from db_utils.cache import get_query_cache
+from db_utils.connection import get_pool
+from db_utils.fanout import fan_out, server_timing
+from db_utils.queries import fetch_count, fetch_recent_counts  # import your new fetch_count function
 
 # Create the blueprint first
 dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/")
 
 @dashboard_bp.route("/")
 def home():
-    antivirus_count = fetch_count("antivirus_logs")
-    login_count = fetch_count("login_log_data")
-    rdp_count = fetch_count("rdp_events")
-    server_access_count = fetch_count("server_access_logs")
-
-    return render_template(
-        "dashboard.html",
-        antivirus_count=antivirus_count,
-        login_count=login_count,
-        rdp_count=rdp_count,
-        server_access_count=server_access_count
+    # Independent queries, run side by side on pooled connections
+    results, timings = fan_out(
+        antivirus_count=partial(fetch_count, "antivirus_logs"),
+        login_count=partial(fetch_count, "login_log_data"),
+        rdp_count=partial(fetch_count, "rdp_events"),
+        server_access_count=partial(fetch_count, "server_access_logs"),
+        # Rows per source over the last 1h/24h/7d (empty until the loaders have built rollups)
+        recent_counts=fetch_recent_counts,
     )
+
+    response = make_response(render_template("dashboard.html", **results))
+    response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
+@dashboard_bp.route("/metrics/db_pool")
+def db_pool_metrics():
+    """Connection pool usage and checkout latency, for tuning Config.DB_POOL_SIZE."""
+    return jsonify(get_pool().stats())
+
+@dashboard_bp.route("/metrics/query_cache")
+def query_cache_metrics():
+    """Query-result cache hits, misses and evictions, for tuning Config.QUERY_CACHE_TTL/SIZE."""
+    return jsonify(get_query_cache().stats())
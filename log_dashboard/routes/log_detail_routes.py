@@ -1,6 +1,8 @@
-from flask import Blueprint, render_template, request, jsonify
-from db_utils.queries import fetch_logs, fetch_summary
-from config import get_db_connection
+from functools import partial
+
+from flask import Blueprint, make_response, render_template, request, jsonify
+from db_utils.fanout import fan_out, server_timing
+from db_utils.queries import SEARCH_COLUMNS, fetch_page, fetch_summary
 
 
 log_detail_bp = Blueprint("logs", __name__, url_prefix="/logs")
@@ -13,55 +15,66 @@ def safe_summary(raw_summary, key_map=None):
         for row in raw_summary:
             label = row[list(row.keys())[0]]
             if key_map:
-                label = key_map.get(label, label)
+                label = key_map.get(str(label), label)
             labels.append(str(label))
             data.append(row["count"])
     return {"labels": labels, "data": data}
 
+def timed_page(template, timings, **context):
+    """Rendered page with the per-query timings in its Server-Timing header."""
+    response = make_response(render_template(template, **context))
+    response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
 # ---------- Antivirus Logs ----------
 @log_detail_bp.route("/antivirus_logs")
 def antivirus_logs():
-    logs = fetch_logs("antivirus_logs", limit=50)
-    severity_summary = safe_summary(fetch_summary("antivirus_logs", "severity"))
-    malware_summary = safe_summary(fetch_summary("antivirus_logs", "malware_type"))
-    return render_template(
+    # Page and summaries are independent: run them side by side
+    results, timings = fan_out(
+        page=partial(fetch_page, "antivirus_logs", limit=50),
+        severity=partial(fetch_summary, "antivirus_logs", "severity"),
+        malware_type=partial(fetch_summary, "antivirus_logs", "malware_type"),
+    )
+    logs, next_cursor = results["page"]
+    return timed_page(
         "antivirus_logs.html",
+        timings,
         logs=logs,
-        severity_summary=severity_summary,
-        malware_summary=malware_summary
+        next_cursor=next_cursor,
+        severity_summary=safe_summary(results["severity"]),
+        malware_summary=safe_summary(results["malware_type"])
     )
 
 # Show more endpoint for antivirus logs
 @log_detail_bp.route("/antivirus_logs/more")
 def antivirus_logs_more():
-    offset = int(request.args.get("offset", 0))
-    search = request.args.get("search", "")
-    severity_filter = request.args.get("severity", "")
-    all_logs = fetch_logs("antivirus_logs", limit=50, offset=offset, search=search)
-    # Apply severity filter manually
-    if severity_filter:
-        all_logs = [log for log in all_logs if log["severity"].lower() == severity_filter.lower()]
-    return jsonify(all_logs)
+    return logs_more("antivirus_logs")
 
 
 # ---------- Login Logs ----------
 @log_detail_bp.route("/login_log_data")
 def login_logs():
-    logs = fetch_logs("login_log_data", limit=50)
-    
+    results, timings = fan_out(
+        page=partial(fetch_page, "login_log_data", limit=50),
+        status=partial(fetch_summary, "login_log_data", "login_successful"),
+        asn=partial(fetch_summary, "login_log_data", "asn"),
+    )
+    logs, next_cursor = results["page"]
+
     # Status summary (Success/Failed)
     status_summary = safe_summary(
-        fetch_summary("login_log_data", "login_successful"),
-        key_map={1: "Successful", 0: "Failed"}  # keep these exact strings
+        results["status"],
+        key_map={"1": "Successful", "0": "Failed"}  # keep these exact strings
     )
 
-    
     # ASN summary (number of attempts per ASN)
-    asn_summary = safe_summary(fetch_summary("login_log_data", "asn"))
-    
-    return render_template(
+    asn_summary = safe_summary(results["asn"])
+
+    return timed_page(
         "login_log_data.html",
+        timings,
         logs=logs,
+        next_cursor=next_cursor,
         summary=status_summary,
         asn_summary=asn_summary
     )
@@ -69,52 +82,49 @@ def login_logs():
 # ---------- RDP Events ----------
 @log_detail_bp.route('/rdp_events')
 def rdp_events():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT * FROM rdp_events ORDER BY id DESC LIMIT 50")
-    logs = cursor.fetchall()
+    results, timings = fan_out(
+        page=partial(fetch_page, "rdp_events", limit=50),
+        status=partial(fetch_summary, "rdp_events", "status"),
+    )
+    logs, next_cursor = results["page"]
 
     # For chart: count Connected, Disconnected, Failed
-    cursor.execute("SELECT status, COUNT(*) as count FROM rdp_events GROUP BY status")
-    summary_data = cursor.fetchall()
+    summary_status = safe_summary(results["status"])
 
-    summary_status = {
-        "labels": [row['status'] for row in summary_data],
-        "data": [row['count'] for row in summary_data]
-    }
-
-    conn.close()
-    return render_template('rdp_events.html', logs=logs, summary_status=summary_status)
+    return timed_page('rdp_events.html', timings, logs=logs, next_cursor=next_cursor, summary_status=summary_status)
 
 @log_detail_bp.route('/rdp_events/more')
 def rdp_events_more():
-    offset = int(request.args.get('offset', 0))
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM rdp_events ORDER BY id DESC LIMIT %s, 50", (offset,))
-    more_logs = cursor.fetchall()
-    conn.close()
-    return jsonify(more_logs)
+    return logs_more("rdp_events")
 
 
 # ---------- Server Access Logs ----------
 @log_detail_bp.route("/server_access_logs")
 def server_access_logs():
-    logs = fetch_logs("server_access_logs", limit=50)
-    method_summary = safe_summary(fetch_summary("server_access_logs", "method"))
-    status_summary = safe_summary(fetch_summary("server_access_logs", "status"))
-    return render_template(
+    results, timings = fan_out(
+        page=partial(fetch_page, "server_access_logs", limit=50),
+        method=partial(fetch_summary, "server_access_logs", "method"),
+        status=partial(fetch_summary, "server_access_logs", "status"),
+    )
+    logs, next_cursor = results["page"]
+    return timed_page(
         "server_access_logs.html",
+        timings,
         logs=logs,
-        method_summary=method_summary,
-        status_summary=status_summary
+        next_cursor=next_cursor,
+        method_summary=safe_summary(results["method"]),
+        status_summary=safe_summary(results["status"])
     )
 
 # "Show More" endpoints for JS
 @log_detail_bp.route("/<table_name>/more")
 def logs_more(table_name):
-    offset = int(request.args.get("offset", 0))
-    search = request.args.get("search", "")
-    logs = fetch_logs(table_name, limit=50, offset=offset, search=search)
-    return jsonify(logs)
+    if table_name not in SEARCH_COLUMNS:
+        return jsonify({"error": f"unknown table: {table_name}"}), 404
+    try:
+        # Filters (severity, status, ip, since/until, ...) are read from the query string
+        logs, next_cursor = fetch_page(table_name, limit=50, cursor=request.args.get("cursor", ""),
+                                       search=request.args.get("search", ""), filters=request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"logs": logs, "next_cursor": next_cursor})
@@ -0,0 +1,8 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# ingest.* imports from the repo root; the dashboard imports config/db_utils as top-level modules
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "log_dashboard")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,129 @@
+from datetime import datetime
+
+import pytest
+
+from ingest.bulk_writer import BulkWriter, _tsv_field, chain
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+        self.rowcount = -1
+        self.result = []
+
+    def execute(self, sql, params):
+        assert sql.startswith("SELECT k FROM t WHERE (k) IN ((%s)"), sql
+        self.result = [(key,) for key in params if key in self.conn.keys]
+
+    def fetchall(self):
+        return self.result
+
+    def executemany(self, sql, rows):
+        assert not self.closed and self.conn.connected, "cursor of a dead session"
+        new = 0
+        for row in rows:
+            if row[0] not in self.conn.keys:
+                self.conn.keys.add(row[0])
+                new += 1
+        self.conn.executed.append((sql, list(rows)))
+        self.rowcount = new
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConn:
+    """Stores rows keyed by their first value, like a unique key with INSERT IGNORE."""
+
+    def __init__(self):
+        self.keys = set()
+        self.executed = []
+        self.commits = 0
+        self.connected = True
+        self.cursors = []
+
+    def cursor(self):
+        self.cursors.append(FakeCursor(self))
+        return self.cursors[-1]
+
+    def commit(self):
+        self.commits += 1
+
+    def is_connected(self):
+        return self.connected
+
+    def reconnect(self, attempts=1, delay=0):
+        for cursor in self.cursors:
+            cursor.closed = True        # mysql.connector cursors do not survive a reconnect
+        self.connected = True
+
+
+class FakeArchive:
+    def __init__(self):
+        self.rows = []
+        self.closed = False
+
+    def write_many(self, rows):
+        self.rows.extend(rows)
+
+    def close(self):
+        self.closed = True
+
+
+def test_batches_commit_and_count_duplicates():
+    conn = FakeConn()
+    with BulkWriter(conn, "t", ["k", "v"], batch_size=2, on_duplicate="ignore") as writer:
+        writer.write_many([("a", 1), ("b", 2), ("a", 3)])
+        assert conn.commits == 1            # first batch of two written as soon as it filled up
+    assert conn.commits == 2
+    assert (writer.rows_written, writer.rows_skipped) == (2, 1)
+    assert conn.executed[0][0] == "INSERT IGNORE INTO t (k, v) VALUES (%s, %s)"
+
+
+def test_prepare_runs_on_the_written_rows_and_archive_gets_the_originals():
+    conn, archive = FakeConn(), FakeArchive()
+    prepare = chain(None, lambda rows: [(k.upper(), v) for k, v in rows], lambda rows: rows[::-1])
+    with BulkWriter(conn, "t", ["k", "v"], prepare=prepare, archive=archive) as writer:
+        writer.write_many([("a", 1), ("b", 2)])
+    assert conn.executed[0][1] == [("B", 2), ("A", 1)]
+    assert archive.rows == [("a", 1), ("b", 2)] and archive.closed
+
+
+@pytest.mark.parametrize("archive_key", [["k"], None])
+def test_archive_gets_only_inserted_rows(archive_key):
+    conn, archive = FakeConn(), FakeArchive()
+    conn.keys.add("old")
+    with BulkWriter(conn, "t", ["k", "v"], on_duplicate="ignore", archive=archive, archive_key=archive_key) as writer:
+        writer.write_many([("old", 1), ("old", 2)])      # a replay: nothing new
+        writer.flush()
+        writer.write_many([("a", 1), ("old", 2), ("a", 3), ("b", 4)])
+    assert (writer.rows_written, writer.rows_skipped) == (2, 4)
+    if archive_key:
+        assert archive.rows == [("a", 1), ("b", 4)]
+    else:   # without the key only whole-batch replays can be told apart
+        assert archive.rows == [("a", 1), ("old", 2), ("a", 3), ("b", 4)]
+
+
+def test_update_sql():
+    writer = BulkWriter(FakeConn(), "t", ["k", "v"], on_duplicate="update", update_columns=["v"])
+    assert writer.insert_sql.endswith("ON DUPLICATE KEY UPDATE v = VALUES(v)")
+    with pytest.raises(ValueError):
+        BulkWriter(FakeConn(), "t", ["k"], on_duplicate="replace")
+
+
+def test_ensure_connected_reopens_the_cursor():
+    conn = FakeConn()
+    writer = BulkWriter(conn, "t", ["k"])
+    assert writer.ensure_connected() is False
+    conn.connected = False
+    assert writer.ensure_connected() is True
+    writer.write(("a",))
+    assert writer.flush() == 1
+
+
+def test_tsv_field():
+    assert _tsv_field(None) == r"\N"
+    assert _tsv_field(True) == "1"
+    assert _tsv_field(datetime(2024, 5, 1, 12, 0, 1)) == "2024-05-01 12:00:01"
+    assert _tsv_field("a\tb\\c\n") == r"a\tb\\c\n"
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from db_utils.cache import QueryCache
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    current = {"rdp_events": 1}
+    monkeypatch.setattr(QueryCache, "_read_versions", staticmethod(lambda: dict(current)))
+    return current
+
+
+def counting(result="rows"):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return result
+
+    return calls, compute
+
+
+def test_hit_until_the_data_version_changes(versions):
+    cache = QueryCache(max_entries=10, ttl=60, version_check_interval=0)
+    calls, compute = counting()
+    assert cache.get_or_compute("rdp_events", "q", (1,), compute) == "rows"
+    assert cache.get_or_compute("rdp_events", "q", (1,), compute) == "rows"
+    assert len(calls) == 1
+    versions["rdp_events"] = 2
+    cache.get_or_compute("rdp_events", "q", (1,), compute)
+    assert len(calls) == 2 and cache.invalidated == 1
+
+
+def test_entries_expire_after_the_ttl(versions):
+    cache = QueryCache(max_entries=10, ttl=0.01, version_check_interval=60)
+    calls, compute = counting()
+    cache.get_or_compute("rdp_events", "q", (), compute)
+    time.sleep(0.02)
+    cache.get_or_compute("rdp_events", "q", (), compute)
+    assert len(calls) == 2 and cache.expired == 1
+
+
+def test_least_recently_used_entry_is_evicted(versions):
+    cache = QueryCache(max_entries=2, ttl=60, version_check_interval=60)
+    calls, compute = counting()
+    for params in [(1,), (2,), (1,), (3,)]:         # (2,) is the least recently used when (3,) arrives
+        cache.get_or_compute("rdp_events", "q", params, compute)
+    assert list(cache.entries) == [("rdp_events", "q", (1,)), ("rdp_events", "q", (3,))]
+    assert cache.evictions == 1
+
+
+def test_errors_are_raised_and_not_cached(versions):
+    cache = QueryCache(max_entries=10, ttl=60, version_check_interval=60)
+
+    def fail():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("rdp_events", "q", (), fail)
+    assert cache.get_or_compute("rdp_events", "q", (), lambda: "ok") == "ok"
+    assert not cache.inflight
+
+
+def test_concurrent_misses_run_the_query_once(versions):
+    cache = QueryCache(max_entries=10, ttl=60, version_check_interval=60)
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "rows"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("rdp_events", "q", (), slow)))
+               for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["rows"] * 4 and len(calls) == 1
+
+
+def test_disabled_cache_always_computes(versions):
+    cache = QueryCache(max_entries=10, ttl=0, version_check_interval=60)
+    calls, compute = counting()
+    cache.get_or_compute("rdp_events", "q", (), compute)
+    cache.get_or_compute("rdp_events", "q", (), compute)
+    assert len(calls) == 2 and not cache.entries
+
+
+def test_missing_registry_falls_back_to_ttl_only(monkeypatch):
+    monkeypatch.setattr(QueryCache, "_read_versions", staticmethod(lambda: None))
+    cache = QueryCache(max_entries=10, ttl=60, version_check_interval=0)
+    calls, compute = counting()
+    cache.get_or_compute(None, "q", (), compute)
+    cache.get_or_compute(None, "q", (), compute)
+    assert len(calls) == 1 and cache.stats()["hit_ratio"] == 0.5
@@ -0,0 +1,58 @@
+import hashlib
+import re
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from ingest.dedup import FLOAT_DIGITS, row_hash, row_hash_sql, with_row_hash
+
+COLUMNS = ["name", "port", "ok", "score", "seen"]
+ROWS = [
+    ("alice", 22, True, 1.0, datetime(2024, 5, 1, 12, 30, 5)),
+    ("bob", None, False, 0.1, datetime(2024, 5, 1, 0, 0, 0)),
+    (None, 3389, None, None, None),
+    ("carol", 0, True, 1e15 / 3, datetime(2024, 5, 1, 12, 30, 5, 250000)),
+    ("", -1, False, -2.5, None),
+]
+
+
+def mysql_like_db():
+    """SQLite with the MySQL functions row_hash_sql() uses. SQLite has no fixed-point
+    DECIMAL, so that cast is rewritten to a function rounding the same way."""
+    db = sqlite3.connect(":memory:")
+    db.create_function("SHA1", 1, lambda text: hashlib.sha1(text.encode("utf-8")).hexdigest())
+    db.create_function("CONCAT_WS", -1, lambda sep, *values: sep.join(v for v in values if v is not None))
+    db.create_function("TO_DECIMAL", 1, lambda value: None if value is None else f"{value:.{FLOAT_DIGITS}f}")
+    db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT, port INTEGER, ok INTEGER, score REAL, seen TEXT)")
+    db.executemany("INSERT INTO t (name, port, ok, score, seen) VALUES (?, ?, ?, ?, ?)",
+                   [row[:4] + (row[4] and str(row[4]),) for row in ROWS])
+    return db
+
+
+def test_row_hash_matches_row_hash_sql():
+    sql = row_hash_sql(COLUMNS, float_columns=["score"])
+    sql = re.sub(rf"CAST\((\w+) AS DECIMAL\(65, {FLOAT_DIGITS}\)\)", r"TO_DECIMAL(\1)", sql)
+    stored = [h for (h,) in mysql_like_db().execute(f"SELECT {sql} FROM t ORDER BY id")]
+    assert stored == [row_hash(row) for row in ROWS]
+
+
+def test_row_hash_sql_skips_no_column():
+    # CONCAT_WS drops NULLs, which would shift the fields; every column is COALESCEd
+    assert row_hash_sql(["a", "b"]).count("COALESCE") == 2
+
+
+@pytest.mark.parametrize("a, b", [
+    ((None, "x"), ("None", "x")),
+    ((1.0,), (1.00001,)),
+    ((True,), (1.5,)),
+])
+def test_row_hash_keeps_values_apart(a, b):
+    assert row_hash(a) != row_hash(b)
+
+
+def test_row_hash_normalises_like_mysql():
+    assert row_hash((None, float("nan"))) == row_hash(("", ""))
+    assert row_hash((True, 2)) == row_hash(("1", "2"))
+    assert row_hash((0.1,)) == row_hash(("0.100000",))
+    assert with_row_hash(("a", 1))[-1] == row_hash(("a", 1))
@@ -0,0 +1,54 @@
+import pytest
+
+from ingest.geoip import IpRangeIndex, _to_int, enricher
+from ingest.useragent import classify
+
+US, DE, V6 = (1, "US", None), (2, "DE", "Org"), (3, "NL", None)
+
+
+def ip(text):
+    return _to_int(text)[1]
+
+
+@pytest.fixture
+def index():
+    return IpRangeIndex([
+        (4, ip("1.0.0.0"), ip("1.0.0.255"), US),
+        (4, ip("1.0.1.0"), ip("1.0.3.255"), DE),          # adjacent to the previous range
+        (4, ip("8.8.8.0"), ip("8.8.8.255"), US),
+        (4, ip("255.255.255.0"), ip("255.255.255.255"), DE),
+        (6, ip("2001:db8::"), ip("2001:db8::ffff"), V6),
+    ])
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("1.0.0.0", US), ("1.0.0.255", US), ("1.0.1.0", DE), ("1.0.3.255", DE), ("1.0.4.0", None),
+    ("0.255.255.255", None), ("8.8.8.8", US), ("8.8.9.0", None), ("255.255.255.255", DE),
+    ("2001:db8::1", V6), ("2001:db8::1:0", None), ("::1", None),
+    ("1.2", None), ("1.0.0.256", None), ("not an ip", None), ("", None), (None, None),
+])
+def test_lookup(index, address, expected):
+    assert index.lookup(address) == expected
+
+
+def test_len_and_enricher(index):
+    assert len(index) == 5
+    rows = enricher(index, 0, ("country", "org"))([("1.0.2.3", "x"), ("10.0.0.1", "y")])
+    assert rows == [("1.0.2.3", "x", "DE", "Org"), ("10.0.0.1", "y", None, None)]
+
+
+@pytest.mark.parametrize("agent, expected", [
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+     "Chrome/120.0.0.0 Safari/537.36 Edg/120.0.2210.91", (False, "edge", "desktop")),
+    ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+     "Version/17.0 Mobile/15E148 Safari/604.1", (False, "safari", "mobile")),
+    ("Mozilla/5.0 (Linux; Android 13; SM-X200) AppleWebKit/537.36 Chrome/115.0 Safari/537.36",
+     (False, "chrome", "tablet")),
+    ("Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)", (True, "other", "bot")),
+    ("Mozilla/5.0 (X11; Linux x86_64) HeadlessChrome/120.0 Safari/537.36", (True, "chrome", "bot")),
+    ("curl/8.4.0", (False, "cli", "other")),
+    ("-", (None, None, None)),
+    (None, (None, None, None)),
+])
+def test_classify(agent, expected):
+    assert classify(agent) == expected
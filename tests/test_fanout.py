@@ -0,0 +1,41 @@
+import threading
+import time
+
+import pytest
+
+from db_utils.fanout import fan_out, server_timing
+
+
+def test_calls_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)      # deadlocks unless all three run at once
+
+    def call(value):
+        return lambda: (barrier.wait(), value)[1]
+
+    results, timings = fan_out(a=call(1), b=call(2), c=call(3))
+    assert results == {"a": 1, "b": 2, "c": 3}
+    assert set(timings) == {"a", "b", "c", "total"}
+
+
+def test_wall_time_is_about_the_slowest_call():
+    results, timings = fan_out(**{name: (lambda: time.sleep(0.1)) for name in "abc"})
+    assert timings["total"] < 250
+
+
+def test_an_error_is_raised_after_every_call_finished():
+    finished = []
+
+    def slow():
+        time.sleep(0.05)
+        finished.append(True)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        fan_out(fail=fail, slow=slow)
+    assert finished == [True]
+
+
+def test_server_timing_header():
+    assert server_timing({"page": 12.345, "total": 20}) == "page;dur=12.3, total;dur=20.0"
@@ -0,0 +1,81 @@
+import os
+
+from ingest.follow import Checkpoints, iter_new_lines, poll_once
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def collect():
+    seen = []
+    return seen, lambda path, lines, header: seen.append((os.path.basename(path), header, lines))
+
+
+def test_partial_last_line_waits_for_its_newline(tmp_path):
+    path = tmp_path / "a.log"
+    path.write_bytes(b"one\ntwo\nthr")
+    assert list(iter_new_lines(path, 0)) == [(["one", "two"], 8)]
+    assert list(iter_new_lines(path, 8)) == []
+
+
+def test_resumes_from_checkpoint_after_restart(tmp_path):
+    log, checkpoint = tmp_path / "Logs.txt", str(tmp_path / "cp.json")
+    append(log, "a\nb\n")
+    seen, handle = collect()
+    poll_once(str(tmp_path / "Logs*.txt"), handle, Checkpoints(checkpoint))
+    append(log, "c\n")
+    poll_once(str(tmp_path / "Logs*.txt"), handle, Checkpoints(checkpoint))     # a new process
+    assert [lines for _, _, lines in seen] == [["a", "b"], ["c"]]
+
+
+def test_rotation_drains_the_old_file_then_reads_the_new_one(tmp_path):
+    log, checkpoint = tmp_path / "Logs.txt", Checkpoints(str(tmp_path / "cp.json"))
+    pattern = str(tmp_path / "Logs*.txt")
+    seen, handle = collect()
+    append(log, "a\n")
+    poll_once(pattern, handle, checkpoint)
+    append(log, "b\n")                          # written just before the rotation
+    os.rename(log, tmp_path / "Logs.old")       # rotated out of the pattern
+    append(log, "c\n")
+    poll_once(pattern, handle, checkpoint)
+    assert seen == [("Logs.txt", None, ["a"]), ("Logs.old", None, ["b"]), ("Logs.txt", None, ["c"])]
+    assert [entry["path"] for entry in checkpoint.entries.values()] == [str(log)]
+
+
+def test_csv_header_is_kept_per_file_and_not_handed_over(tmp_path):
+    path = tmp_path / "rdp_dataset.csv"
+    checkpoint = str(tmp_path / "cp.json")
+    seen, handle = collect()
+    append(path, "id,user\n1,alice\n")
+    poll_once(str(tmp_path / "rdp_dataset*.csv"), handle, Checkpoints(checkpoint), has_header=True)
+    append(path, "2,bob\n")
+    poll_once(str(tmp_path / "rdp_dataset*.csv"), handle, Checkpoints(checkpoint), has_header=True)
+    assert seen == [("rdp_dataset.csv", "id,user", ["1,alice"]), ("rdp_dataset.csv", "id,user", ["2,bob"])]
+
+
+def test_truncated_file_is_read_again(tmp_path):
+    log, checkpoint = tmp_path / "Logs.txt", Checkpoints(str(tmp_path / "cp.json"))
+    seen, handle = collect()
+    append(log, "a\nb\n")
+    poll_once(str(log), handle, checkpoint)
+    log.write_text("c\n")
+    poll_once(str(log), handle, checkpoint)
+    assert [lines for _, _, lines in seen] == [["a", "b"], ["c"]]
+
+
+def test_failed_handler_does_not_advance_the_checkpoint(tmp_path):
+    log, checkpoint = tmp_path / "Logs.txt", str(tmp_path / "cp.json")
+    append(log, "a\n")
+
+    def fail(path, lines, header):
+        raise RuntimeError("database down")
+
+    try:
+        poll_once(str(log), fail, Checkpoints(checkpoint))
+    except RuntimeError:
+        pass
+    seen, handle = collect()
+    poll_once(str(log), handle, Checkpoints(checkpoint))
+    assert [lines for _, _, lines in seen] == [["a"]]
@@ -0,0 +1,16 @@
+from ingest.receiver import load_loader
+
+
+def test_antivirus_missing_text_is_stored_as_null():
+    antivirus = load_loader("antivirus")
+    header = ",".join(antivirus.CSV_HEADER)
+    rows = antivirus.lines_to_rows([
+        "a1,27-05-2025 10:16,Machine_14,Windows 11,C:/x.bat,Trojan,Signature-based,Custom Scan,Blocked,Medium,2859.38,1,1",
+        "a2,27-05-2025 10:17,,Windows 11,C:/y.js,,Heuristic,Full Scan,,High,,,0",
+    ], header)
+    columns = list(antivirus.COLUMN_MAP.values())
+    full, sparse = (dict(zip(columns, row)) for row in rows)
+    assert full["machine_id"] == "Machine_14" and full["is_persistent"] is True
+    assert sparse["machine_id"] is None and sparse["malware_type"] is None and sparse["action_taken"] is None
+    assert sparse["file_size_kb"] is None and sparse["is_persistent"] is None
+    assert "nan" not in sparse.values()
@@ -0,0 +1,81 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from db_utils.queries import SEARCH_COLUMNS, decode_cursor, encode_cursor, filter_conditions, search_condition
+
+
+@pytest.mark.parametrize("last_id", [1, 50, 2 ** 40])
+def test_cursor_round_trip(last_id):
+    cursor = encode_cursor(last_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == last_id
+
+
+def test_no_cursor_means_the_first_page():
+    assert decode_cursor("") is None and decode_cursor(None) is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!!", encode_cursor(5)[:-3], "e30",                   # {} – no id
+    base64.urlsafe_b64encode(b'{"id": "5 OR 1=1"}').decode(),
+    base64.urlsafe_b64encode(b'{"id": true}').decode(),
+    base64.urlsafe_b64encode(b'[5]').decode(),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_filters_become_parameterised_conditions():
+    conditions, params = filter_conditions("antivirus_logs", {
+        "severity": "High", "malware_type": " Trojan ", "machine_id": "", "unknown": "x",
+        "since": "2025-05-27T10:16", "until": "2025-05-28T00:00:00+02:00",
+    })
+    assert conditions == ["severity = %s", "malware_type = %s", "timestamp >= %s", "timestamp < %s"]
+    assert params == ["High", "Trojan", datetime(2025, 5, 27, 10, 16), datetime(2025, 5, 27, 22, 0)]
+
+
+def test_login_status_maps_to_the_stored_flag():
+    assert filter_conditions("login_log_data", {"status": "Failed"}) == (["login_successful = %s"], [0])
+
+
+@pytest.mark.parametrize("table, filters", [
+    ("login_log_data", {"status": "maybe"}),
+    ("rdp_events", {"since": "yesterday"}),
+    ("server_access_logs", {"until": "2025-13-01"}),
+])
+def test_bad_filter_values_are_rejected(table, filters):
+    with pytest.raises(ValueError):
+        filter_conditions(table, filters)
+
+
+def test_values_never_reach_the_sql():
+    conditions, params = filter_conditions("rdp_events", {"username": "x' OR '1'='1"})
+    assert conditions == ["username = %s"] and params == ["x' OR '1'='1"]
+
+
+def test_search_uses_the_fulltext_index():
+    sql, params = search_condition("rdp_events", ' ali"ce ')
+    assert "MATCH(session_id, username, remote_address, status) AGAINST (%s IN BOOLEAN MODE)" in sql
+    assert params == ['"ali ce"']
+
+
+def test_search_matches_normalized_text_in_its_dimension_tables():
+    sql, params = search_condition("server_access_logs", "curl")
+    assert "MATCH(ip, method, url, referer, user_agent) AGAINST (%s IN BOOLEAN MODE)" in sql
+    for column, dimension in [("url", "urls"), ("referer", "referers"), ("user_agent", "user_agents")]:
+        assert (f"{column}_id IN (SELECT id FROM {dimension} "
+                f"WHERE MATCH(value) AGAINST (%s IN BOOLEAN MODE))") in sql
+    assert sql.count(" OR ") == 3 and params == ['"curl"'] * 4
+
+
+def test_search_shorter_than_an_ngram_falls_back_to_like():
+    sql, params = search_condition("login_log_data", "%")
+    assert sql == "(ip_address LIKE %s OR asn LIKE %s)"
+    assert params == ["%\\%%"] * len(SEARCH_COLUMNS["login_log_data"])
+
+
+def test_blank_search_matches_everything():
+    assert search_condition("antivirus_logs", ' " ') is None
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+from ingest.receiver import Receiver, SourceSink, load_loader, parse_syslog
+
+
+class FakeConn:
+    def __init__(self):
+        self.rolled_back = False
+
+    def ping(self, reconnect=False):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+class FakeWriter:
+    def __init__(self):
+        self.buffer = []
+        self.stored = []
+
+    def ensure_connected(self):
+        return False
+
+    def write_many(self, rows):
+        self.buffer.extend(rows)
+
+    def flush(self):
+        self.stored.extend(self.buffer)
+        self.buffer = []
+
+
+@pytest.fixture
+def rdp_sink(monkeypatch):
+    loader = load_loader("rdp")
+    writer = FakeWriter()
+    monkeypatch.setattr(loader, "connect_for_insert", FakeConn)
+    monkeypatch.setattr(loader, "open_writer", lambda conn, stats: writer)
+    monkeypatch.setattr(loader, "update_summaries", lambda conn: 0)
+    sink = SourceSink("rdp", loader)
+    yield sink, writer
+    sink.executor.shutdown()
+
+
+GOOD = ["1-1,alice,10.0.0.1,3389,connected,2025-07-28 09:40:23",
+        "1-2,bob,10.0.0.2,3389,failed,2025-07-28 09:41:00"]
+
+
+def test_bad_line_does_not_drop_its_batch(rdp_sink):
+    sink, writer = rdp_sink
+    blank_port = "1-3,carol,10.0.0.3,,connected,2025-07-28 09:42:00"
+    extra_field = "1-4,dave,10.0.0.4,3389,connected,2025-07-28 09:43:00,oops"
+    sink._write([GOOD[0], blank_port, extra_field, GOOD[1]])
+    assert [row[1] for row in writer.stored] == ["alice", "bob"]
+    assert sink.stats.rejected == 2
+
+
+def test_skipped_lines_are_counted(rdp_sink):
+    sink, writer = rdp_sink
+    sink._write(GOOD + ["1-5,erin,10.0.0.5,3389,connected,not a time"])
+    assert len(writer.stored) == 2
+    assert sink.stats.rejected == 1
+
+
+def test_clean_batch_is_written_whole(rdp_sink):
+    sink, writer = rdp_sink
+    sink._write(GOOD)
+    assert len(writer.stored) == 2
+    assert sink.stats.rejected == 0
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("<13>Oct 11 22:14:15 web nginx: 1.2.3.4 - - [x]", ("nginx", "1.2.3.4 - - [x]")),
+    ("<165>1 2025-10-11T22:14:15Z host rdp 42 - - a,b,c", ("rdp", "a,b,c")),
+    ("no header at all", (None, "no header at all")),
+])
+def test_parse_syslog(text, expected):
+    assert parse_syslog(text) == expected
+
+
+def post(receiver, source, lines):
+    body = "\n".join(lines).encode()
+    reader = asyncio.StreamReader()
+    reader.feed_data(f"POST /ingest/{source} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    reader.feed_eof()
+    return asyncio.run(receiver._http_request(reader))
+
+
+def test_http_rejects_json_that_is_not_a_record(rdp_sink):
+    sink, writer = rdp_sink
+    receiver = Receiver({"rdp": sink})
+    lines = ['[1, 2]', '"' + GOOD[0] + '"', '3', 'null', 'not json', json.dumps({"line": GOOD[1]}),
+             json.dumps({"source": ["rdp"], "line": GOOD[1]})]
+    assert post(receiver, "rdp", lines) == (202, {"accepted": 2, "rejected": 5})
+    assert sink.pending == GOOD
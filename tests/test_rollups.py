@@ -0,0 +1,216 @@
+import re
+from collections import Counter
+
+from ingest import rollups
+from ingest.rollups import id_gaps, plan_refresh, refresh_summaries
+
+
+class FakeLogDb:
+    """Just enough of MySQL for refresh_summaries: committed ids of one table, the
+    registry row and the gap list. Folds are recorded per id so double counting shows."""
+
+    def __init__(self):
+        self.committed = set()
+        self.next_id = 1
+        self.registry = None
+        self.gaps = {}              # first_id → (last_id, found_at)
+        self.folded = Counter()
+
+    def allocate(self, n):
+        """Auto-increment ids for an insert that has not committed yet."""
+        ids = list(range(self.next_id, self.next_id + n))
+        self.next_id += n
+        return ids
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=()):
+        db, sql = self.db, " ".join(sql.split())
+        if sql.startswith("INSERT IGNORE INTO log_sources"):
+            db.registry = db.registry or {"last_id": 0, "row_count": 0}
+        elif sql.startswith("SELECT MAX(id)"):
+            self.result = [(max(db.committed, default=None),)]
+        elif "FROM log_sources" in sql and "FOR UPDATE" in sql:
+            self.result = [("ts", db.registry["last_id"])]
+        elif sql.startswith("DELETE FROM log_rollup_gaps") and "found_at <" in sql:
+            db.gaps = {f: (l, t) for f, (l, t) in db.gaps.items() if t >= params[1]}
+        elif sql.startswith("DELETE FROM log_rollup_gaps"):
+            del db.gaps[params[1]]
+        elif sql.startswith("SELECT first_id"):
+            self.result = [(f, l, t) for f, (l, t) in sorted(db.gaps.items())]
+        elif sql.startswith("SELECT t.id"):
+            self.result = [(i,) for i in sorted(db.committed)
+                           if any(f <= i <= l for f, (l, _) in db.gaps.items())]
+        elif sql.startswith("SELECT id FROM"):
+            after, upto, limit = params
+            self.result = [(i,) for i in sorted(db.committed) if after < i <= upto][:limit]
+        elif sql.startswith("INSERT INTO log_summaries") and params[1] == "*":
+            bounds = params[2:]
+            for i in db.committed:
+                if any(bounds[k] <= i <= bounds[k + 1] for k in range(0, len(bounds), 2)):
+                    db.folded[i] += 1
+        elif sql.startswith("UPDATE log_sources"):
+            db.registry["last_id"] = params[0]
+            db.registry["row_count"] += params[1]
+        elif not re.match(r"INSERT INTO log_summar", sql):
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def executemany(self, sql, rows):
+        for _, first, last, found_at in rows:
+            self.db.gaps[first] = (last, found_at)
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+def refresh(db, chunk_rows=rollups.REFRESH_CHUNK_ROWS):
+    return refresh_summaries(db, "events", [], "ts", chunk_rows=chunk_rows)
+
+
+def test_id_gaps():
+    assert id_gaps(0, 10, [1, 2, 5, 9]) == [(3, 4), (6, 8), (10, 10)]
+    assert id_gaps(4, 4, []) == []
+    assert id_gaps(4, 6, []) == [(5, 6)]
+
+
+def test_plan_refresh_closes_filled_gap_and_keeps_the_rest():
+    fold, closed, opened = plan_refresh(10, 12, [11, 12], [(3, 6, "t0")], [4])
+    assert fold == [(11, 12), (3, 6)]
+    assert closed == [(3, 6, "t0")]
+    assert opened == [(3, 3, "t0"), (5, 6, "t0")]
+
+
+def test_interleaved_writers_are_each_folded_once():
+    db = FakeLogDb()
+    slow = db.allocate(3)               # writer A holds ids 1-3 in an open transaction
+    fast = db.allocate(3)               # writer B gets 4-6 and commits first
+    db.committed.update(fast)
+    assert refresh(db) == 3
+    assert db.registry["last_id"] == 6
+    assert list(db.gaps) == [1]         # 1-3 still expected
+
+    db.committed.update(slow)           # A commits behind the watermark
+    later = db.allocate(2)
+    db.committed.update(later)
+    assert refresh(db) == 5
+    assert db.gaps == {}
+    assert db.registry["row_count"] == 8
+    assert db.folded == Counter({i: 1 for i in slow + fast + later})
+
+
+def test_burnt_ids_stay_gaps_until_they_expire(monkeypatch):
+    db = FakeLogDb()
+    db.committed.update(db.allocate(2))
+    db.allocate(2)                      # ignored duplicates: ids never used
+    db.committed.update(db.allocate(1))
+    refresh(db)
+    assert list(db.gaps) == [3]
+    assert refresh(db) == 0
+    monkeypatch.setattr(rollups, "GAP_RETENTION", rollups.timedelta(seconds=-1))
+    refresh(db)
+    assert db.gaps == {}
+    assert db.registry["row_count"] == 3
+
+
+def test_backfill_in_chunks():
+    db = FakeLogDb()
+    db.committed.update(db.allocate(10))
+    assert refresh(db, chunk_rows=4) == 10
+    assert db.registry["last_id"] == 10
+    assert set(db.folded.values()) == {1} and len(db.folded) == 10
+
+
+class ScriptedCursor:
+    """Answers SELECTs from `answers` (first matching SQL fragment wins) and records every statement."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.statements = []
+        self.result = []
+        self.in_transaction = False
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        if sql.startswith("SET TRANSACTION"):
+            # MySQL error 1568: transaction characteristics can't be changed inside one
+            assert not self.in_transaction, "SET TRANSACTION inside an open transaction"
+        else:
+            self.in_transaction = True      # autocommit is off: any statement opens one
+        self.statements.append((sql, tuple(params)))
+        self.result = next((rows for fragment, rows in self.answers if fragment in sql), [])
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class ScriptedConn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = False
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.committed = True
+        self._cursor.in_transaction = False
+
+    def rollback(self):
+        self._cursor.in_transaction = False
+
+
+def reconcile(answers):
+    cursor = ScriptedCursor([("information_schema", [(1,)]), ("FOR UPDATE", [("ts", 100)]),
+                             ("SELECT row_count", [(90,)])] + answers)
+    conn = ScriptedConn(cursor)
+    result = rollups.reconcile_counts(conn, "events", ["user"], {"user": {}})
+    assert conn.committed
+    return result, cursor.statements
+
+
+def test_reconcile_counts_only_folded_rows():
+    matching = [("GROUP BY 1", [("alice", 95)]), ("FROM log_summary_totals", [("alice", 95)]),
+                ("SELECT COUNT(*)", [(95,)]), ("SUM(", [(95,)])]
+    result, statements = reconcile(matching)
+    assert result == (90, 95)
+    counts = [(sql, params) for sql, params in statements if sql.startswith("SELECT COUNT(*) FROM events")]
+    assert counts and all("NOT EXISTS" in sql and params == (100, "events") for sql, params in counts)
+    assert not any(sql.startswith(("DELETE", "INSERT")) for sql, _ in statements)
+    assert statements[-1][1] == (95, 1, "events")
+
+
+def test_reconcile_rebuilds_drifted_rollups():
+    drifted = [("GROUP BY 1", [("alice", 95)]), ("FROM log_summary_totals", [("alice", 95)]),
+               ("SELECT COUNT(*)", [(95,)]), ("FROM log_summaries", [(93,)]), ("SUM(", [(95,)])]
+    result, statements = reconcile(drifted)
+    assert result == (90, 95)
+    sqls = [sql for sql, _ in statements]
+    assert "DELETE FROM log_summaries WHERE source = %s" in sqls
+    assert "DELETE FROM events_by_user" in sqls
+    folds = [(sql, params) for sql, params in statements if sql.startswith("INSERT INTO")]
+    assert folds and all("NOT EXISTS" in sql and params[-2:] == (100, "events") for sql, params in folds)